@@ -0,0 +1,21 @@
+"""
+Module testing many small files at once: files holding the same number of values are stacked into a 2-D array and
+each test supporting batches is run once per group of files, the other tests being scheduled file by file.
+Each file is loaded once into shared memory for all its tests and freed as soon as they are done, see TestScheduler.
+"""
+from random_sample_tester.scheduler import TestScheduler
+
+# Largest number of files stacked into a batch, as many files are kept loaded to fill the batches
+BATCH_FILES = 256
+
+
+def run_with_batches(pool, n_cores, files, test_names, data_code, separator, progress_queue, cost_model=None,
+                     result_cache=None, sample_cache_dir=None, batch_files=BATCH_FILES):
+    """
+    Run the tests on all the files, batching the tests that support it and scheduling the others.
+    :param batch_files: largest number of files stacked into a batch
+    :return: list of test results for each file, in the order of the files
+    """
+    scheduler = TestScheduler(pool, n_cores, test_names, data_code, separator, progress_queue, cost_model,
+                              result_cache, sample_cache_dir, batch_files)
+    return scheduler.run(files)
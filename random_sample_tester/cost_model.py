@@ -0,0 +1,104 @@
+"""
+Module estimating how long each statistical test takes on a sample, used to schedule the longest jobs first.
+Estimates come from the complexity model of each test and are calibrated with the running times of past runs.
+"""
+import json
+import logging
+import os
+
+from statistical_tests.statistical_test import TestRegistry
+from utils.data_type import DataType
+
+# File where the calibrated costs are kept between runs
+COST_MODEL_PATH = os.path.join(os.path.expanduser("~"), ".cache", "random_test_tool", "cost_model.json")
+
+# Weight of the last measure in the calibrated costs
+CALIBRATION_RATE = 0.5
+
+# First guess of the number of bits of a sample per byte of its file
+DEFAULT_BITS_PER_BYTE = {DataType.INT: 2.0, DataType.BITSTRING: 1.0, DataType.BYTES: 8.0}
+
+
+class CostModel:
+    """
+    Class estimating the cost in seconds of a test on a sample of n bits as cost_per_unit * complexity(n).
+    cost_per_unit is calibrated for each test and data type from the measured running times.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.costs_per_unit = {}
+        self.bits_per_byte = {}
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, "r") as file:
+                    saved = json.load(file)
+                self.costs_per_unit = saved.get("costs_per_unit", {})
+                self.bits_per_byte = saved.get("bits_per_byte", {})
+            except (OSError, ValueError):
+                logging.warning(f"Cost model {path} cannot be read, default costs are used.")
+
+    @staticmethod
+    def _key(test_name, data_type):
+        return f"{test_name}/{data_type.name}"
+
+    def estimate_n_bits(self, path, data_type):
+        """
+        Estimate the size of a sample from the size of its file, before it is parsed.
+        :param path: file path
+        :param data_type: data type of the file
+        :return: estimated number of bits
+        """
+        ratio = self.bits_per_byte.get(data_type.name, DEFAULT_BITS_PER_BYTE[data_type])
+        return int(os.path.getsize(path) * ratio)
+
+    def record_n_bits(self, path, data_type, n_bits):
+        """
+        Calibrate the sample size estimate with the size of a parsed file.
+        """
+        size = os.path.getsize(path)
+        if size:
+            previous = self.bits_per_byte.get(data_type.name, DEFAULT_BITS_PER_BYTE[data_type])
+            self.bits_per_byte[data_type.name] = (1 - CALIBRATION_RATE) * previous + CALIBRATION_RATE * n_bits / size
+
+    def estimate(self, test_name, data_type, n_bits):
+        """
+        Estimate the running time of a test.
+        :param test_name: registered test name
+        :param data_type: data type of the sample
+        :param n_bits: number of bits of the sample
+        :return: estimated running time in seconds
+        """
+        test_cls = TestRegistry.get_test_class(test_name)
+        cost_per_unit = self.costs_per_unit.get(self._key(test_name, data_type), test_cls.cost_per_unit)
+        return cost_per_unit * test_cls.complexity(n_bits)
+
+    def record(self, test_name, data_type, n_bits, duration):
+        """
+        Calibrate the cost of a test with a measured running time.
+        :param test_name: registered test name
+        :param data_type: data type of the sample
+        :param n_bits: number of bits of the sample
+        :param duration: running time in seconds
+        """
+        test_cls = TestRegistry.get_test_class(test_name)
+        complexity = test_cls.complexity(n_bits)
+        if complexity <= 0:
+            return
+        key = self._key(test_name, data_type)
+        previous = self.costs_per_unit.get(key, test_cls.cost_per_unit)
+        self.costs_per_unit[key] = (1 - CALIBRATION_RATE) * previous + CALIBRATION_RATE * duration / complexity
+
+    def save(self):
+        """
+        Save the calibrated costs for the next runs.
+        """
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as file:
+                json.dump({"costs_per_unit": self.costs_per_unit, "bits_per_byte": self.bits_per_byte}, file,
+                          indent=2)
+        except OSError:
+            logging.warning(f"Cost model cannot be saved to {self.path}.")
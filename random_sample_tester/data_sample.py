@@ -0,0 +1,121 @@
+"""
+Module containing the representation of the samples given to the statistical tests.
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from utils.bit_conversion import bit_array_to_string, integers_to_bits, window_codes
+from utils.bit_statistics import compute_bit_statistics
+from utils.random_walk import compute_random_walk_statistics
+from utils.data_type import DataType
+
+# Number of bits unpacked at once when iterating over a bit sample
+BIT_CHUNK_SIZE = 1 << 23
+
+
+@dataclass
+class DataSample:
+    """
+    Sample handed to the statistical tests.
+    Bit samples are stored once as a packed uint8 buffer (one bit per bit), the views needed by the tests are derived
+    from it on demand and cached so that they are only built once per sample.
+    """
+    data: object
+    data_type: DataType
+    n_bits: int = 0
+    # (shift, exponent) used to write integers as bits, computed on the sample itself when None
+    bit_range: tuple = None
+    _views: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_bits(cls, bits):
+        """
+        Build a bit sample from a bit sequence.
+        :param bits: uint8 array holding one bit per element
+        :return: DataSample
+        """
+        sample = cls(np.packbits(bits), DataType.BITSTRING, len(bits))
+        sample._views["bits"] = bits
+        return sample
+
+    def _get_view(self, name, builder):
+        if name not in self._views:
+            self._views[name] = builder()
+        return self._views[name]
+
+    def _integers_to_bits(self):
+        bits = integers_to_bits(self.data, self.bit_range)
+        self.n_bits = len(bits)
+        return bits
+
+    def packed_bits(self):
+        """
+        :return: packed uint8 buffer holding the bits of the sample
+        """
+        if self.data_type == DataType.INT:
+            return self._get_view("packed_bits", lambda: np.packbits(self.bits()))
+        return self.data
+
+    def bits(self):
+        """
+        Integer samples are expanded into bits only once, see utils.bit_conversion.integers_to_bits.
+        :return: uint8 array holding one bit per element
+        """
+        if self.data_type == DataType.INT:
+            return self._get_view("bits", self._integers_to_bits)
+        return self._get_view("bits", lambda: np.unpackbits(self.packed_bits(), count=self.n_bits))
+
+    def signs(self):
+        """
+        :return: int8 array where 0 bits are replaced by -1 and 1 bits by 1
+        """
+        return self._get_view("signs", lambda: self.bits().view(np.int8) * 2 - 1)
+
+    def iter_bits(self, chunk_size=BIT_CHUNK_SIZE):
+        """
+        Iterate over the bits of the sample, only unpacking chunk_size bits at a time.
+        :param chunk_size: number of bits per chunk, must be a multiple of 8
+        :return: generator of uint8 arrays holding one bit per element
+        """
+        if "bits" in self._views or self.data_type == DataType.INT:
+            bits = self.bits()
+            for start in range(0, len(bits), chunk_size):
+                yield bits[start:start + chunk_size]
+            return
+
+        packed = self.packed_bits()
+        chunk_bytes = chunk_size // 8
+        for start in range(0, len(packed), chunk_bytes):
+            count = min(chunk_size, self.n_bits - start * 8)
+            yield np.unpackbits(packed[start:start + chunk_bytes], count=count)
+
+    def bit_statistics(self):
+        """
+        Frequency statistics shared by several tests, computed in a single pass over the bits.
+        :return: BitStatistics, see utils.bit_statistics
+        """
+        n_bits = len(self.bits()) if self.data_type == DataType.INT else self.n_bits
+        return self._get_view("bit_statistics", lambda: compute_bit_statistics(self.iter_bits(), n_bits))
+
+    def random_walk_statistics(self):
+        """
+        State visits of the random walk of the bits, shared by the random excursions tests.
+        :return: RandomWalkStatistics, see utils.random_walk
+        """
+        return self._get_view("random_walk_statistics", lambda: compute_random_walk_statistics(self.iter_bits()))
+
+    def window_codes(self, m, overlapping=True):
+        """
+        Codes of the m bits windows of the sample, built once per (m, overlapping) and shared by the pattern tests.
+        :param m: number of bits per window
+        :param overlapping: windows start at every bit when True, they are consecutive blocks of m bits otherwise
+        :return: array of codes, see utils.bit_conversion.window_codes
+        """
+        return self._get_view(("window_codes", m, overlapping), lambda: window_codes(self.bits(), m, overlapping))
+
+    def bit_string(self):
+        """
+        :return: string of bits (0 and 1), kept for tests working on strings
+        """
+        return self._get_view("bit_string", lambda: bit_array_to_string(self.bits()))
@@ -1,25 +1,35 @@
 """
 Module containing output generation functions.
 """
-import itertools
+import csv
 import os
+import shutil
+import tempfile
 import time
 
-import pandas as pd
-from matplotlib import pyplot as plt
+import numpy as np
 from tabulate import tabulate
 
+# Status counted in the summary of each test
+SUMMARY_STATUS = ["OK", "SUSPECT", "KO"]
 
-def _generate_plots(group, group_name, dir_path, time_str):
+# Columns of the result file, the other fields of a report are gathered in a details column
+REPORT_FIELDS = ["test_name", "n_sample", "p_value", "criterias", "status"]
+
+
+def _generate_plots(p_values, group_name, dir_path, time_str):
     """
     Generate graphical representations of the output of the different statistical_tests.
-    :param group: data to plot
+    :param p_values: p-values to plot, None when the test could not be run
     :param group_name: test name
     """
+    # Only imported when graphs are generated
+    from matplotlib import pyplot as plt
+
     plot_path = os.path.join(dir_path, f"{time_str}-plots")
     if not os.path.exists(plot_path):
         os.mkdir(plot_path)
-    y = group["p_value"].to_numpy()
+    y = np.array(p_values, dtype=np.float64)
     x = range(1, len(y) + 1)
     # Scatter plot
     plt.plot(x, y, marker='.', linestyle='none')
@@ -35,70 +45,118 @@ def _generate_plots(group, group_name, dir_path, time_str):
     plt.clf()
 
 
-def _generate_execution_summary(output_dir, time_str, test_summary, execution_data):
+def _generate_execution_summary(output_dir, time_str, test_summary, exec_time, processed_files):
     with open(os.path.join(output_dir, f"{time_str}-summary.txt"), 'w') as file:
         file.write("RANDOM TEST TOOL REPORT SUMMARY\n\n")
-        file.write(f"Execution Time: {execution_data['exec_time']}")
+        file.write(f"Execution Time: {exec_time}")
         file.write("\n\n")
         file.write("Processed files: \n")
-        file.writelines([f"- {inputs[1]}\n" for inputs in execution_data["processed_files"]])
+        processed_files.seek(0)
+        shutil.copyfileobj(processed_files, file)
         file.write("\n\n")
         file.write("Tests summary: ")
         file.write("\n")
         file.write(tabulate(test_summary, tablefmt='fancy_grid', headers="keys"))
 
 
-def generate_report(outputs, mode, execution_data):
+class ReportWriter:
     """
-    Takes the outputs from different runs and generates an output report.
-    :param execution_data: Summary of relevant executuion information
-    :param outputs: list of dictionaries
-    :param mode: terminal/file/graph or all output mode
+    Class writing the reports of each file to the outputs as soon as its tests are done, so that the reports are not
+    kept until the end of the run and the files already tested are reported when a run is interrupted.
+    Only the count of each status, and the p-values when graphs are generated, are kept for the summary.
     """
-    time_str = time.strftime("%Y-%m-%d-%H-%M-%S")
-    output_dir = f"rtt-{time_str}"
-    terminal = (mode == "terminal" or mode == "all")
-    graph = (mode == "graph" or mode == "all")
-    file = (mode == "file" or mode == "all")
 
-    # Generating output_directory
-    os.mkdir(output_dir)
+    def __init__(self, mode):
+        """
+        :param mode: terminal/file/graph or all output mode
+        """
+        self.time_str = time.strftime("%Y-%m-%d-%H-%M-%S")
+        self.terminal = (mode == "terminal" or mode == "all")
+        self.graph = (mode == "graph" or mode == "all")
+        self.file = (mode == "file" or mode == "all")
+
+        # Generating output_directory, runs started in the same second get a directory of their own
+        self.output_dir = f"rtt-{self.time_str}"
+        try:
+            os.mkdir(self.output_dir)
+        except FileExistsError:
+            self.output_dir = os.path.relpath(tempfile.mkdtemp(prefix=f"{self.output_dir}-", dir="."))
+
+        self.status_counts = {}
+        self.p_values = {}
+        self.csv_file = None
+        self.csv_writer = None
+        if self.file:
+            self.csv_file = open(os.path.join(self.output_dir, f"{self.time_str}-statistical_results.csv"), "w",
+                                 newline="")
+        # Processed files are listed in the execution summary, they are spooled to disk until the end of the run
+        self.processed_files = tempfile.TemporaryFile("w+") if self.file or self.graph else None
 
-    if terminal:
-        for test_result in outputs:
-            table = tabulate(test_result, tablefmt='fancy_grid', headers="keys")
-            print(table)
+    def write(self, path, test_results):
+        """
+        Write the reports of a file.
+        :param path: file path
+        :param test_results: list of reports of the tests run on the file
+        """
+        if self.terminal:
+            print(tabulate(test_results, tablefmt='fancy_grid', headers="keys"))
 
-    if file or graph:
-        df = pd.DataFrame(list(itertools.chain.from_iterable(outputs)))
+        if self.processed_files is None:
+            return
+        self.processed_files.write(f"- {path}\n")
+        test_results = [report for report in test_results if report is not None]
+        for report in test_results:
+            counts = self.status_counts.setdefault(report["test_name"], dict.fromkeys(SUMMARY_STATUS, 0))
+            if report["status"] in counts:
+                counts[report["status"]] += 1
+            if self.graph:
+                self.p_values.setdefault(report["test_name"], []).append(report["p_value"])
 
-        if file:
-            df_formatted = pd.DataFrame(outputs).stack().apply(pd.Series)
-            df_formatted.to_csv(f"{output_dir}/{time_str}-statistical_results.csv", index=False)
+        if self.file and test_results:
+            if self.csv_writer is None:
+                self.csv_writer = csv.writer(self.csv_file, lineterminator="\n")
+                self.csv_writer.writerow(REPORT_FIELDS + ["details"])
+            for report in test_results:
+                details = "; ".join(f"{key}={value}" for key, value in report.items() if key not in REPORT_FIELDS)
+                self.csv_writer.writerow([report.get(field) for field in REPORT_FIELDS] + [details])
+            self.csv_file.flush()
+
+    def close(self, exec_time):
+        """
+        Write the summary of the run.
+        :param exec_time: execution time of the run, in seconds
+        """
+        if self.csv_file is not None:
+            self.csv_file.close()
+        if self.processed_files is None:
+            return
 
-        groups = df.groupby("test_name")
         summary = []
-        for name, group in groups:
+        for name in sorted(self.status_counts):
+            if self.graph:
+                _generate_plots(self.p_values[name], name, self.output_dir, self.time_str)
             summary_for_test = {"test_name": name}
-            if graph:
-                _generate_plots(group, name, output_dir, time_str)
-            try:
-                summary_for_test["OK_count"] = group["status"].value_counts()["OK"]
-            except KeyError:
-                summary_for_test["OK_count"] = 0
-            try:
-                summary_for_test["SUSPECT_count"] = group["status"].value_counts()["SUSPECT"]
-            except KeyError:
-                summary_for_test["SUSPECT_count"] = 0
-            try:
-                summary_for_test["KO_count"] = group["status"].value_counts()["KO"]
-            except KeyError:
-                summary_for_test["KO_count"] = 0
+            for status in SUMMARY_STATUS:
+                summary_for_test[f"{status}_count"] = self.status_counts[name][status]
             summary.append(summary_for_test)
 
-        if terminal:
+        if self.terminal:
             # We add an additional summary table in this case
             print(tabulate(summary, tablefmt='fancy_grid', headers="keys"))
 
         # Generating execution summary
-        _generate_execution_summary(output_dir, time_str, summary, execution_data)
+        _generate_execution_summary(self.output_dir, self.time_str, summary, exec_time, self.processed_files)
+        self.processed_files.close()
+
+
+def generate_report(outputs, mode, execution_data):
+    """
+    Takes the outputs from different runs and generates an output report.
+    :param execution_data: Summary of relevant executuion information
+    :param outputs: list of dictionaries
+    :param mode: terminal/file/graph or all output mode
+    """
+    writer = ReportWriter(mode)
+    for inputs, test_results in zip(execution_data["processed_files"], outputs):
+        writer.write(inputs[1], test_results)
+    writer.close(execution_data["exec_time"])
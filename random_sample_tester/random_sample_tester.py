@@ -1,17 +1,14 @@
 import logging
 import os
-from dataclasses import dataclass
+import numpy as np
 
+from random_sample_tester.data_sample import DataSample
+from random_sample_tester.sample_cache import load_sample, sample_cache_path, save_sample
+from random_sample_tester.sample_stream import STREAM_CHUNK_SIZE, SampleStream, map_bytes
 from statistical_tests.statistical_test import TestRegistry
+from utils.bit_conversion import bit_array_to_string, bit_string_to_array
 from utils.data_type import DataType
-from bitstring import BitArray
-
-
-@dataclass
-class DataSample:
-    data: list
-    data_type: DataType
-
+from utils.integer_parser import parse_integers
 
 class RandomSample:
     """
@@ -20,6 +17,16 @@ class RandomSample:
 
     def __init__(self):
         self.data = None
+        self.stream = None
+        # Cached parsed sample the data is backed by, if any
+        self.cache_path = None
+
+    @property
+    def data_type(self):
+        """
+        Data type of the sample, loaded in memory or streamed.
+        """
+        return self.stream.data_type if self.stream is not None else self.data.data_type
 
     @staticmethod
     def transform_bytes_to_bits(in_bytes):
@@ -28,46 +35,62 @@ class RandomSample:
         :param in_bytes: bytes
         :return: string of bits (0 and 1)
         """
-        return BitArray(bytes=in_bytes).bin[2:]
+        return bit_array_to_string(np.unpackbits(np.frombuffer(in_bytes, dtype=np.uint8)))
 
-    def get_data(self, path, data_code, separator):
+    def get_data(self, path, data_code, separator, sample_cache_dir=None):
         """
         Retrieves the data to test, determines the type and creates a generator for this data
-        :param separator: separator for INT data type
+        :param separator: separator for INT data type, "auto" to detect it
         :param data_code: data_type given in argument
         :param path: input file paths
+        :param sample_cache_dir: directory where parsed text files are cached, see sample_cache, None to always parse
         """
         if not os.path.exists(path):
             logging.error(f"The {path} file given as input does not exist. End of execution.")
             raise FileNotFoundError
 
-        data_values = []
-
         # We determine data type
         data_type = DataType.get_data_type(data_code)
 
         if data_type == DataType.BYTES:
-            with open(path, 'rb') as file:
-                # Bytes must be converted into bitstring
-                data = file.read()
-                data_values = self.transform_bytes_to_bits(data)
-                data_type = DataType.BITSTRING
-        else:
+            # Bytes already are packed bits, the file is used as is and only unpacked when a test needs it
+            data = map_bytes(path)
+            self.data = DataSample(data, DataType.BITSTRING, len(data) * 8)
+            return
+
+        if sample_cache_dir is not None:
+            cache_path = sample_cache_path(sample_cache_dir, path, data_code, separator)
+            self.data = load_sample(cache_path, data_type)
+            if self.data is not None:
+                self.cache_path = cache_path
+                return
+
+        if data_type == DataType.BITSTRING:
             with open(path, 'r') as file:
-                lines = file.read().splitlines()
-
-                # Processing file
-                if data_type == DataType.BITSTRING:
-                    data_values = lines[0]
-
-                if data_type == DataType.INT:
-                    if separator == "\\n":
-                        for line in lines:
-                            data_values.append(int(line))
-                    else:
-                        data_values = list(map(int, lines[0].split(separator)))
+                self.data = DataSample.from_bits(bit_string_to_array(file.readline().rstrip("\r\n")))
+        elif data_type == DataType.INT:
+            self.data = DataSample(parse_integers(path, separator), data_type)
+
+        if sample_cache_dir is not None:
+            try:
+                save_sample(cache_path, self.data)
+                self.cache_path = cache_path
+            except OSError:
+                logging.warning(f"Parsed sample of {path} cannot be cached in {sample_cache_dir}.")
+
+    def open_stream(self, path, data_code, separator, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Prepare the data to test to be read chunk by chunk instead of being loaded in memory.
+        :param separator: separator for INT data type, "auto" to detect it
+        :param data_code: data_type given in argument
+        :param path: input file paths
+        :param chunk_size: number of bytes read at once
+        """
+        if not os.path.exists(path):
+            logging.error(f"The {path} file given as input does not exist. End of execution.")
+            raise FileNotFoundError
 
-        self.data = DataSample(data_values, data_type)
+        self.stream = SampleStream(path, data_code, separator, chunk_size)
 
 
 class RandomSampleTester(RandomSample):
@@ -89,27 +112,37 @@ class RandomSampleTester(RandomSample):
         for test in self.statistical_tests:
             self.test_results.append(test.generate_report())
 
-    def register_tests_for_run(self, test_names):
+    @staticmethod
+    def select_tests(test_names, data_type):
         """
-        Retrieves and configures the statistical_tests to run for this run.
+        Retrieves the statistical_tests to run on a data type, only the modules of these tests are imported.
+        :param test_names: list of test names or "all"
+        :param data_type: data type of the sample
+        :return: list of (test name, test class)
         """
-        test_dic = TestRegistry.get_available_tests()
-        data_type = self.data.data_type
+        available_names = TestRegistry.get_test_names()
+        tests = []
 
         if test_names == "all":
-            for test in test_dic.items():
-                if data_type in test[1][1]:
-                    logging.info(f"Adding {test[0]} to the run.")
-                    self.statistical_tests.append(test[1][0]())
+            for test_name in available_names:
+                if data_type in TestRegistry.get_data_types(test_name):
+                    tests.append((test_name, TestRegistry.get_test_class(test_name)))
         else:
             for test_name in test_names:
-                if test_name in list(test_dic.keys()):
-                    test = test_dic[test_name]
-                    if data_type in test[1]:
-                        logging.info(f"Adding {test_name} to the run.")
-                        self.statistical_tests.append(test[0]())
+                if test_name in available_names:
+                    if data_type in TestRegistry.get_data_types(test_name):
+                        tests.append((test_name, TestRegistry.get_test_class(test_name)))
                 else:
                     logging.warning(f"Test {test_name} does not exists.")
+        return tests
+
+    def register_tests_for_run(self, test_names):
+        """
+        Retrieves and configures the statistical_tests to run for this run.
+        """
+        for test_name, test_cls in self.select_tests(test_names, self.data_type):
+            logging.info(f"Adding {test_name} to the run.")
+            self.statistical_tests.append(test_cls())
 
     def run_tests(self, progress_queue):
         """
@@ -119,3 +152,32 @@ class RandomSampleTester(RandomSample):
         logging.info("Launching statistical_tests")
         self._run_test_on_sample(self.data, progress_queue)
 
+    def run_tests_streaming(self, progress_queue):
+        """
+        Runs all statistical_tests configured for this run in a single pass over the streamed sample.
+        Tests that cannot be streamed are skipped.
+        :param progress_queue: track the number of tests
+        """
+        streamed_tests = []
+        for test in self.statistical_tests:
+            if test.supports_streaming:
+                streamed_tests.append(test)
+            else:
+                logging.warning(f"{type(test).__name__} cannot be run on a streamed sample, it is skipped.")
+                progress_queue.put(1)
+        self.statistical_tests = streamed_tests
+
+        logging.info("Launching statistical_tests on streamed sample")
+        sample_info = self.stream.scan()
+        for test in self.statistical_tests:
+            test.begin(sample_info)
+
+        for chunk in self.stream.chunks():
+            for test in self.statistical_tests:
+                test.update(chunk)
+
+        for test in self.statistical_tests:
+            test.finalize()
+            progress_queue.put(1)
+            self.test_results.append(test.generate_report())
+
@@ -0,0 +1,165 @@
+"""
+Module keeping the reports of the tests between runs, so that files already tested are not parsed nor tested again.
+Reports are stored in a SQLite database and identified by the content of the file, the test, its parameters and the
+version of the tool. The digest of a file is only computed again when its size or modification time changed.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from random_sample_tester import __version__
+from statistical_tests.statistical_test import TestRegistry
+
+# Database where the reports are kept between runs
+RESULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "random_test_tool", "results.sqlite")
+
+# Reports not used for this long are evicted, in seconds
+MAX_AGE = 30 * 24 * 3600
+
+# Largest total size of the reports kept, the least recently used are evicted first
+MAX_SIZE = 256 << 20
+
+# Number of bytes read at once when computing the digest of a file
+DIGEST_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """
+    Compute the digest of the content of a file.
+    :param path: file path
+    :return: hexadecimal SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(DIGEST_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Class storing the report of each test run on a file content, in a SQLite database.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_age=MAX_AGE, max_size=MAX_SIZE):
+        self.path = path
+        self.max_age = max_age
+        self.max_size = max_size
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT, last_used REAL);
+            CREATE TABLE IF NOT EXISTS reports (
+                digest TEXT, data_code TEXT, separator TEXT, test_name TEXT, parameters TEXT, version TEXT,
+                report TEXT, last_used REAL,
+                PRIMARY KEY (digest, data_code, separator, test_name, parameters, version));
+        """)
+
+    def digest(self, path):
+        """
+        Digest of a file, only computed again when the size or the modification time of the file changed.
+        :param path: file path
+        :return: hexadecimal digest
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            digest = row[2]
+        else:
+            digest = file_digest(path)
+        self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                                (path, stat.st_size, stat.st_mtime_ns, digest, time.time()))
+        return digest
+
+    @staticmethod
+    def _key(digest, data_code, separator, test_name):
+        parameters = json.dumps(TestRegistry.get_test_class(test_name).parameters(), sort_keys=True)
+        return digest, data_code, separator, test_name, parameters, __version__
+
+    def get(self, digest, data_code, separator, test_name):
+        """
+        Retrieve the report of a test run on a file content.
+        :param digest: digest of the file
+        :param data_code: data type given in argument
+        :param separator: separator given in argument
+        :param test_name: registered test name
+        :return: report, None when the test has not been run on this content
+        """
+        key = self._key(digest, data_code, separator, test_name)
+        row = self.connection.execute(
+            "SELECT report FROM reports WHERE digest = ? AND data_code = ? AND separator = ? AND test_name = ? "
+            "AND parameters = ? AND version = ?", key).fetchone()
+        if row is None:
+            return None
+        self.connection.execute(
+            "UPDATE reports SET last_used = ? WHERE digest = ? AND data_code = ? AND separator = ? AND test_name = ? "
+            "AND parameters = ? AND version = ?", (time.time(),) + key)
+        return json.loads(row[0])
+
+    def put(self, digest, data_code, separator, test_name, report):
+        """
+        Store the report of a test run on a file content.
+        """
+        # Numpy scalars are stored as the python values they hold
+        value = json.dumps(report, default=lambda item: item.item())
+        self.connection.execute("INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                self._key(digest, data_code, separator, test_name) + (value, time.time()))
+
+    def lookup(self, path, data_code, separator, test_names):
+        """
+        Retrieve the reports of several tests run on a file.
+        :param path: file path
+        :param data_code: data type given in argument
+        :param separator: separator given in argument
+        :param test_names: registered test names
+        :return: (digest of the file, dict test name -> report for the tests found)
+        """
+        digest = self.digest(path)
+        reports = {}
+        for test_name in test_names:
+            report = self.get(digest, data_code, separator, test_name)
+            if report is not None:
+                reports[test_name] = report
+        return digest, reports
+
+    def evict(self):
+        """
+        Remove the reports not used for max_age seconds, then the least recently used ones until the reports fit in
+        max_size bytes.
+        """
+        limit = time.time() - self.max_age
+        self.connection.execute("DELETE FROM reports WHERE last_used < ?", (limit,))
+        self.connection.execute("DELETE FROM files WHERE last_used < ?", (limit,))
+        total = 0
+        evicted = []
+        for rowid, size in self.connection.execute(
+                "SELECT rowid, LENGTH(report) FROM reports ORDER BY last_used DESC"):
+            total += size
+            if total > self.max_size:
+                evicted.append((rowid,))
+        self.connection.executemany("DELETE FROM reports WHERE rowid = ?", evicted)
+        if evicted:
+            logging.info(f"{len(evicted)} reports evicted from the result cache.")
+
+    def save(self):
+        """
+        Evict the old reports and save the cache for the next runs.
+        """
+        try:
+            self.evict()
+            self.connection.commit()
+        except sqlite3.Error:
+            logging.warning(f"Result cache cannot be saved to {self.path}.")
+
+    def close(self):
+        """
+        Save the cache and close the database.
+        """
+        self.save()
+        self.connection.close()
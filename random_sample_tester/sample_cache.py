@@ -0,0 +1,82 @@
+"""
+Module keeping the parsed samples as NumPy binary files in a cache directory, so that text files are only parsed once.
+Cached samples are mapped in memory when they are loaded back instead of being read.
+"""
+import glob
+import hashlib
+import logging
+import os
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from utils.data_type import DataType
+
+# Directory suggested for the parsed samples
+SAMPLE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "random_test_tool", "samples")
+
+# Number of bytes at the start of a cached bit sample holding its number of bits, followed by the packed bits
+N_BITS_HEADER = 8
+
+
+def sample_cache_path(cache_dir, path, data_code, separator):
+    """
+    Path of the cached sample of a file, which changes with the size and the modification time of the file.
+    :param cache_dir: cache directory
+    :param path: file path
+    :param data_code: data type given in argument
+    :param separator: separator given in argument
+    :return: path of the .npy file
+    """
+    stat = os.stat(path)
+    source = hashlib.sha256(f"{os.path.abspath(path)}\n{data_code}\n{separator}".encode()).hexdigest()[:32]
+    version = hashlib.sha256(f"{stat.st_size}\n{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{source}-{version}.npy")
+
+
+def save_sample(cache_path, sample):
+    """
+    Write a parsed sample to the cache, the cached samples of older versions of the same file are removed.
+    :param cache_path: path given by sample_cache_path
+    :param sample: DataSample
+    """
+    if sample.data_type == DataType.BITSTRING:
+        header = np.array([sample.n_bits], dtype="<u8").view(np.uint8)
+        data = np.concatenate([header, sample.packed_bits()])
+    else:
+        data = np.asarray(sample.data)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # The file is written under a temporary name so that no process ever maps a partial file
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as file:
+        np.save(file, data)
+    os.replace(temporary_path, cache_path)
+    for stale_path in glob.glob(f"{cache_path.rsplit('-', 1)[0]}-*.npy"):
+        if stale_path != cache_path:
+            try:
+                os.remove(stale_path)
+            except OSError:
+                pass
+
+
+def load_sample(cache_path, data_type):
+    """
+    Map a cached sample in memory.
+    :param cache_path: path given by sample_cache_path
+    :param data_type: data type of the sample
+    :return: DataSample backed by the cached file, None when the file is not cached
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        data = np.load(cache_path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays cannot be mapped
+        data = np.load(cache_path)
+    except OSError:
+        logging.warning(f"Cached sample {cache_path} cannot be read, the file is parsed again.")
+        return None
+    if data_type == DataType.BITSTRING:
+        n_bits = int(np.asarray(data[:N_BITS_HEADER]).view("<u8")[0])
+        return DataSample(data[N_BITS_HEADER:], DataType.BITSTRING, n_bits)
+    return DataSample(data, data_type)
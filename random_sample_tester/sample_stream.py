@@ -0,0 +1,137 @@
+"""
+Module reading samples chunk by chunk, used to run the statistical tests on inputs larger than the memory.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from utils.bit_conversion import bit_string_to_array, integer_bit_lengths, integer_bit_range
+from utils.data_type import DataType
+from utils.integer_parser import iter_integers
+
+# Number of bytes read at once from the input file
+STREAM_CHUNK_SIZE = 1 << 24
+
+
+def map_bytes(path):
+    """
+    Map a binary file in memory without reading it, its bytes are the packed bits of the sample.
+    :param path: file path
+    :return: read-only uint8 array backed by the file
+    """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+
+@dataclass
+class SampleInfo:
+    """
+    Description of a whole sample, given to the tests before it is streamed.
+    """
+    data_type: DataType
+    n_values: int
+    n_bits: int
+    # Integer samples only
+    min_value: int = None
+    max_value: int = None
+    mean: float = None
+    bit_range: tuple = None
+
+
+class SampleStream:
+    """
+    Sample read from its file chunk by chunk, each chunk is given to the tests as a DataSample.
+    """
+
+    def __init__(self, path, data_code, separator, chunk_size=STREAM_CHUNK_SIZE):
+        self.path = path
+        self.input_type = DataType.get_data_type(data_code)
+        # Bytes are handled as packed bits
+        self.data_type = DataType.BITSTRING if self.input_type == DataType.BYTES else self.input_type
+        self.separator = separator
+        self.chunk_size = chunk_size
+        self.info = None
+
+    def _iter_bit_strings(self):
+        # Only the first line of a bitstring file is read
+        with open(self.path, 'rb') as file:
+            while True:
+                block = file.read(self.chunk_size)
+                end = block.find(b"\n")
+                last = end >= 0 or len(block) < self.chunk_size
+                if end >= 0:
+                    block = block[:end]
+                block = block.rstrip(b"\r")
+                if block:
+                    yield bit_string_to_array(block.decode("ascii"))
+                if last:
+                    return
+
+    def scan(self):
+        """
+        Go through the file once to describe the sample, integer samples need it to know how they are written as bits.
+        :return: SampleInfo
+        """
+        if self.info is not None:
+            return self.info
+
+        if self.input_type == DataType.BYTES:
+            n_bits = os.path.getsize(self.path) * 8
+            self.info = SampleInfo(self.data_type, n_bits, n_bits)
+
+        elif self.input_type == DataType.BITSTRING:
+            n_bits = sum(len(bits) for bits in self._iter_bit_strings())
+            self.info = SampleInfo(self.data_type, n_bits, n_bits)
+
+        else:
+            n_values, total, min_value, max_value = 0, 0.0, None, None
+            # Number of values and of powers of two per bit length, used to count the values kept as bits
+            lengths = np.zeros(66, dtype=np.int64)
+            powers = np.zeros(66, dtype=np.int64)
+            for values in iter_integers(self.path, self.separator, self.chunk_size):
+                if len(values) == 0:
+                    continue
+                n_values += len(values)
+                total += float(np.sum(values, dtype=np.float64))
+                min_value = int(values.min()) if min_value is None else min(min_value, int(values.min()))
+                max_value = int(values.max()) if max_value is None else max(max_value, int(values.max()))
+                bit_lengths = integer_bit_lengths(values)
+                lengths += np.bincount(bit_lengths, minlength=66)
+                powers += np.bincount(bit_lengths[(values & (values - 1)) == 0], minlength=66)
+
+            n_bits, bit_range = 0, None
+            if n_values:
+                bit_range = integer_bit_range(min_value, max_value)
+                shift, exponent = bit_range
+                # Kept values are below 2^exponent, or equal to it when they are not shifted
+                n_kept = lengths[:exponent + 1].sum() + (0 if shift else powers[exponent + 1])
+                n_bits = int(n_kept) * exponent
+            self.info = SampleInfo(self.data_type, n_values, n_bits, min_value, max_value,
+                                   total / n_values if n_values else None, bit_range)
+
+        return self.info
+
+    def chunks(self):
+        """
+        Read the sample chunk by chunk.
+        :return: generator of DataSample
+        """
+        info = self.scan()
+
+        if self.input_type == DataType.BYTES:
+            packed = map_bytes(self.path)
+            for start in range(0, len(packed), self.chunk_size):
+                chunk = packed[start:start + self.chunk_size]
+                yield DataSample(chunk, DataType.BITSTRING, len(chunk) * 8)
+
+        elif self.input_type == DataType.BITSTRING:
+            for bits in self._iter_bit_strings():
+                yield DataSample.from_bits(bits)
+
+        else:
+            for values in iter_integers(self.path, self.separator, self.chunk_size):
+                if len(values):
+                    yield DataSample(values, DataType.INT, bit_range=info.bit_range)
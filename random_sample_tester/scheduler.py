@@ -0,0 +1,394 @@
+"""
+Module scheduling the statistical tests of the input files on a pool of processes.
+Each file is parsed once into shared memory and each of its tests is a task of its own, so that the tests of a single
+large file run in parallel. Tests supporting batches can instead be run once on a group of samples of the same size.
+"""
+import heapq
+import logging
+import queue
+import time
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from random_sample_tester.cost_model import CostModel
+from random_sample_tester.data_sample import DataSample
+from random_sample_tester.random_sample_tester import RandomSample, RandomSampleTester
+from random_sample_tester.sample_cache import load_sample
+from random_sample_tester.sample_stream import map_bytes
+from statistical_tests.statistical_test import TestRegistry
+from utils.bit_conversion import count_integer_bits
+from utils.data_type import DataType
+
+# Number of files waiting to be loaded, among which the most expensive is loaded first
+MAX_QUEUED_FILES = 1024
+
+
+@dataclass
+class SharedSample:
+    """
+    Description of a sample stored in shared memory, or of a bytes file or a cached parsed sample mapped in memory,
+    that workers attach to without copying it.
+    """
+    path: str
+    data_type: DataType
+    n_bits: int
+    dtype: str
+    shape: tuple
+    # Shared memory block name, None when the sample is read from a bytes file or a cached parsed sample
+    name: str = None
+    # Cached parsed sample, see sample_cache
+    cache_path: str = None
+
+    @classmethod
+    def create(cls, path, data_code, separator, sample_cache_dir=None):
+        """
+        Parse a file and copy its sample into shared memory, or only keep its path when it is cached.
+        :return: SharedSample
+        """
+        if DataType.get_data_type(data_code) == DataType.BYTES:
+            # The file already holds the packed bits, workers map it directly
+            size = len(map_bytes(path))
+            return cls(path, DataType.BITSTRING, size * 8, np.dtype(np.uint8).str, (size,))
+
+        rs = RandomSample()
+        rs.get_data(path, data_code, separator, sample_cache_dir)
+        if rs.cache_path is not None:
+            data = rs.data.packed_bits() if rs.data.data_type == DataType.BITSTRING else rs.data.data
+            n_bits = rs.data.n_bits if rs.data.data_type == DataType.BITSTRING else count_integer_bits(data)
+            return cls(path, rs.data.data_type, n_bits, data.dtype.str, data.shape, cache_path=rs.cache_path)
+
+        data = np.ascontiguousarray(rs.data.packed_bits() if rs.data.data_type == DataType.BITSTRING else rs.data.data)
+        shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+        _untrack(shm)
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+        n_bits = rs.data.n_bits if rs.data.data_type == DataType.BITSTRING else count_integer_bits(rs.data.data)
+        shared = cls(path, rs.data.data_type, n_bits, data.dtype.str, data.shape, shm.name)
+        shm.close()
+        return shared
+
+    def attach(self):
+        """
+        Attach to the shared sample.
+        :return: (shared memory block or None, DataSample)
+        """
+        if self.cache_path is not None:
+            return None, load_sample(self.cache_path, self.data_type)
+        if self.name is None:
+            return None, DataSample(map_bytes(self.path), self.data_type, self.n_bits)
+        shm = shared_memory.SharedMemory(name=self.name)
+        _untrack(shm)
+        data = np.ndarray(self.shape, dtype=np.dtype(self.dtype), buffer=shm.buf)
+        return shm, DataSample(data, self.data_type, self.n_bits)
+
+    def release(self):
+        """
+        Free the shared memory block once every test of the sample is done.
+        """
+        if self.name is not None:
+            shm = shared_memory.SharedMemory(name=self.name)
+            shm.close()
+            shm.unlink()
+
+
+def _untrack(shm):
+    """
+    Remove a shared memory block opened by a worker from the resource tracker of the worker, the block is unlinked by
+    the scheduler once the tests of the sample are done and must not be unlinked again when the worker exits.
+    """
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def load_sample_task(file_index, path, data_code, separator, sample_cache_dir=None):
+    """
+    Worker task parsing a file into shared memory.
+    """
+    return "loaded", file_index, SharedSample.create(path, data_code, separator, sample_cache_dir)
+
+
+def _detach(shm):
+    """
+    Close the mapping of a shared memory block opened by a worker, the views on the block must have been dropped so
+    that the worker does not keep it mapped once the task is done.
+    """
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            # A view on the block is still referenced, it is closed when garbage collected
+            pass
+
+
+def run_test_task(file_index, test_index, shared, test_name, progress_queue):
+    """
+    Worker task running a single test on a shared sample.
+    """
+    start = time.perf_counter()
+    shm, sample = shared.attach()
+    try:
+        test = TestRegistry.get_test_class(test_name)()
+        test.run_test(sample)
+        report = test.generate_report()
+    finally:
+        test = sample = None
+        _detach(shm)
+    duration = time.perf_counter() - start
+    progress_queue.put(1)
+    return "tested", file_index, test_index, test_name, report, duration
+
+
+def run_batch_task(test_name, data_type, members, shared_samples, progress_queue):
+    """
+    Worker task running a test on a batch of shared samples of the same size, copied into the rows of a 2-D array.
+    :param members: list of (file index, test index) of the samples
+    """
+    samples = None
+    for row_index, shared in enumerate(shared_samples):
+        shm, sample = shared.attach()
+        try:
+            row = sample.bits() if data_type == DataType.BITSTRING else np.asarray(sample.data)
+            if samples is None:
+                samples = np.empty((len(shared_samples), len(row)), dtype=row.dtype)
+            samples[row_index] = row
+        finally:
+            row = sample = None
+            _detach(shm)
+    reports = TestRegistry.get_test_class(test_name).batch_reports(samples, data_type)
+    progress_queue.put(len(members))
+    return "batched", test_name, members, reports
+
+
+def imap_unordered_bounded(pool, task, arguments, max_in_flight):
+    """
+    Run a task on each tuple of arguments, like Pool.imap_unordered which reads all the arguments ahead, but only
+    max_in_flight tasks are handed to the pool at once and the arguments are read as tasks complete.
+    :param pool: pool of processes
+    :param task: function run by the workers
+    :param arguments: iterable of argument tuples
+    :param max_in_flight: number of tasks submitted at once
+    :return: iterator of the results of the tasks, in the order they complete
+    """
+    events = queue.Queue()
+    arguments = iter(arguments)
+    exhausted = False
+    in_flight = 0
+    while True:
+        while not exhausted and in_flight < max_in_flight:
+            try:
+                args = next(arguments)
+            except StopIteration:
+                exhausted = True
+                break
+            pool.apply_async(task, args, callback=lambda result: events.put(("done", result)),
+                             error_callback=lambda error: events.put(("error", error)))
+            in_flight += 1
+        if not in_flight:
+            return
+        event, result = events.get()
+        in_flight -= 1
+        if event == "error":
+            raise result
+        yield result
+
+
+class TestScheduler:
+    """
+    Class splitting a run into (file, test) tasks executed on a pool of processes.
+    The cost of each task is estimated with a CostModel and the pending tasks are kept in a single central queue, the
+    most expensive first. Workers have no queue of their own: only n_cores tasks are handed to the pool at once, and
+    each time a task ends the most expensive pending task is submitted, so that the longest jobs start first and the
+    others fill the remaining workers.
+    Only a bounded number of files are queued and kept in shared memory at once, and the results of each file are given
+    as soon as its tests are done. Tests found in the result cache are not run, and files whose tests are all cached
+    are not loaded.
+    With batch_files, the tests supporting batches are run once per group of at most batch_files loaded samples of the
+    same size, up to batch_files files being kept loaded to fill the groups.
+    """
+
+    def __init__(self, pool, n_cores, test_names, data_code, separator, progress_queue, cost_model=None,
+                 result_cache=None, sample_cache_dir=None, batch_files=0):
+        self.pool = pool
+        self.n_cores = n_cores
+        self.batch_files = batch_files
+        self.max_loaded_files = max(n_cores, batch_files)
+        self.max_queued_files = MAX_QUEUED_FILES
+        self.test_names = test_names
+        self.data_code = data_code
+        self.input_type = DataType.get_data_type(data_code)
+        self.separator = separator
+        self.progress_queue = progress_queue
+        self.cost_model = cost_model if cost_model is not None else CostModel()
+        self.result_cache = result_cache
+        self.sample_cache_dir = sample_cache_dir
+        self.events = queue.Queue()
+
+    def _submit(self, task, args):
+        self.pool.apply_async(task, args, callback=self.events.put,
+                              error_callback=lambda error: self.events.put(("error", error)))
+
+    def _estimate_tests(self, data_type, n_bits):
+        """
+        List the tests to run on a sample with their estimated cost.
+        :return: list of (cost, test index, test name)
+        """
+        tests = RandomSampleTester.select_tests(self.test_names, data_type)
+        return [(self.cost_model.estimate(test_name, data_type, n_bits), test_index, test_name)
+                for test_index, (test_name, _) in enumerate(tests)]
+
+    def _pop_batch(self, batch_groups, stalled):
+        """
+        Take the samples of the next batch: a group of batch_files samples, or the biggest group when no sample can be
+        loaded to complete the groups.
+        :param batch_groups: dict (test name, data type, shape, number of bits of bit samples, dtype) -> list of (file
+        index, test index) of the loaded samples waiting for the test
+        :param stalled: whether no sample can be loaded before a task ends
+        :return: (key of the group, list of (file index, test index)), or None when no batch is ready
+        """
+        if not batch_groups:
+            return None
+        key = max(batch_groups, key=lambda group_key: len(batch_groups[group_key]))
+        if len(batch_groups[key]) < self.batch_files and not stalled:
+            return None
+        members, batch_groups[key] = batch_groups[key][:self.batch_files], batch_groups[key][self.batch_files:]
+        if not batch_groups[key]:
+            del batch_groups[key]
+        return key, members
+
+    def run_unordered(self, files):
+        """
+        Run the tests on the files, giving the results of each file as soon as all its tests are done.
+        Files are read from the iterable along the run and at most max_queued_files of them wait to be loaded, the most
+        expensive first, so that the memory used does not grow with the number of files. Loads and tests are taken
+        from these central longest-first queues by the scheduler, one task per free worker.
+        :param files: iterable of input file paths
+        :return: iterator of (file index, file path, test results of the file)
+        """
+        # Bytes are tested as bits
+        data_type = DataType.BITSTRING if self.input_type == DataType.BYTES else self.input_type
+        files = enumerate(files)
+        exhausted = False
+        # Paths, results and digests of the files queued or being tested
+        paths, results, digests = {}, {}, {}
+        # Heap of the files to load by decreasing cost of their longest test, which can only start once the file is
+        # loaded
+        files_to_load = []
+        remaining_tests = {}
+        shared_samples = {}
+        # Heap of the tests of loaded files, the most expensive first
+        pending_tests = []
+        # Loaded samples waiting for the batch of a test, grouped by size
+        batch_groups = {}
+        loading, running = 0, 0
+
+        try:
+            while True:
+                while not exhausted and len(files_to_load) < self.max_queued_files:
+                    try:
+                        file_index, path = next(files)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    tests = self._estimate_tests(data_type, self.cost_model.estimate_n_bits(path, self.input_type))
+                    cached = {}
+                    if self.result_cache is not None:
+                        digest, cached = self.result_cache.lookup(
+                            path, self.data_code, self.separator, [test_name for _, _, test_name in tests])
+                        self.progress_queue.put(len(cached))
+                    file_results = [cached.get(test_name) for _, _, test_name in tests]
+                    tests = [test for test in tests if test[2] not in cached]
+                    if not tests:
+                        yield file_index, path, file_results
+                        continue
+                    paths[file_index], results[file_index] = path, file_results
+                    if self.result_cache is not None:
+                        digests[file_index] = digest
+                    heapq.heappush(files_to_load, (-max(cost for cost, _, _ in tests), file_index))
+
+                if not (files_to_load or pending_tests or batch_groups or loading or running):
+                    break
+
+                # One task per free worker, the longest of the central queues is submitted first
+                while loading + running < self.n_cores:
+                    can_load = files_to_load and len(shared_samples) + loading < self.max_loaded_files
+                    batch = self._pop_batch(batch_groups, stalled=not can_load and not loading)
+                    if batch is not None:
+                        (test_name, data_type, _, _, _), members = batch
+                        self._submit(run_batch_task, (test_name, data_type, members,
+                                                      [shared_samples[file_index] for file_index, _ in members],
+                                                      self.progress_queue))
+                        running += 1
+                    elif can_load and (not pending_tests or files_to_load[0][0] < pending_tests[0][0]):
+                        _, file_index = heapq.heappop(files_to_load)
+                        self._submit(load_sample_task, (file_index, paths[file_index], self.data_code,
+                                                        self.separator, self.sample_cache_dir))
+                        loading += 1
+                    elif pending_tests:
+                        _, file_index, test_index, test_name = heapq.heappop(pending_tests)
+                        self._submit(run_test_task, (file_index, test_index, shared_samples[file_index], test_name,
+                                                     self.progress_queue))
+                        running += 1
+                    else:
+                        break
+
+                event = self.events.get()
+                if event[0] == "error":
+                    raise event[1]
+
+                if event[0] == "loaded":
+                    loading -= 1
+                    _, file_index, shared = event
+                    self.cost_model.record_n_bits(paths[file_index], self.input_type, shared.n_bits)
+                    tests = [test for test in self._estimate_tests(shared.data_type, shared.n_bits)
+                             if results[file_index][test[1]] is None]
+                    shared_samples[file_index] = shared
+                    remaining_tests[file_index] = len(tests)
+                    for cost, test_index, test_name in tests:
+                        if self.batch_files and TestRegistry.get_test_class(test_name).supports_batch:
+                            # Bit samples of the same packed size may differ by their last bits
+                            n_bits = shared.n_bits if shared.data_type == DataType.BITSTRING else None
+                            key = (test_name, shared.data_type, shared.shape, n_bits, shared.dtype)
+                            batch_groups.setdefault(key, []).append((file_index, test_index))
+                        else:
+                            heapq.heappush(pending_tests, (-cost, file_index, test_index, test_name))
+
+                else:
+                    running -= 1
+                    if event[0] == "batched":
+                        # The running time of a batch does not tell the one of a test run alone, it is not recorded
+                        _, test_name, members, reports = event
+                        done = [(file_index, test_index, test_name, report, None)
+                                for (file_index, test_index), report in zip(members, reports)]
+                    else:
+                        done = [event[1:]]
+                    for file_index, test_index, test_name, report, duration in done:
+                        results[file_index][test_index] = report
+                        if self.result_cache is not None:
+                            self.result_cache.put(digests[file_index], self.data_code, self.separator, test_name,
+                                                  report)
+                        shared = shared_samples[file_index]
+                        if duration is not None:
+                            self.cost_model.record(test_name, shared.data_type, shared.n_bits, duration)
+                        remaining_tests[file_index] -= 1
+                        if remaining_tests[file_index] == 0:
+                            logging.debug(f"All tests done on {paths[file_index]}")
+                            shared_samples.pop(file_index).release()
+                            remaining_tests.pop(file_index)
+                            digests.pop(file_index, None)
+                            yield file_index, paths.pop(file_index), results.pop(file_index)
+        finally:
+            for shared in shared_samples.values():
+                shared.release()
+
+        self.cost_model.save()
+
+    def run(self, files):
+        """
+        Run the tests on all the files.
+        :param files: input file paths
+        :return: list of test results for each file, in the order of the files
+        """
+        results = [None] * len(files)
+        for file_index, _, file_results in self.run_unordered(files):
+            results[file_index] = file_results
+        return results
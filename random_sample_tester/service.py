@@ -0,0 +1,216 @@
+"""
+Module keeping a warm pool of processes with all the tests imported, to which runs are sent over localhost HTTP so that
+each run does not pay the start of the interpreter, the imports and the creation of the pool.
+
+POST /run tests the files given by the path query parameters, or the sample sent as the request body when no path is
+given. The tests, data type and separator are given by the test, data_type and separator query parameters. The
+response is a JSON object whose results are, for each file, the list of the reports of the tests.
+GET /status returns the version of the tool and the available tests.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from random_sample_tester import __version__
+from random_sample_tester.scheduler import TestScheduler
+from statistical_tests.statistical_test import TestRegistry
+
+# Address the service listens on, only local clients can connect to it
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_URL = f"http://{SERVICE_HOST}:{SERVICE_PORT}"
+
+
+class ServiceError(Exception):
+    """
+    Error returned by the service, or raised when the service cannot be reached.
+    """
+
+
+class DiscardedProgress:
+    """
+    Progress queue of the runs of the service, nobody follows their progress.
+    """
+
+    def put(self, item):
+        pass
+
+
+class TestService:
+    """
+    Class running the tests on a pool of processes created once for all the runs.
+    Runs are executed one after the other, each of them using all the processes of the pool.
+    """
+
+    def __init__(self, n_cores=1, cost_model=None, result_cache=None, sample_cache_dir=None):
+        self.n_cores = n_cores
+        self.cost_model = cost_model
+        self.result_cache = result_cache
+        self.sample_cache_dir = sample_cache_dir
+        # Tests are imported before the pool is created so that the workers start with them
+        TestRegistry.get_available_tests()
+        self.pool = multiprocessing.Pool(processes=n_cores)
+
+    def run(self, files, test_names, data_code, separator, sample_cache_dir=None):
+        """
+        Run the tests on files.
+        :param files: input file paths
+        :param test_names: list of test names or "all"
+        :param data_code: data type given in argument
+        :param separator: separator given in argument
+        :param sample_cache_dir: directory where parsed text files are cached, None to always parse
+        :return: list of test results for each file, in the order of the files
+        """
+        scheduler = TestScheduler(self.pool, self.n_cores, test_names, data_code, separator, DiscardedProgress(),
+                                  self.cost_model, self.result_cache, sample_cache_dir)
+        results = scheduler.run(files)
+        if self.result_cache is not None:
+            self.result_cache.save()
+        return results
+
+    def run_files(self, files, test_names, data_code, separator):
+        """
+        Run the tests on files of the machine of the service.
+        """
+        return self.run(files, test_names, data_code, separator, self.sample_cache_dir)
+
+    def run_upload(self, content, test_names, data_code, separator):
+        """
+        Run the tests on a sample sent to the service, written to a temporary file for the time of the run.
+        :param content: bytes of the sample file
+        :return: list holding the test results of the sample
+        """
+        file_descriptor, path = tempfile.mkstemp(prefix="rtt-upload-")
+        try:
+            with os.fdopen(file_descriptor, "wb") as file:
+                file.write(content)
+            # Uploaded samples are never seen again under the same path, they are not kept in the sample cache
+            return self.run([path], test_names, data_code, separator)
+        finally:
+            os.remove(path)
+
+    def close(self):
+        """
+        Stop the pool and save the cache.
+        """
+        self.pool.close()
+        self.pool.join()
+        if self.result_cache is not None:
+            self.result_cache.close()
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """
+    Class answering the HTTP requests sent to the service, the TestService is the one of the server.
+    """
+
+    def _send_json(self, status, content):
+        # Numpy scalars are sent as the python values they hold
+        body = json.dumps(content, default=lambda item: item.item()).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path != "/status":
+            self._send_json(404, {"error": f"Unknown resource {self.path}."})
+            return
+        tests = {test_name: [data_type.name for data_type in TestRegistry.get_data_types(test_name)]
+                 for test_name in TestRegistry.get_test_names()}
+        self._send_json(200, {"version": __version__, "tests": tests})
+
+    def do_POST(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path != "/run":
+            self._send_json(404, {"error": f"Unknown resource {url.path}."})
+            return
+        query = urllib.parse.parse_qs(url.query)
+        test_names = query.get("test", "all")
+        data_code = query.get("data_type", ["int"])[0]
+        separator = query.get("separator", ["auto"])[0]
+        content = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        service = self.server.service
+        try:
+            if "path" in query:
+                results = service.run_files(query["path"], test_names, data_code, separator)
+            elif content:
+                results = service.run_upload(content, test_names, data_code, separator)
+            else:
+                self._send_json(400, {"error": "No path nor sample given."})
+                return
+        except (OSError, ValueError) as error:
+            logging.error(f"Run failed: {error!r}")
+            self._send_json(400, {"error": f"Run failed: {error!r}"})
+            return
+        self._send_json(200, {"results": results})
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+def serve(service, host=SERVICE_HOST, port=SERVICE_PORT):
+    """
+    Answer the runs sent to the service until the process is interrupted.
+    :param service: TestService
+    :param host: address listened on
+    :param port: port listened on
+    """
+    server = HTTPServer((host, port), ServiceRequestHandler)
+    server.service = service
+    logging.info(f"Service listening on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def request_run(url, files, test_names, data_code, separator, upload=False):
+    """
+    Send a run to the service.
+    :param url: URL of the service
+    :param files: input file paths
+    :param test_names: list of test names or "all"
+    :param data_code: data type given in argument
+    :param separator: separator given in argument
+    :param upload: send the content of the files instead of their paths, for a service on another file system
+    :return: list of test results for each file, in the order of the files
+    :raise ServiceError: when the run fails or the service cannot be reached
+    """
+    query = [("data_type", data_code), ("separator", separator)]
+    if test_names != "all":
+        query += [("test", test_name) for test_name in test_names]
+    if upload:
+        results = []
+        for path in files:
+            with open(path, "rb") as file:
+                results += _post_run(url, query, file.read())
+        return results
+    return _post_run(url, query + [("path", os.path.abspath(path)) for path in files], b"")
+
+
+def _post_run(url, query, content):
+    request = urllib.request.Request(f"{url.rstrip('/')}/run?{urllib.parse.urlencode(query)}", data=content,
+                                     method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)["results"]
+    except urllib.error.HTTPError as error:
+        body = error.read().decode(errors="replace")
+        try:
+            message = json.loads(body)["error"]
+        except (ValueError, KeyError, TypeError):
+            message = body or error.reason
+        raise ServiceError(f"Service error {error.code}: {message}") from error
+    except urllib.error.URLError as error:
+        raise ServiceError(f"Service {url} cannot be reached: {error.reason}") from error
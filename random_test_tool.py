@@ -22,14 +22,21 @@ import os
 import sys
 import time
 
-from tqdm import tqdm
-
-from random_sample_tester.generate_reports import generate_report
+from random_sample_tester.batch import BATCH_FILES
+from random_sample_tester.generate_reports import ReportWriter
 from statistical_tests.statistical_test import TestRegistry
-from statistical_tests.statistical_tests import load_tests
+from statistical_tests.statistical_tests import declare_tests
+from random_sample_tester.cost_model import COST_MODEL_PATH, CostModel
 from random_sample_tester.random_sample_tester import RandomSampleTester
+from random_sample_tester.result_cache import RESULT_CACHE_PATH, ResultCache
+from random_sample_tester.sample_cache import SAMPLE_CACHE_DIR
+from random_sample_tester.sample_stream import STREAM_CHUNK_SIZE
+from random_sample_tester.scheduler import TestScheduler, imap_unordered_bounded
+from random_sample_tester.service import (SERVICE_HOST, SERVICE_PORT, SERVICE_URL, ServiceError, TestService,
+                                          request_run, serve)
 
-load_tests()
+# Tests are declared from the manifest and only imported once selected
+declare_tests()
 
 
 class ArgumentParser(argparse.ArgumentParser):
@@ -68,8 +75,36 @@ class ArgumentParser(argparse.ArgumentParser):
                                                                                                     "bytes"],
                           help="Used to select data type of sample, by default integer (int)")
 
-        self.add_argument("-s", "--separator", dest="separator", type=str, default="\\n", choices=["\\n", " ", ",", ";"],
-                          help="Separator used for integer files.")
+        self.add_argument("-s", "--separator", dest="separator", type=str, default="auto",
+                          choices=["auto", "\\n", " ", ",", ";"],
+                          help="Separator used for integer files, detected from the file by default.")
+        self.add_argument("--stream", dest="stream", action="store_true",
+                          help="Read input files chunk by chunk in a single pass instead of loading them in memory. "
+                               "Tests that cannot be run this way are skipped.")
+        self.add_argument("--chunk_size", dest="chunk_size", type=int, default=STREAM_CHUNK_SIZE,
+                          help="Number of bytes read at once from input files with --stream.")
+        self.add_argument("--batch", dest="batch", action="store_true",
+                          help="Stack input files holding the same number of values and run the tests supporting it "
+                               "once per group of files, suited to many small files.")
+        self.add_argument("--cost_model", dest="cost_model", type=str, default=COST_MODEL_PATH,
+                          help="File where the running times of the tests are kept to schedule the longest ones "
+                               f"first, {COST_MODEL_PATH} by default.")
+        self.add_argument("--result_cache", dest="result_cache", type=str, default=RESULT_CACHE_PATH,
+                          help="Database where the reports of the tests are kept so that unchanged files are not "
+                               f"tested again, {RESULT_CACHE_PATH} by default. Not used with --stream.")
+        self.add_argument("--no_cache", dest="no_cache", action="store_true",
+                          help="Run every test again without reading nor writing the result cache.")
+        self.add_argument("--sample_cache", dest="sample_cache", type=str, nargs="?", const=SAMPLE_CACHE_DIR,
+                          help="Directory where parsed text files are kept as NumPy files so that they are only parsed "
+                               f"once, {SAMPLE_CACHE_DIR} when no directory is given. Disabled by default.")
+        self.add_argument("--serve", dest="serve", type=str, nargs="?", const=f"{SERVICE_HOST}:{SERVICE_PORT}",
+                          help="Keep a pool of processes with the tests imported and run the tests sent with "
+                               f"--connect, listening on {SERVICE_HOST}:{SERVICE_PORT} when no address is given.")
+        self.add_argument("--connect", dest="connect", type=str, nargs="?", const=SERVICE_URL,
+                          help="Send the input files to a service started with --serve instead of testing them, "
+                               f"{SERVICE_URL} when no URL is given.")
+        self.add_argument("--upload", dest="upload", action="store_true",
+                          help="With --connect, send the content of the input files instead of their paths.")
         self.add_argument("-ll", "--log_level", dest="log_level", default='INFO', type=str,
                           choices=['ALL', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL', 'OFF', 'TRACE'],
                           help="Log level (default: INFO).")
@@ -81,15 +116,35 @@ class ArgumentParser(argparse.ArgumentParser):
         self.conf = self.parse_args()
 
 
-def run_random_test_tool(tool_args, files, progress_queue):
+def run_random_test_tool(conf, path, progress_queue):
     """
     Run the tool on a file.
+    :param conf: parsed options
+    :return: (file path, test results)
     """
     rst = RandomSampleTester()
-    rst.get_data(files, tool_args.conf.data_type, tool_args.conf.separator)
-    rst.register_tests_for_run(tool_args.conf.statistical_tests)
-    rst.run_tests(progress_queue)
-    return rst.test_results
+    if conf.stream:
+        rst.open_stream(path, conf.data_type, conf.separator, conf.chunk_size)
+        rst.register_tests_for_run(conf.statistical_tests)
+        rst.run_tests_streaming(progress_queue)
+    else:
+        rst.get_data(path, conf.data_type, conf.separator)
+        rst.register_tests_for_run(conf.statistical_tests)
+        rst.run_tests(progress_queue)
+    return path, rst.test_results
+
+
+def input_files(conf):
+    """
+    Input files given in argument, the files of the input directory being listed along the run.
+    :param conf: parsed options
+    :return: (number of files, iterator of file paths)
+    """
+    if conf.input_dir is not None:
+        with os.scandir(conf.input_dir) as entries:
+            n_files = sum(1 for _ in entries)
+        return n_files, (f"{conf.input_dir}/{entry.name}" for entry in os.scandir(conf.input_dir))
+    return len(conf.input_files), iter(conf.input_files)
 
 
 def identity(string):
@@ -103,13 +158,13 @@ def print_run_summary(n_files):
     """
     Print a run summary in the terminal before launch.
     """
-    test_dic = TestRegistry.get_available_tests()
+    test_names = TestRegistry.get_test_names()
     if args.conf.statistical_tests == "all":
-        tests = test_dic.keys()
+        tests = test_names
     else:
         tests = []
         for test_name in args.conf.statistical_tests:
-            if test_name in list(test_dic.keys()):
+            if test_name in test_names:
                 tests.append(test_name)
 
     print("\n")
@@ -126,13 +181,15 @@ def listener(q, total_n_tests):
     """
     Function used to track progress.
     """
+    from tqdm import tqdm
+
     pbar = tqdm(total=total_n_tests)
     while True:
         item = q.get()
         if item is None:
             break
         else:
-            pbar.update()
+            pbar.update(item)
 
 
 if __name__ == '__main__':
@@ -145,36 +202,78 @@ if __name__ == '__main__':
     # Input preparation
     logging.basicConfig(level=args.conf.log_level)
 
-    # Setup of queue for process tracking
-    manager = multiprocessing.Manager()
-    progress_queue = manager.Queue()
+    if args.conf.serve is not None:
+        host, port = args.conf.serve.rsplit(":", 1)
+        result_cache = None if args.conf.no_cache else ResultCache(args.conf.result_cache)
+        serve(TestService(args.conf.n_cores, CostModel(args.conf.cost_model), result_cache, args.conf.sample_cache),
+              host, int(port))
+        sys.exit(0)
 
     if args.conf.input_files is None and args.conf.input_dir is None:
         logging.error("Error: No input file provided")
         args.print_help()
         sys.exit(2)
-    if args.conf.input_files is not None:
-        inputs = [(args, file, progress_queue) for file in args.conf.input_files]
-    if args.conf.input_dir is not None:
-        inputs = [(args, f"{args.conf.input_dir}/{file}", progress_queue) for file in os.listdir(args.conf.input_dir)]
+    n_files, files = input_files(args.conf)
+
+    if args.conf.connect is not None:
+        # The tests are run by the service, no process is started
+        files = list(files)
+        try:
+            results = request_run(args.conf.connect, files, args.conf.statistical_tests, args.conf.data_type,
+                                  args.conf.separator, args.conf.upload)
+        except ServiceError as error:
+            logging.error(error)
+            sys.exit(1)
+        report_writer = ReportWriter(args.conf.output)
+        for file, file_results in zip(files, results):
+            report_writer.write(file, file_results)
+        report_writer.close(time.time() - exec_start)
+        sys.exit(0)
+
+    # Reports of each file are written as soon as its tests are done
+    report_writer = ReportWriter(args.conf.output)
+
+    # Setup of queue for process tracking
+    manager = multiprocessing.Manager()
+    progress_queue = manager.Queue()
 
     # Run summary
-    total_n_tests = print_run_summary(len(inputs))
+    total_n_tests = print_run_summary(n_files)
 
     # Run statistical_tests in parallel
     pool = multiprocessing.Pool(processes=args.conf.n_cores + 1)
     pool.apply_async(listener, (progress_queue, total_n_tests))
-    results = pool.starmap(run_random_test_tool, inputs)
-    progress_queue.put(None)
-    pool.close()
+    # Streamed files are not looked up in the result cache
+    result_cache = None if args.conf.no_cache or args.conf.stream else ResultCache(args.conf.result_cache)
+    if args.conf.stream:
+        # Streamed files are read in a single pass by one process each
+        results = imap_unordered_bounded(pool, run_random_test_tool,
+                                         ((args.conf, file, progress_queue) for file in files), args.conf.n_cores)
+    else:
+        # Each test of each file is scheduled on its own, the longest first, so that the tests of a large file run in
+        # parallel and do not end the run alone. With --batch, the tests supporting it are run once per group of files
+        # of the same size, each file being reported once its group is done
+        scheduler = TestScheduler(pool, args.conf.n_cores, args.conf.statistical_tests, args.conf.data_type,
+                                  args.conf.separator, progress_queue, CostModel(args.conf.cost_model), result_cache,
+                                  args.conf.sample_cache, BATCH_FILES if args.conf.batch else 0)
+        results = ((file, file_results) for _, file, file_results in scheduler.run_unordered(files))
+
+    interrupted = False
+    try:
+        for file, file_results in results:
+            report_writer.write(file, file_results)
+    except KeyboardInterrupt:
+        # The reports of the files tested so far are kept
+        logging.warning("Run interrupted, only the files already tested are reported.")
+        interrupted = True
+    if result_cache is not None:
+        result_cache.close()
+    if interrupted:
+        pool.terminate()
+    else:
+        progress_queue.put(None)
+        pool.close()
     pool.join()
 
-    exec_stop = time.time()
-
-    execution_datas = {
-        "exec_time": exec_stop-exec_start,
-        "processed_files": inputs
-    }
-
     # Output report generation
-    generate_report(results, args.conf.output, execution_datas)
+    report_writer.close(time.time() - exec_start)
@@ -14,9 +14,14 @@ def process_readme_for_pypi():
     return "".join(new_lines)
 
 
+def read_version():
+    with open('random_sample_tester/__init__.py') as f:
+        return re.search(r'__version__ = "([^"]+)"', f.read()).group(1)
+
+
 setup(
     name='random_test_tool',
-    version='1.0.4',
+    version=read_version(),
     author='Antoine Rigoureau',
     author_email='antoine.rigoureau@xmco.fr',
     description='A simple python tool used form validating pseudo random generators output.',
@@ -39,7 +44,6 @@ setup(
         "tabulate==0.9.0",
         "matplotlib==3.7.1",
         "alive-progress==3.1.4",
-        "bitstring==4.1.3",
         "tqdm==4.66.1",
     ],
     python_requires='>=3.9',
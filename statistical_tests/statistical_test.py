@@ -1,13 +1,27 @@
+import importlib
 import logging
 from abc import ABC, abstractmethod
 import math
+import sys
+
+import numpy as np
+
+from utils.bit_conversion import bit_array_to_string, integers_to_bits
 
 
 class StatisticalTest(ABC):
     """
     Abstract class for statistical test implementing asbtract methods get_data_for_test, run_test and generate_report.
+    Tests able to run on a sample streamed chunk by chunk set supports_streaming and implement begin, update and
+    finalize. Tests able to run on many equal-sized samples at once set supports_batch and implement run_batch.
     """
 
+    supports_streaming = False
+    supports_batch = False
+
+    # Seconds spent per unit of complexity, first guess used to schedule the test before it has been timed
+    cost_per_unit = 1e-7
+
     def __init__(self):
         self.data = None
         # Default values
@@ -38,6 +52,102 @@ class StatisticalTest(ABC):
         """
         raise NotImplementedError
 
+    def begin(self, sample_info):
+        """
+        Prepare the accumulators of the test before the sample is streamed.
+        :param sample_info: SampleInfo describing the whole sample
+        """
+        raise NotImplementedError
+
+    def update(self, chunk):
+        """
+        Update the accumulators of the test with the next chunk of the sample.
+        :param chunk: DataSample holding the chunk
+        """
+        raise NotImplementedError
+
+    def finalize(self):
+        """
+        Compute the test output from the accumulators once the whole sample has been streamed.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def run_batch(cls, samples, data_type):
+        """
+        Run the test on a batch of equal-sized samples at once.
+        :param samples: 2-D array, one sample per row (integers, or one bit per element for bit samples)
+        :param data_type: data type of the samples
+        :return: float64 array holding the p-value of each sample, nan when the test cannot be run on it
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def batch_n_values(cls, samples, data_type):
+        """
+        Number of values reported for each sample of a batch, the number of values of the samples by default.
+        :param samples: 2-D array, one sample per row
+        :param data_type: data type of the samples
+        :return: number of values of each sample
+        """
+        return [samples.shape[1]] * len(samples)
+
+    @classmethod
+    def batch_reports(cls, samples, data_type):
+        """
+        Run the test on a batch of samples and generate the report of each sample.
+        :param samples: 2-D array, one sample per row
+        :param data_type: data type of the samples
+        :return: list of reports
+        """
+        reports = []
+        for p_value, n_values in zip(cls.run_batch(samples, data_type), cls.batch_n_values(samples, data_type)):
+            test = cls()
+            test.n_values = n_values
+            test.test_output = None if np.isnan(p_value) else float(p_value)
+            reports.append(test.generate_report())
+        return reports
+
+    @classmethod
+    def parameters(cls):
+        """
+        Parameters the results of the test depend on, used to tell apart the results kept in the result cache. The
+        upper case constants of the module of the test and the p-value limits by default.
+        :return: dict parameter name -> value
+        """
+        module = sys.modules[cls.__module__]
+        parameters = {name: value for name, value in vars(module).items()
+                      if name.isupper() and isinstance(value, (bool, int, float, str))}
+        test = cls()
+        parameters["p_value_limit"] = test.p_value_limit
+        parameters["p_value_limit_strict"] = test.p_value_limit_strict
+        return parameters
+
+    @staticmethod
+    def complexity(n_bits):
+        """
+        Model of the running time of the test as a function of the sample size, up to a constant.
+        :param n_bits: number of bits of the sample
+        :return: complexity units
+        """
+        return n_bits
+
+    @staticmethod
+    def count_values(values, counts, chunk):
+        """
+        Add the occurrences of the values of a chunk to the occurrences counted so far.
+        :param values: sorted array of the values seen so far
+        :param counts: occurrences of these values
+        :param chunk: new values
+        :return: (values, counts) updated
+        """
+        chunk_values, chunk_counts = np.unique(chunk, return_counts=True)
+        if len(values) == 0:
+            return chunk_values, chunk_counts
+        merged_values, inverse = np.unique(np.concatenate([values, chunk_values]), return_inverse=True)
+        merged_counts = np.bincount(inverse.ravel(), weights=np.concatenate([counts, chunk_counts]))
+        return merged_values, merged_counts.astype(np.int64)
+
     @staticmethod
     def highest_power_2(n):
         p = int(math.log(n, 2))
@@ -47,22 +157,10 @@ class StatisticalTest(ABC):
         """
         Transform integer data into equally probable bitstring string. Biggest existing [1, 2^n] interval is taken from
         the data set and inetegers are stack in their binary form.
+        Tests should rather use DataSample.bits() which is computed once per sample, this method is kept for tests
+        working on bitstrings.
         """
-        # If integer data does not start at 1, we shift the data.
-        if min(self.data) == 0:
-            self.data = list(map(lambda x: x + 1, self.data))
-
-        max_value = max(self.data)
-
-        max_power_number, exponent = self.highest_power_2(max_value)
-
-        trimmed_integers = filter(lambda n: n <= max_power_number, self.data)
-        big_string = ""
-
-        for i in trimmed_integers:
-            big_string += format(i - 1, "b").zfill(exponent)
-
-        return big_string
+        return bit_array_to_string(integers_to_bits(self.data))
 
     def generate_test_report(self, test_name):
         """
@@ -70,13 +168,17 @@ class StatisticalTest(ABC):
         :param test_name : test name.
         :return: Dictionary displaying test results.
         """
-        cond_value = math.fabs(self.test_output - 1)
-        if cond_value < self.p_value_limit:
-            test_pass = "SUSPECT"
-            if cond_value < self.p_value_limit_strict:
-                test_pass = "KO"
+        if self.test_output is None:
+            # The sample is too short for the test
+            test_pass = "N/A"
         else:
-            test_pass = "OK"
+            cond_value = math.fabs(self.test_output - 1)
+            if cond_value < self.p_value_limit:
+                test_pass = "SUSPECT"
+                if cond_value < self.p_value_limit_strict:
+                    test_pass = "KO"
+            else:
+                test_pass = "OK"
         report = {"test_name": test_name,
                   "n_sample": self.n_values,
                   "p_value": self.test_output,
@@ -86,14 +188,31 @@ class StatisticalTest(ABC):
         return report
 
 
+def sidak_p_value(p_values):
+    """
+    Combine the p-values of several statistics of a test into the p-value of the smallest one, corrected for the
+    number of statistics (Sidak correction).
+    :param p_values: p-values of the statistics
+    :return: corrected p-value, None when there is no statistic
+    """
+    if len(p_values) == 0:
+        return None
+    return float(1 - (1 - min(p_values)) ** len(p_values))
+
+
 class TestRegistry:
     """
     Class managing which statistical_tests are available.
     available_tests is a dictionary :
     available_tests[cls_name] : (test_class, data_type)
+    Tests can also be declared with the module registering them, the module is then only imported when the test
+    class is needed.
+    declared_tests is a dictionary :
+    declared_tests[cls_name] : (module name, data_type)
     """
 
     available_tests = {}
+    declared_tests = {}
 
     @classmethod
     def register(cls, test_name, data_types):
@@ -113,6 +232,54 @@ class TestRegistry:
 
         return _register
 
+    @classmethod
+    def declare(cls, test_name, module_name, data_types):
+        """
+        Declare a test without importing the module registering it.
+        :param test_name: test name
+        :param module_name: name of the module registering the test
+        :param data_types: data types supported by the test
+        """
+        cls.declared_tests[test_name] = (module_name, data_types)
+
+    @classmethod
+    def get_test_names(cls):
+        """
+        :return: names of the declared and registered tests, without importing them
+        """
+        return list(cls.declared_tests) + [test_name for test_name in cls.available_tests
+                                           if test_name not in cls.declared_tests]
+
+    @classmethod
+    def get_data_types(cls, test_name):
+        """
+        :param test_name: test name
+        :return: data types supported by the test, without importing it
+        """
+        if test_name in cls.declared_tests:
+            return cls.declared_tests[test_name][1]
+        return cls.available_tests[test_name][1]
+
+    @classmethod
+    def get_test_class(cls, test_name):
+        """
+        Import the module of a declared test if it has not been imported yet.
+        :param test_name: test name
+        :return: test class
+        """
+        if test_name not in cls.available_tests:
+            importlib.import_module(cls.declared_tests[test_name][0])
+            if test_name not in cls.available_tests:
+                logging.error(f"Test {test_name} is not registered by module {cls.declared_tests[test_name][0]}.")
+                raise ValueError
+        return cls.available_tests[test_name][0]
+
     @classmethod
     def get_available_tests(cls):
+        """
+        Import all the declared tests.
+        :return: available_tests
+        """
+        for test_name in cls.declared_tests:
+            cls.get_test_class(test_name)
         return cls.available_tests
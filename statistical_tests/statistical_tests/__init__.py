@@ -4,6 +4,46 @@ import pkgutil
 import importlib
 import logging
 
+from statistical_tests.statistical_test import TestRegistry
+from utils.data_type import DataType
+
+# Static manifest of the statistical tests: test name -> (module, supported data types), in the order of the reports.
+# Declared tests are only imported when they are run, the manifest must match the TestRegistry.register decorators.
+INT_AND_BITS = [DataType.INT, DataType.BITSTRING]
+TEST_MANIFEST = {
+    "approximate_entropy": ("approximate_entropy_test", INT_AND_BITS),
+    "autocorrelation": ("autocorrelation_test", INT_AND_BITS),
+    "binary_matrix": ("binary_rank_test", INT_AND_BITS),
+    "birthday_spacings": ("birthday_spacings_test", [DataType.INT]),
+    "block_frequency": ("block_frequency_test", INT_AND_BITS),
+    "chi2": ("chi2_test", INT_AND_BITS),
+    "compression": ("compression_test", INT_AND_BITS),
+    "cumulative_sums": ("cumulative_sums_test", INT_AND_BITS),
+    "gap": ("gap_test", [DataType.INT]),
+    "linear_complexity": ("linear_complexity_test", INT_AND_BITS),
+    "longest_run": ("longest_run_test", INT_AND_BITS),
+    "opso": ("opso_test", [DataType.INT]),
+    "serial": ("serial_test", INT_AND_BITS),
+    "overlapping_serial": ("serial_test", INT_AND_BITS),
+    "period": ("period_test", INT_AND_BITS),
+    "poker": ("poker_test", [DataType.INT]),
+    "random_excursions": ("random_excursions_test", INT_AND_BITS),
+    "random_excursions_variant": ("random_excursions_test", INT_AND_BITS),
+    "run": ("run_test", INT_AND_BITS),
+    "sign": ("sign_test", INT_AND_BITS),
+    "spectral": ("spectral_test", INT_AND_BITS),
+    "non_overlapping_template": ("template_matching_test", INT_AND_BITS),
+    "overlapping_template": ("template_matching_test", INT_AND_BITS),
+}
+
+
+def declare_tests(prefix='statistical_tests.statistical_tests'):
+    """
+    Declare the statistical tests of the manifest without importing them.
+    """
+    for test_name, (module, data_types) in TEST_MANIFEST.items():
+        TestRegistry.declare(test_name, f"{prefix}.{module}", data_types)
+
 
 def load_tests(path=os.path.dirname(__file__), prefix='statistical_tests.statistical_tests'):
     """
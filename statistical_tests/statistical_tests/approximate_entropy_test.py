@@ -0,0 +1,87 @@
+import logging
+
+from scipy.special import gammaincc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_conversion import window_codes
+from utils.data_type import DataType
+import numpy as np
+
+
+@TestRegistry.register("approximate_entropy", [DataType.INT, DataType.BITSTRING])
+class ApproximateEntropyTest(StatisticalTest):
+    """
+    Implementation of the approximate entropy test comparing the frequencies of the overlapping patterns of m and m + 1
+    bits, the sequence being read circularly.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.12
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data, pattern_size=None):
+        """
+        Count the circular patterns of m + 1 bits from the shared index of the overlapping windows of the sample.
+        """
+        bits = data.bits()
+        self.n_values = len(bits)
+        self.pattern_size = pattern_size or self.default_pattern_size(self.n_values)
+        size = self.pattern_size + 1
+        self.data = np.bincount(data.window_codes(size), minlength=2 ** size)
+        # Patterns starting in the last m bits are completed with the first bits
+        if self.n_values > self.pattern_size:
+            wrapped = np.concatenate([bits[self.n_values - self.pattern_size:], bits[:self.pattern_size]])
+            self.data += np.bincount(window_codes(wrapped, size), minlength=2 ** size)
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Approximate entropy test")
+
+    @staticmethod
+    def default_pattern_size(n_values):
+        """
+        Pattern size recommended by NIST for a sample size (m < log2(n) - 5), at most 10.
+        """
+        return int(max(1, min(10, np.floor(np.log2(max(n_values, 1))) - 6)))
+
+    @staticmethod
+    def phi(counts, n_values):
+        """
+        Sum of p log(p) over the frequencies of the patterns.
+        """
+        frequencies = counts[counts > 0].astype(np.float64) / n_values
+        return float(np.sum(frequencies * np.log(frequencies)))
+
+    @staticmethod
+    def approximate_entropy_p_value(counts, n_values):
+        """
+        Compute the p-value from the counts of the circular m + 1 bits patterns.
+        :param counts: occurrences of each m + 1 bits pattern
+        :param n_values: number of bits
+        :return: p-value
+        """
+        pattern_size = int(np.log2(len(counts))) - 1
+        # Patterns of m bits are counted by merging the patterns of m + 1 bits ending with 0 and with 1
+        shorter_counts = counts.reshape(-1, 2).sum(axis=1)
+        approximate_entropy = (ApproximateEntropyTest.phi(shorter_counts, n_values)
+                               - ApproximateEntropyTest.phi(counts, n_values))
+        chi_squared = 2 * n_values * (np.log(2) - approximate_entropy)
+        return gammaincc(2 ** (pattern_size - 1), chi_squared / 2)
+
+    def run_test(self, data_generator, pattern_size=None):
+        """
+        Launch approximate entropy test on the data.
+        :param pattern_size: number of bits m of the shorter patterns, chosen from the sample size by default
+        """
+        logging.info("Launching approximate entropy Test")
+        self.get_data_for_test(data_generator, pattern_size)
+        if self.n_values > self.pattern_size:
+            self.test_output = self.approximate_entropy_p_value(self.data, self.n_values)
+        logging.info("Approximate entropy test terminated")
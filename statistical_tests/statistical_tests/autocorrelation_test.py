@@ -0,0 +1,161 @@
+import logging
+
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.special import erfc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry, sidak_p_value
+from utils.data_type import DataType
+import numpy as np
+
+# Largest lag tested by default
+DEFAULT_MAX_LAG = 256
+
+# Number of values correlated at once with the values following them, bigger samples are processed by segments
+SEGMENT_SIZE = 1 << 22
+
+
+def lagged_products(values, n_segment, max_lag):
+    """
+    Sum the products of the first values of a sequence with the values following them, for all lags at once with a
+    FFT.
+    :param values: float64 array, the n_segment values to correlate followed by at most max_lag values
+    :param n_segment: number of values correlated
+    :param max_lag: largest lag
+    :return: array of sum(values[i] * values[i + k]) for i < n_segment and k in [0, max_lag]
+    """
+    # The transform is long enough for the products not to wrap around
+    size = next_fast_len(max(len(values), n_segment + max_lag), real=True)
+    products = irfft(np.conj(rfft(values[:n_segment], size)) * rfft(values, size), size)[:max_lag + 1]
+    return products
+
+
+@TestRegistry.register("autocorrelation", [DataType.INT, DataType.BITSTRING])
+class AutocorrelationTest(StatisticalTest):
+    """
+    Implementation of an autocorrelation test checking the correlation of the sequence with itself shifted by 1 to
+    max_lag positions.
+    Integers are centered on their mean and bits are written as -1 and 1. Under the hypothesis of independent values
+    the correlation at lag k times sqrt(n - k) is normally distributed, the smallest of the p-values of the lags is
+    reported with a Sidak correction.
+    All the lags are computed at once with a FFT over segments of the sequence, in O(n log(n)).
+    """
+
+    supports_streaming = True
+    cost_per_unit = 5e-9
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+        self.worst_lag = None
+        self.worst_lag_p_value = None
+
+    @staticmethod
+    def complexity(n_bits):
+        """
+        FFT of segments of the sample, n log(n).
+        """
+        return n_bits * max(np.log2(max(min(n_bits, SEGMENT_SIZE), 1)), 1)
+
+    def get_data_for_test(self, data):
+        """
+        Keep the sample, integers are read as a whole and bits chunk by chunk.
+        """
+        self.data = data
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name, the lag with the smallest p-value and its uncorrected p-value.
+        """
+        report = self.generate_test_report("Autocorrelation test")
+        report.update({"worst_lag": self.worst_lag, "worst_lag_p_value": self.worst_lag_p_value})
+        return report
+
+    @staticmethod
+    def lag_p_values(products, n_values):
+        """
+        Compare the correlation at each lag to the one of independent values.
+        :param products: sum of the products of the centered values at lags 0 to max_lag
+        :param n_values: number of values
+        :return: p-value of each lag from 1 to max_lag
+        """
+        lags = np.arange(1, len(products))
+        variance = products[0] / n_values
+        if variance <= 0:
+            return np.zeros(0)
+        z = products[1:] / (variance * np.sqrt(n_values - lags))
+        return erfc(np.abs(z) / np.sqrt(2))
+
+    def _init_products(self, n_values, max_lag, mean):
+        self.max_lag = int(max(min(max_lag, n_values // 2), 0))
+        self.mean = mean
+        self.products = np.zeros(self.max_lag + 1)
+        self.buffer = np.zeros(0)
+        self.n_values = 0
+        self.worst_lag, self.worst_lag_p_value = None, None
+
+    def _add_values(self, values):
+        """
+        Add centered values, segments followed by max_lag values are correlated and dropped.
+        """
+        self.n_values += len(values)
+        self.buffer = np.concatenate([self.buffer, values])
+        while len(self.buffer) >= SEGMENT_SIZE + self.max_lag:
+            self.products += lagged_products(self.buffer[:SEGMENT_SIZE + self.max_lag], SEGMENT_SIZE, self.max_lag)
+            self.buffer = self.buffer[SEGMENT_SIZE:]
+
+    def _centered(self, chunk):
+        if chunk.data_type == DataType.BITSTRING:
+            return chunk.bits().astype(np.float64) * 2 - 1
+        return np.asarray(chunk.data, dtype=np.float64) - self.mean
+
+    def _autocorrelation_p_value(self):
+        if len(self.buffer):
+            self.products += lagged_products(self.buffer, len(self.buffer), self.max_lag)
+        self.buffer = None
+        p_values = self.lag_p_values(self.products, self.n_values)
+        if len(p_values) == 0:
+            return None
+        self.worst_lag = int(np.argmin(p_values)) + 1
+        self.worst_lag_p_value = float(p_values[self.worst_lag - 1])
+        logging.info(f"Autocorrelation test: worst lag {self.worst_lag}, p-value {self.worst_lag_p_value}")
+        return sidak_p_value(p_values)
+
+    def run_test(self, data_generator, max_lag=DEFAULT_MAX_LAG):
+        """
+        Launch autocorrelation test on the data.
+        :param max_lag: largest lag tested
+        """
+        logging.info("Launching autocorrelation Test")
+        self.get_data_for_test(data_generator)
+        if self.data.data_type == DataType.BITSTRING:
+            self._init_products(self.data.n_bits, max_lag, 0.0)
+            for bits in self.data.iter_bits():
+                self._add_values(bits.astype(np.float64) * 2 - 1)
+        else:
+            self._init_products(len(self.data.data), max_lag, float(np.mean(self.data.data, dtype=np.float64)))
+            self._add_values(self._centered(self.data))
+        self.test_output = self._autocorrelation_p_value()
+        logging.info("Autocorrelation test terminated")
+
+    def begin(self, sample_info, max_lag=DEFAULT_MAX_LAG):
+        """
+        Choose the lags from the size of the whole sample, integers are centered on the mean of the whole sample.
+        """
+        self._init_products(sample_info.n_values, max_lag, sample_info.mean or 0.0)
+
+    def update(self, chunk):
+        """
+        Correlate the segments completed by the chunk.
+        """
+        self._add_values(self._centered(chunk))
+
+    def finalize(self):
+        """
+        Correlate the last values and compute the p-value of the worst lag.
+        """
+        self.test_output = self._autocorrelation_p_value()
+        logging.info("Autocorrelation test terminated")
@@ -1,7 +1,10 @@
 import logging
 import math
 
+import numpy as np
+
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_conversion import to_bit_array
 from utils.data_type import DataType
 
 
@@ -32,6 +35,8 @@ class BinaryMatrixTest(StatisticalTest):
     Checks the binary rank of matrices formed by substrings of the input compared to the theory.
     """
 
+    supports_streaming = True
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -44,9 +49,7 @@ class BinaryMatrixTest(StatisticalTest):
         """
         Format the data into a bitstring.
         """
-        self.data = data.data
-        if data.data_type != DataType.BITSTRING:
-            self.data = self.transform_to_bits()
+        self.data = data.bits()
         self.n_values = len(self.data)
 
     def generate_report(self):
@@ -56,56 +59,181 @@ class BinaryMatrixTest(StatisticalTest):
         return self.generate_test_report("Binary rank test")
 
     @staticmethod
-    def run_binary_test(bytestring, matrix_size):
+    def pack_matrices(bits, n_rows, n_cols):
+        """
+        Pack consecutive blocks of bits into matrices whose rows are stored as unsigned integers.
+        Rows are padded with zeros on their low bits, which does not change the rank.
+        :param bits: array of bits, its length is a multiple of n_rows * n_cols
+        :param n_rows: number of rows of the matrices
+        :param n_cols: number of columns of the matrices, at most 64
+        :return: (number of matrices, n_rows) array of uint32 when n_cols <= 32, of uint64 otherwise
+        """
+        n_bytes = 4 if n_cols <= 32 else 8
+        packed = np.packbits(bits.reshape(-1, n_rows, n_cols), axis=2)
+        rows = np.zeros(packed.shape[:2] + (n_bytes,), dtype=np.uint8)
+        rows[:, :, :packed.shape[2]] = packed
+        return rows.view(f">u{n_bytes}")[:, :, 0].astype(f"u{n_bytes}")
+
+    @staticmethod
+    def batched_binary_rank(matrices, n_cols):
+        """
+        Compute the rank over GF(2) of many matrices at once with a Gaussian elimination vectorized over the matrices.
+        :param matrices: (number of matrices, number of rows) array of rows packed by pack_matrices
+        :param n_cols: number of columns of the matrices
+        :return: int array of ranks
+        """
+        matrices = matrices.copy()
+        n_matrices, n_rows = matrices.shape
+        word_size = matrices.dtype.itemsize * 8
+        ranks = np.zeros(n_matrices, dtype=np.int64)
+        row_index = np.arange(n_rows)
+        matrix_index = np.arange(n_matrices)
+        for col in range(n_cols):
+            mask = matrices.dtype.type(1 << (word_size - 1 - col))
+            has_bit = (matrices & mask) != 0
+            # The pivot is searched in the rows that are not already pivots, they are kept below rank
+            candidates = has_bit & (row_index >= ranks[:, None])
+            found = candidates.any(axis=1)
+            pivot_index = np.argmax(candidates, axis=1)
+            pivots = np.where(found, matrices[matrix_index, pivot_index], 0).astype(matrices.dtype)
+            # Move the pivot row to the position rank, then clear the bit in the rows below
+            rank_index = np.minimum(ranks, n_rows - 1)
+            swapped = matrices[matrix_index, rank_index]
+            matrices[matrix_index[found], pivot_index[found]] = swapped[found]
+            matrices[matrix_index[found], rank_index[found]] = pivots[found]
+            below = (row_index > ranks[:, None]) & ((matrices & mask) != 0)
+            matrices ^= np.where(below, pivots[:, None], 0).astype(matrices.dtype)
+            ranks += found
+        return ranks
+
+    @staticmethod
+    def count_ranks(bits, matrix_size, n_cols=None, batch_size=1 << 16):
+        """
+        Compute the rank of the matrices formed by consecutive blocks of bits.
+        :param bits: array of bits, its length is a multiple of matrix_size * n_cols
+        :param matrix_size: number of rows of the matrices
+        :param n_cols: number of columns of the matrices, matrix_size by default
+        :param batch_size: number of matrices reduced at once
+        :return: number of matrices of full rank, of full rank - 1 and of lower rank
+        """
+        n_cols = matrix_size if n_cols is None else n_cols
+        full_rank = min(matrix_size, n_cols)
+        block_size = matrix_size * n_cols
+        max_ranks = [0, 0, 0]
+        if n_cols > 64:
+            # Rows do not fit in machine words, ranks are computed one matrix at a time on python integers
+            for block_data in bits.reshape(-1, matrix_size, n_cols):
+                rows = [int.from_bytes(row.tobytes(), "big") for row in np.packbits(block_data, axis=1)]
+                ranks = np.array([compute_binary_rank(rows)])
+                max_ranks = BinaryMatrixTest._add_ranks(max_ranks, ranks, full_rank)
+            return max_ranks
+
+        for start in range(0, len(bits) // block_size, batch_size):
+            batch = bits[start * block_size:(start + batch_size) * block_size]
+            ranks = BinaryMatrixTest.batched_binary_rank(BinaryMatrixTest.pack_matrices(batch, matrix_size, n_cols),
+                                                         n_cols)
+            max_ranks = BinaryMatrixTest._add_ranks(max_ranks, ranks, full_rank)
+        return max_ranks
+
+    @staticmethod
+    def _add_ranks(max_ranks, ranks, full_rank):
+        return [max_ranks[0] + int(np.count_nonzero(ranks == full_rank)),
+                max_ranks[1] + int(np.count_nonzero(ranks == full_rank - 1)),
+                max_ranks[2] + int(np.count_nonzero(ranks < full_rank - 1))]
+
+    @staticmethod
+    def rank_probabilities(n_rows, n_cols):
+        """
+        Probabilities for a random binary matrix to be of full rank, of full rank - 1 and of lower rank.
+        Formula from NIST SP 800-22 section 3.5.
+        :param n_rows: number of rows of the matrices
+        :param n_cols: number of columns of the matrices
+        :return: list of the three probabilities
+        """
+        full_rank = min(n_rows, n_cols)
+        probabilities = []
+        for rank in (full_rank, full_rank - 1):
+            probability = 2.0 ** (rank * (n_rows + n_cols - rank) - n_rows * n_cols)
+            for i in range(rank):
+                probability *= (1 - 2.0 ** (i - n_rows)) * (1 - 2.0 ** (i - n_cols)) / (1 - 2.0 ** (i - rank))
+            probabilities.append(probability)
+        probabilities.append(1 - probabilities[0] - probabilities[1])
+        return probabilities
+
+    @staticmethod
+    def rank_p_value(max_ranks, num_m, matrix_size=32, n_cols=None):
+        """
+        Compare the ranks counted to the theory.
+        :param max_ranks: number of matrices of full rank, of full rank - 1 and of lower rank
+        :param num_m: number of matrices
+        :param matrix_size: number of rows of the matrices
+        :param n_cols: number of columns of the matrices, matrix_size by default
+        :return: p-value
+        """
+        peaks = BinaryMatrixTest.rank_probabilities(matrix_size, matrix_size if n_cols is None else n_cols)
+
+        chi = 0.0
+        for i in range(len(peaks)):
+            chi += pow((max_ranks[i] - peaks[i] * num_m), 2.0) / (peaks[i] * num_m)
+        p_val = math.exp(-chi / 2)
+        return p_val
+
+    @staticmethod
+    def run_binary_test(bits, matrix_size, n_cols=None):
         """
         Binary test algorithm.
         Adapted from https://gist.github.com/StuartGordonReid/885c56037beb8c74b4e8
+        :param bits: bit sequence (bitstring or array of bits)
+        :param matrix_size: number of rows of the matrices
+        :param n_cols: number of columns of the matrices, matrix_size by default (square matrices)
         """
-        n_values = len(bytestring)
-        block_size = int(matrix_size * matrix_size)
-        num_m = math.floor(n_values / (matrix_size * matrix_size))
-        block_start, block_end = 0, block_size
+        bits = to_bit_array(bits)
+        n_cols = matrix_size if n_cols is None else n_cols
+        block_size = int(matrix_size * n_cols)
+        num_m = math.floor(len(bits) / block_size)
 
         if num_m > 0:
-            max_ranks = [0, 0, 0]
-            for im in range(num_m):
-                block_data = bytestring[block_start:block_end]
-                # We convert the block into a list of integers bas matrix_size
-                rows = []
-                for i in range(matrix_size):
-                    int_data = block_data[i * matrix_size:(i + 1) * matrix_size]
-                    int_value = int(int_data, 2)
-                    rows.append(int_value)
-                # we then compute the rank
-                rank = compute_binary_rank(rows.copy())
-                if rank == matrix_size:
-                    max_ranks[0] += 1
-                elif rank == (matrix_size - 1):
-                    max_ranks[1] += 1
-                else:
-                    max_ranks[2] += 1
-                # Update index trackers
-                block_start += block_size
-                block_end += block_size
-
-            peaks = [1.0, 0.0, 0.0]
-            for x in range(1, 50):
-                peaks[0] *= 1 - (1.0 / (2 ** x))
-            peaks[1] = 2 * peaks[0]
-            peaks[2] = 1 - peaks[0] - peaks[1]
-
-            chi = 0.0
-            for i in range(len(peaks)):
-                chi += pow((max_ranks[i] - peaks[i] * num_m), 2.0) / (peaks[i] * num_m)
-            p_val = math.exp(-chi / 2)
-            return p_val
-
-    def run_test(self, data_generator, matrix_size=32):
+            max_ranks = BinaryMatrixTest.count_ranks(bits[:num_m * block_size], matrix_size, n_cols)
+            return BinaryMatrixTest.rank_p_value(max_ranks, num_m, matrix_size, n_cols)
+
+    def run_test(self, data_generator, matrix_size=32, n_cols=None):
         """
         Launch binary rank test on the data.
         """
         logging.info("Launching binary matrix Test")
         self.get_data_for_test(data_generator)
-        p_val = self.run_binary_test(self.data, matrix_size)
+        p_val = self.run_binary_test(self.data, matrix_size, n_cols)
         self.test_output = p_val
         logging.info("Binary matrix terminated")
+
+    def begin(self, sample_info, matrix_size=32, n_cols=None):
+        """
+        Reset the ranks counted.
+        """
+        self.matrix_size = matrix_size
+        self.n_cols = matrix_size if n_cols is None else n_cols
+        self.max_ranks = [0, 0, 0]
+        self.data = np.zeros(0, dtype=np.uint8)
+        self.n_values = 0
+
+    def update(self, chunk):
+        """
+        Count the ranks of the matrices completed by the chunk, remaining bits are kept for the next chunk.
+        """
+        chunk_bits = chunk.bits()
+        self.n_values += len(chunk_bits)
+        bits = np.concatenate([self.data, chunk_bits])
+        block_size = self.matrix_size * self.n_cols
+        end = len(bits) - len(bits) % block_size
+        for i, count in enumerate(self.count_ranks(bits[:end], self.matrix_size, self.n_cols)):
+            self.max_ranks[i] += count
+        self.data = bits[end:]
+
+    def finalize(self):
+        """
+        Compare the ranks counted to the theory.
+        """
+        num_m = sum(self.max_ranks)
+        if num_m > 0:
+            self.test_output = self.rank_p_value(self.max_ranks, num_m, self.matrix_size, self.n_cols)
+        logging.info("Binary matrix terminated")
@@ -0,0 +1,114 @@
+import logging
+
+from scipy.stats import poisson
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.data_type import DataType
+from utils.integer_domain import integer_symbols, reduce_alphabet
+import numpy as np
+
+# Smallest number of days of a year, consecutive integers are grouped into a day until there are that many days
+MIN_DAYS = 1 << 24
+
+# Largest number of days, integers spanning a bigger range are reduced
+MAX_DAYS = 1 << 32
+
+# Expected number of repeated spacings per year
+EXPECTED_REPEATS = 2
+
+
+@TestRegistry.register("birthday_spacings", [DataType.INT])
+class BirthdaySpacingsTest(StatisticalTest):
+    """
+    Implementation of the birthday spacings test counting the repeated spacings between the sorted birthdays of years
+    of m birthdays, which number is Poisson distributed with mean m^3 / (4 d) for d days.
+    Algorithm from D. Knuth, The Art of Computer Programming vol. 2, 3.3.2 J. Days are tuples of consecutive integers
+    and every year is sorted at once.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Offset the integers and reduce their range to at most MAX_DAYS values.
+        """
+        symbols, alphabet_size = integer_symbols(data.data)
+        self.data, self.alphabet_size = reduce_alphabet(symbols, alphabet_size, MAX_DAYS)
+        self.n_values = len(data.data)
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Birthday spacings test")
+
+    @staticmethod
+    def birthday_parameters(alphabet_size):
+        """
+        Choose the number of integers per day and the number of birthdays per year.
+        :param alphabet_size: number of possible integers
+        :return: (integers per day, number of days, birthdays per year)
+        """
+        day_size = 1
+        while alphabet_size ** day_size < MIN_DAYS:
+            day_size += 1
+        n_days = alphabet_size ** day_size
+        n_birthdays = int(round((4 * EXPECTED_REPEATS * n_days) ** (1 / 3)))
+        return day_size, n_days, n_birthdays
+
+    @staticmethod
+    def count_repeated_spacings(days, n_days, n_birthdays):
+        """
+        Count the repeated spacings of each year.
+        :param days: int64 array of days, split into consecutive years of n_birthdays days
+        :param n_days: number of days
+        :param n_birthdays: number of birthdays per year
+        :return: number of repeated spacings of each year
+        """
+        years = np.sort(days[:len(days) // n_birthdays * n_birthdays].reshape(-1, n_birthdays), axis=1)
+        spacings = np.empty_like(years)
+        spacings[:, :-1] = np.diff(years, axis=1)
+        # Years are circular, the last spacing goes back to the first birthday
+        spacings[:, -1] = years[:, 0] + n_days - years[:, -1]
+        spacings.sort(axis=1)
+        return np.count_nonzero(spacings[:, 1:] == spacings[:, :-1], axis=1)
+
+    @staticmethod
+    def repeats_p_value(total, mean):
+        """
+        One-sided mid p-value of the total number of repeated spacings, close to 1 when there are too many repeats.
+        Half of the probability of the observed total is counted so that the p-value is uniform under randomness and
+        does not reach 1 when the total is close to its mean.
+        :param total: total number of repeated spacings
+        :param mean: expected number of repeated spacings
+        :return: p-value
+        """
+        return float(1 - (poisson.sf(total - 1, mean) + poisson.sf(total, mean)) / 2)
+
+    def run_test(self, data_generator):
+        """
+        Launch birthday spacings test on the data.
+        """
+        logging.info("Launching birthday spacings Test")
+        self.get_data_for_test(data_generator)
+        if self.alphabet_size < 2:
+            return
+        day_size, n_days, n_birthdays = self.birthday_parameters(self.alphabet_size)
+        powers = np.array([self.alphabet_size ** i for i in range(day_size - 1, -1, -1)], dtype=np.int64)
+        days = self.data[:len(self.data) // day_size * day_size].astype(np.int64).reshape(-1, day_size) @ powers
+        repeats = self.count_repeated_spacings(days, n_days, n_birthdays)
+        if len(repeats) == 0:
+            return
+        # Years are independent, the total number of repeats is Poisson distributed
+        mean = len(repeats) * n_birthdays ** 3 / (4 * n_days)
+        total = int(np.sum(repeats))
+        self.test_output = self.repeats_p_value(total, mean)
+        logging.info(f"Birthday spacings test: {total} repeated spacings in {len(repeats)} years, "
+                     f"{mean:.1f} expected")
+        logging.info("Birthday spacings test terminated")
@@ -0,0 +1,83 @@
+import logging
+
+from scipy.special import gammaincc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_statistics import BitStatistics
+from utils.data_type import DataType
+import numpy as np
+
+
+@TestRegistry.register("block_frequency", [DataType.INT, DataType.BITSTRING])
+class BlockFrequencyTest(StatisticalTest):
+    """
+    Implementation of the frequency test within a block checking the proportion of ones in blocks of 128 bits.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.2
+    """
+
+    supports_streaming = True
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Retrieve the ones counted per block in the pass shared with the other frequency tests.
+        """
+        self.data = data.bit_statistics()
+        self.n_values = self.data.n_bits
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Block frequency test")
+
+    @staticmethod
+    def block_frequency_p_value(block_ones, block_size):
+        """
+        Compare the proportion of ones of each block to 1/2.
+        :param block_ones: number of ones of each block
+        :param block_size: number of bits per block
+        :return: p-value
+        """
+        num_blocks = len(block_ones)
+        if num_blocks == 0:
+            return None
+        proportions = np.asarray(block_ones, dtype=np.float64) / block_size
+        chi_squared = 4.0 * block_size * float(np.sum((proportions - 0.5) ** 2))
+        return gammaincc(num_blocks / 2.0, chi_squared / 2.0)
+
+    def run_test(self, data_generator):
+        """
+        Launch block frequency test on the data.
+        """
+        logging.info("Launching block frequency Test")
+        self.get_data_for_test(data_generator)
+        self.test_output = self.block_frequency_p_value(self.data.block_ones, self.data.block_size)
+        logging.info("Block frequency test terminated")
+
+    def begin(self, sample_info):
+        """
+        Reset the ones counted per block.
+        """
+        self.data = BitStatistics(sample_info.n_bits)
+        self.n_values = sample_info.n_bits
+
+    def update(self, chunk):
+        """
+        Count the ones of the blocks completed by the chunk.
+        """
+        self.data.update(chunk.bits())
+
+    def finalize(self):
+        """
+        Compare the proportions of ones counted to 1/2.
+        """
+        self.test_output = self.block_frequency_p_value(self.data.block_ones, self.data.block_size)
+        logging.info("Block frequency test terminated")
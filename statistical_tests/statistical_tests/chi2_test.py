@@ -2,6 +2,7 @@ import logging
 
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
 from utils.data_type import DataType
+from utils.row_counts import row_chisquare
 import numpy as np
 from scipy.stats import chisquare
 
@@ -12,6 +13,9 @@ class Chi2Test(StatisticalTest):
     Implementation of the chi 2 test verifying the uniformity of the distribution on the sample.
     """
 
+    supports_streaming = True
+    supports_batch = True
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -25,11 +29,15 @@ class Chi2Test(StatisticalTest):
         Format the data.
         """
         if data.data_type == DataType.BITSTRING:
-            numbers = list(map(int, data.data))
+            # Ones are counted in the pass shared with the other frequency tests
+            statistics = data.bit_statistics()
+            counts = np.array([statistics.n_bits - statistics.n_ones, statistics.n_ones])
+            counts = counts[counts > 0]
+            self.n_values = statistics.n_bits
         else:
             numbers = data.data
-        unique, counts = np.unique(numbers, return_counts=True)
-        self.n_values = len(numbers)
+            unique, counts = np.unique(numbers, return_counts=True)
+            self.n_values = len(numbers)
 
         self.data = counts
 
@@ -47,3 +55,34 @@ class Chi2Test(StatisticalTest):
         self.get_data_for_test(data_generator)
         self.test_output = chisquare(self.data).pvalue
         logging.info("Chi2 test terminated")
+
+    @classmethod
+    def run_batch(cls, samples, data_type):
+        """
+        Run the Chi2 test on each sample, the values of all the samples being counted by a single sort. Bits are
+        counted like integers.
+        """
+        return row_chisquare(samples)
+
+    def begin(self, sample_info):
+        """
+        Reset the occurrences counted.
+        """
+        self.values = np.zeros(0, dtype=np.int64)
+        self.data = np.zeros(0, dtype=np.int64)
+        self.n_values = 0
+
+    def update(self, chunk):
+        """
+        Count the occurrences of the values of the chunk.
+        """
+        numbers = chunk.bits() if chunk.data_type == DataType.BITSTRING else chunk.data
+        self.values, self.data = self.count_values(self.values, self.data, numbers)
+        self.n_values += len(numbers)
+
+    def finalize(self):
+        """
+        Run the Chi2 test on the occurrences counted.
+        """
+        self.test_output = chisquare(self.data).pvalue
+        logging.info("Chi2 test terminated")
@@ -6,6 +6,7 @@ from scipy.fft import fft
 from scipy.special import erfc
 
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_conversion import to_bit_array, window_codes
 from utils.data_type import DataType
 import numpy as np
 
@@ -32,6 +33,8 @@ class CompressionTest(StatisticalTest):
     Compression test implementation.
     """
 
+    supports_streaming = True
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -42,16 +45,10 @@ class CompressionTest(StatisticalTest):
 
     def get_data_for_test(self, data):
         """
-       Format the data into a bitstring
+        Keep the sample, its blocks are read from the shared index of the non overlapping L bits windows.
         """
-        self.data = data.data
-        if data.data_type != DataType.BITSTRING:
-            binary_string = self.transform_to_bits()
-        else:
-            binary_string = self.data
-
-        self.n_values = len(binary_string)
-        self.data = binary_string
+        self.data = data
+        self.n_values = data.n_bits if data.data_type == DataType.BITSTRING else len(data.bits())
 
     def generate_report(self):
         """
@@ -59,64 +56,74 @@ class CompressionTest(StatisticalTest):
         """
         return self.generate_test_report("Compression test.")
 
-    def backtrack(self, key, L, table):
-        """
-        Recursive function used to fill the initialisation table.
+    @staticmethod
+    def compression_parameters(n_values):
         """
-        if len(key) < L:
-            self.backtrack(key + "0", L, table)
-            self.backtrack(key + "1", L, table)
-        else:
-            table[key] = 0
-
-    def run_compression(self, data, n_values):
-        """
-        Run compression test on a bitstring.
-        Implementation inspired from:
-        https://github.com/alexandru-stancioiu/Maurer-s-Universal-Statistical-Test/blob/master/maurer.py
-        :param data: bitstring
-        :param n_values: list_length
-        :return: p_value
+        Choose the test parameters from the number of bits of the sample.
+        :param n_values: number of bits
+        :return: (L, Q, K, expected_value, variance)
         """
-        # Constants definition
-        L = 0  # Length of a block
-        Q = 0  # Number of blocks in init sequence
-        K = 0  # Number of blocks in test sequence
-        expected_value = 0
-        variance = 0
         for i, line in enumerate(COMPRESSION_DATA):
             if n_values <= line[0]:
                 # we use previous line unless it is the first
                 used_line = COMPRESSION_DATA[i - 1] if i - 1 >= 0 else line
-                L = used_line[1]
-                Q = used_line[2]
-                K = int(used_line[0] / L) - Q
-                expected_value = used_line[3]
-                variance = used_line[4]
-                break
-
-        # First we get init and test sequences
-        init = data[0:Q * L]
-        test = data[Q * L: (Q + K) * L]
-
-        dist_table = {}
-        self.backtrack("", L, dist_table)
-
-        for i in range((Q - 1) * L, -1, -L):
-            block_id = i / L + 1
-            block = str(init[i: i + L])
-            if dist_table[block] < block_id:
-                dist_table[block] = block_id
-
-        stat_sum = 0
-        for i in range(0, K * L, L):
-            block_id = Q + i / L + 1
-            block = str(test[i: i + L])
-            diff = block_id - dist_table[block]
-            stat_sum += math.log(diff, 2)
-            dist_table[block] = block_id
-
-        fn = stat_sum / K
+                L = used_line[1]  # Length of a block
+                Q = used_line[2]  # Number of blocks in init sequence
+                K = int(used_line[0] / L) - Q  # Number of blocks in test sequence
+                return L, Q, K, used_line[3], used_line[4]
+
+        # Beyond the table the biggest block length is kept and every block of the sample is tested
+        n, L, Q, expected_value, variance = COMPRESSION_DATA[-1]
+        K = int(n_values / L) - Q
+        return L, Q, K, expected_value, variance
+
+    def _init_compression(self, n_values):
+        self.parameters = self.compression_parameters(n_values)
+        # Last position of each L bits block, indexed by the integer value of the block
+        self.dist_table = np.zeros(2 ** self.parameters[0], dtype=np.int64)
+        self.n_blocks = 0
+        self.stat_sum = 0
+
+    def _process_blocks(self, bits):
+        """
+        Process consecutive blocks of the sequence.
+        :param bits: array of bits holding complete blocks
+        """
+        self._process_codes(window_codes(bits, self.parameters[0], overlapping=False))
+
+    def _process_codes(self, block_codes, batch_size=1 << 22):
+        """
+        Process consecutive blocks of the sequence, blocks of the init sequence only fill the distance table.
+        :param block_codes: integer value of each L bits block
+        :param batch_size: number of blocks processed at once
+        """
+        L, Q, K, _, _ = self.parameters
+        n_blocks = min(len(block_codes), Q + K - self.n_blocks)
+        for start in range(0, max(n_blocks, 0), batch_size):
+            codes = block_codes[start:min(start + batch_size, n_blocks)]
+            positions = np.arange(self.n_blocks + 1, self.n_blocks + len(codes) + 1)
+
+            # Blocks are grouped by value, the previous occurrence of a block is the previous one of its group or,
+            # for the first of the group, the one recorded in the table
+            order = np.argsort(codes, kind="stable")
+            codes, positions = codes[order], positions[order]
+            same_as_previous = codes[1:] == codes[:-1]
+            previous = self.dist_table[codes]
+            previous[1:] = np.where(same_as_previous, positions[:-1], previous[1:])
+
+            tested = positions > Q
+            self.stat_sum += float(np.sum(np.log2(positions[tested] - previous[tested])))
+            last_of_group = np.append(~same_as_previous, True)
+            self.dist_table[codes[last_of_group]] = positions[last_of_group]
+            self.n_blocks += len(codes)
+
+    def _compression_p_value(self):
+        L, Q, _, expected_value, variance = self.parameters
+        K = self.n_blocks - Q
+        if K <= 0:
+            return None
+
+        fn = self.stat_sum / K
 
         c = 0.7 - 0.8 / L + (4 + 32 / L) * math.pow(K, -3 / L) / 15
         sigma = c * math.sqrt(variance / K)
@@ -124,11 +131,50 @@ class CompressionTest(StatisticalTest):
 
         return p_value
 
+    def run_compression(self, data, n_values):
+        """
+        Run compression test on a bitstring.
+        Implementation inspired from:
+        https://github.com/alexandru-stancioiu/Maurer-s-Universal-Statistical-Test/blob/master/maurer.py
+        :param data: bit sequence (bitstring or array of bits)
+        :param n_values: list_length
+        :return: p_value
+        """
+        self._init_compression(n_values)
+        self._process_blocks(to_bit_array(data))
+        return self._compression_p_value()
+
     def run_test(self, data_generator):
         """
         Launch compression tets on the data.
         """
         logging.info("Launching compression Test")
         self.get_data_for_test(data_generator)
-        self.test_output = self.run_compression(self.data, self.n_values)
+        self._init_compression(self.n_values)
+        self._process_codes(self.data.window_codes(self.parameters[0], overlapping=False))
+        self.test_output = self._compression_p_value()
+        logging.info("Compression test terminated")
+
+    def begin(self, sample_info):
+        """
+        Choose the test parameters from the size of the whole sample and reset the distance table.
+        """
+        self._init_compression(sample_info.n_bits)
+        self.n_values = sample_info.n_bits
+        self.data = np.zeros(0, dtype=np.uint8)
+
+    def update(self, chunk):
+        """
+        Process the blocks completed by the chunk, remaining bits are kept for the next chunk.
+        """
+        bits = np.concatenate([self.data, chunk.bits()])
+        end = len(bits) - len(bits) % self.parameters[0]
+        self._process_blocks(bits[:end])
+        self.data = bits[end:]
+
+    def finalize(self):
+        """
+        Compute the test statistic from the distances summed.
+        """
+        self.test_output = self._compression_p_value()
         logging.info("Compression test terminated")
@@ -0,0 +1,108 @@
+import logging
+import math
+
+from scipy.stats import norm
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_statistics import BitStatistics
+from utils.data_type import DataType
+import numpy as np
+
+
+@TestRegistry.register("cumulative_sums", [DataType.INT, DataType.BITSTRING])
+class CumulativeSumsTest(StatisticalTest):
+    """
+    Implementation of the cumulative sums test checking the maximal excursion of the random walk of +1 and -1.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.13
+    """
+
+    supports_streaming = True
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+        self.mode = "forward"
+
+    def get_data_for_test(self, data):
+        """
+        Retrieve the extremes of the walk computed in the pass shared with the other frequency tests.
+        """
+        self.data = data.bit_statistics()
+        self.n_values = self.data.n_bits
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Cumulative sums test")
+
+    @staticmethod
+    def maximal_excursion(statistics, mode="forward"):
+        """
+        Largest absolute value of the cumulative sums, starting from the first bit (forward) or from the last one
+        (backward).
+        :param statistics: BitStatistics of the sequence
+        :param mode: "forward" or "backward"
+        :return: maximal excursion
+        """
+        if mode == "backward":
+            return max(abs(statistics.final_sum - statistics.min_prefix_sum),
+                       abs(statistics.final_sum - statistics.max_prefix_sum))
+        return max(abs(statistics.max_sum), abs(statistics.min_sum))
+
+    @staticmethod
+    def cumulative_sums_p_value(z, n_values):
+        """
+        Compare the maximal excursion to the one of a random walk.
+        :param z: maximal excursion
+        :param n_values: number of bits
+        :return: p-value
+        """
+        sqrt_n = math.sqrt(n_values)
+        k = np.arange(math.floor((-n_values / z + 1) / 4), math.floor((n_values / z - 1) / 4) + 1)
+        sum_1 = np.sum(norm.cdf((4 * k + 1) * z / sqrt_n) - norm.cdf((4 * k - 1) * z / sqrt_n))
+        k = np.arange(math.floor((-n_values / z - 3) / 4), math.floor((n_values / z - 1) / 4) + 1)
+        sum_2 = np.sum(norm.cdf((4 * k + 3) * z / sqrt_n) - norm.cdf((4 * k + 1) * z / sqrt_n))
+        return float(1.0 - sum_1 + sum_2)
+
+    def _cumulative_sums_p_value(self):
+        if self.data.n_bits == 0:
+            return None
+        z = self.maximal_excursion(self.data, self.mode)
+        return self.cumulative_sums_p_value(z, self.data.n_bits)
+
+    def run_test(self, data_generator, mode="forward"):
+        """
+        Launch cumulative sums test on the data.
+        :param mode: "forward" or "backward"
+        """
+        logging.info("Launching cumulative sums Test")
+        self.mode = mode
+        self.get_data_for_test(data_generator)
+        self.test_output = self._cumulative_sums_p_value()
+        logging.info("Cumulative sums test terminated")
+
+    def begin(self, sample_info, mode="forward"):
+        """
+        Reset the walk.
+        """
+        self.mode = mode
+        self.data = BitStatistics(sample_info.n_bits)
+        self.n_values = sample_info.n_bits
+
+    def update(self, chunk):
+        """
+        Extend the walk with the chunk.
+        """
+        self.data.update(chunk.bits())
+
+    def finalize(self):
+        """
+        Compare the maximal excursion of the walk to the theory.
+        """
+        self.test_output = self._cumulative_sums_p_value()
+        logging.info("Cumulative sums test terminated")
@@ -0,0 +1,81 @@
+import logging
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.data_type import DataType
+from utils.integer_domain import MIN_EXPECTED, integer_symbols, merged_chisquare
+import numpy as np
+
+# Largest gap length counted in its own class, longer gaps are counted together
+MAX_GAP_CLASS = 64
+
+
+@TestRegistry.register("gap", [DataType.INT])
+class GapTest(StatisticalTest):
+    """
+    Implementation of the gap test checking the lengths of the gaps between two integers of the lower half of the
+    range, which follow a geometric law.
+    Algorithm from D. Knuth, The Art of Computer Programming vol. 2, 3.3.2 B.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Offset the integers so that they start from 0.
+        """
+        self.data, self.alphabet_size = integer_symbols(data.data)
+        self.n_values = len(data.data)
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Gap test")
+
+    @staticmethod
+    def gap_lengths(symbols, n_marked):
+        """
+        Lengths of the gaps between the symbols below n_marked, the values before the first one being ignored.
+        :param symbols: array of symbols
+        :param n_marked: number of marked symbols
+        :return: int64 array of gap lengths
+        """
+        marked = np.flatnonzero(symbols < np.uint64(n_marked))
+        return np.diff(marked) - 1
+
+    @staticmethod
+    def gap_p_value(gaps, probability):
+        """
+        Compare the gap lengths to the geometric law.
+        :param gaps: gap lengths
+        :param probability: probability that a value is marked
+        :return: p-value
+        """
+        if len(gaps) == 0:
+            return None
+        # Gaps are counted individually while their expected number is big enough, the last class gathers the rest
+        n_classes = int(np.log(MIN_EXPECTED / len(gaps)) / np.log(1 - probability)) if probability < 1 else 1
+        n_classes = max(1, min(n_classes, MAX_GAP_CLASS))
+        observed = np.bincount(np.minimum(gaps, n_classes), minlength=n_classes + 1)
+        probabilities = probability * (1 - probability) ** np.arange(n_classes + 1)
+        probabilities[-1] = (1 - probability) ** n_classes
+        return merged_chisquare(observed, probabilities)
+
+    def run_test(self, data_generator):
+        """
+        Launch gap test on the data.
+        """
+        logging.info("Launching gap Test")
+        self.get_data_for_test(data_generator)
+        if self.alphabet_size < 2:
+            return
+        n_marked = self.alphabet_size // 2
+        gaps = self.gap_lengths(self.data, n_marked)
+        self.test_output = self.gap_p_value(gaps, n_marked / self.alphabet_size)
+        logging.info("Gap test terminated")
@@ -1,9 +1,9 @@
-import copy
 import logging
 
 from scipy.special import gammaincc
 
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_conversion import bit_array_to_string, to_bit_array
 from utils.data_type import DataType
 import numpy as np
 
@@ -16,27 +16,21 @@ def berlekamp_massey_algorithm(block_data):
     for a given binary output sequence. The algorithm will also find the minimal polynomial of a linearly recurrent
     sequence in an arbitrary field. The field requirement means that the Berlekamp–Massey algorithm requires all
     non-zero elements to have a multiplicative inverse.
-    :param block_data: bitstring
-    :return:
+    Polynomials are python integers used as bitsets, bit j holding the coefficient of x^j.
+    :param block_data: bit sequence (bitstring or array of bits)
+    :return: linear complexity of the sequence
     """
-    n = len(block_data)
-    c = np.zeros(n)
-    b = np.zeros(n)
-    c[0], b[0] = 1, 1
-    l_len, m = 0, 1
-    int_data = [int(el) for el in block_data]
+    bits = to_bit_array(block_data)
+    n = len(bits)
+    # Bit n - 1 - k holds the k-th bit, so that shifting right by n - 1 - i puts bit i - j at position j
+    sequence = int(bit_array_to_string(bits) or "0", 2)
+    c, b = 1, 1
+    l_len, m = 0, -1
     for i in range(n):
-        v = int_data[(i - l_len):i]
-        v = v[::-1]
-        cc = c[1:l_len + 1]
-        d = (int_data[i] + np.dot(v, cc)) % 2
+        d = bin(c & (sequence >> (n - 1 - i))).count("1") & 1
         if d == 1:
-            temp = copy.copy(c)
-            p = np.zeros(n)
-            for j in range(0, l_len):
-                if b[j] == 1:
-                    p[j + i - m] = 1
-            c = (c + p) % 2
+            temp = c
+            c ^= b << (i - m)
             if l_len <= 0.5 * i:
                 l_len = i + 1 - l_len
                 m = i
@@ -44,12 +38,77 @@ def berlekamp_massey_algorithm(block_data):
     return l_len
 
 
+def _parity(words):
+    """
+    Parity of the bits of each row of an array of uint64 words.
+    """
+    folded = np.bitwise_xor.reduce(words, axis=1)
+    for shift in (32, 16, 8, 4, 2, 1):
+        folded ^= folded >> np.uint64(shift)
+    return (folded & np.uint64(1)).astype(bool)
+
+
+def _shift_left(words, shifts):
+    """
+    Shift each row of an array of uint64 words, holding a bitset with its lowest bits first, by its own shift.
+    """
+    n_words = words.shape[1]
+    bit_shifts = (shifts % 64).astype(np.uint64)[:, None]
+    source = np.arange(n_words)[None, :] - (shifts // 64)[:, None]
+    low = np.where(source >= 0, np.take_along_axis(words, np.maximum(source, 0), axis=1), np.uint64(0))
+    high = np.where(source >= 1, np.take_along_axis(words, np.maximum(source - 1, 0), axis=1), np.uint64(0))
+    carried = np.where(bit_shifts > 0, high >> ((np.uint64(64) - bit_shifts) % np.uint64(64)), np.uint64(0))
+    return (low << bit_shifts) | carried
+
+
+def batched_berlekamp_massey(blocks):
+    """
+    Berlekamp Massey algorithm run on many blocks at once. Polynomials are bitsets packed in uint64 words and every
+    step of the algorithm is applied to all the blocks with vectorized operations.
+    :param blocks: (number of blocks, block size) array of bits
+    :return: int array of the linear complexities of the blocks
+    """
+    n_blocks, n = blocks.shape
+    n_words = n // 64 + 1
+    # Reversed blocks packed with their lowest bits first, padded so that any shifted window can be read
+    reversed_bits = np.zeros((n_blocks, (2 * n_words + 1) * 64), dtype=np.uint8)
+    reversed_bits[:, :n] = blocks[:, ::-1]
+    sequences = np.packbits(reversed_bits, axis=1, bitorder="little").view("<u8").astype(np.uint64)
+
+    c = np.zeros((n_blocks, n_words), dtype=np.uint64)
+    c[:, 0] = 1
+    b = c.copy()
+    l_len = np.zeros(n_blocks, dtype=np.int64)
+    m = np.full(n_blocks, -1, dtype=np.int64)
+    for i in range(n):
+        # Window holding bit i - j at position j
+        word, bit = divmod(n - 1 - i, 64)
+        window = sequences[:, word:word + n_words] >> np.uint64(bit)
+        if bit:
+            window |= sequences[:, word + 1:word + 1 + n_words] << np.uint64(64 - bit)
+        discrepant = np.flatnonzero(_parity(c & window))
+        if len(discrepant) == 0:
+            continue
+        temp = c[discrepant]
+        c[discrepant] = temp ^ _shift_left(b[discrepant], i - m[discrepant])
+        grow = l_len[discrepant] <= 0.5 * i
+        grown = discrepant[grow]
+        l_len[grown] = i + 1 - l_len[grown]
+        m[grown] = i
+        b[grown] = temp[grow]
+    return l_len
+
+
 @TestRegistry.register("linear_complexity", [DataType.INT, DataType.BITSTRING])
 class LinearComplexityTest(StatisticalTest):
     """
     Implementation of linear complexity test in python.
     """
 
+    supports_streaming = True
+    # Berlekamp-Massey is quadratic in the block size, the slowest test per bit
+    cost_per_unit = 4e-7
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -62,9 +121,7 @@ class LinearComplexityTest(StatisticalTest):
         """
         Format the data into a bitstring.
         """
-        self.data = data.data
-        if data.data_type != DataType.BITSTRING:
-            self.data = self.transform_to_bits()
+        self.data = data.bits()
         self.n_values = len(self.data)
 
     def generate_report(self):
@@ -74,44 +131,63 @@ class LinearComplexityTest(StatisticalTest):
         return self.generate_test_report("Linear complexity test")
 
     @staticmethod
-    def run_linear_complexity(data, block_size):
+    def count_complexities(data, block_size, pool=None, batch_size=1 << 12):
         """
-        Implementation of the linear complexity test.
-        Algorithm adapted from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.10.4
-        :param data: bitstring
+        Compute the linear complexity of consecutive blocks and count them in the categories of the test.
+        :param data: bit sequence (bitstring or array of bits), its length is a multiple of block_size
         :param block_size: size of the blocks where lsfr is calculated
+        :param pool: optional multiprocessing pool the batches of blocks are spread over
+        :param batch_size: number of blocks processed at once
+        :return: number of blocks in each of the 7 categories
+        """
+        t2 = (block_size / 3.0 + 2.0 / 9) / 2 ** block_size
+        mean = 0.5 * block_size + (1.0 / 36) * (9 + (-1) ** (block_size + 1)) - t2
+
+        blocks = to_bit_array(data).reshape(-1, block_size)
+        batches = [blocks[start:start + batch_size] for start in range(0, len(blocks), batch_size)]
+        if pool is not None:
+            complexities = pool.map(batched_berlekamp_massey, batches)
+        else:
+            complexities = [batched_berlekamp_massey(batch) for batch in batches]
+        complexities = np.concatenate(complexities) if complexities else np.zeros(0, dtype=np.int64)
+
+        t = ((-1) ** block_size) * (complexities - mean) + 2.0 / 9
+        return np.histogram(t, bins=[-9999999999, -2.5, -1.5, -0.5, 0.5, 1.5, 2.5, 9999999999])[0]
+
+    @staticmethod
+    def complexity_p_value(vg, num_blocks):
+        """
+        Compare the linear complexities counted to the theory.
+        :param vg: number of blocks in each of the 7 categories
+        :param num_blocks: number of blocks
         :return: p-value
         """
         # Degree of freedom and theoric probabilities
         dof = 6
         peaks = [0.010417, 0.03125, 0.125, 0.5, 0.25, 0.0625, 0.020833]
 
-        t2 = (block_size / 3.0 + 2.0 / 9) / 2 ** block_size
-        mean = 0.5 * block_size + (1.0 / 36) * (9 + (-1) ** (block_size + 1)) - t2
+        im = ([((vg[ii] - num_blocks * peaks[ii]) ** 2) / (num_blocks * peaks[ii]) for ii in range(7)])
+
+        chi_squared = 0.0
+        for i in range(len(peaks)):
+            chi_squared += im[i]
+        p_val = gammaincc(dof / 2.0, chi_squared / 2.0)
+        return p_val
 
+    @staticmethod
+    def run_linear_complexity(data, block_size, pool=None):
+        """
+        Implementation of the linear complexity test.
+        Algorithm adapted from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.10.4
+        :param data: bit sequence (bitstring or array of bits)
+        :param block_size: size of the blocks where lsfr is calculated
+        :param pool: optional multiprocessing pool the blocks are spread over
+        :return: p-value
+        """
         num_blocks = int(len(data) / block_size)
         if num_blocks > 1:
-            block_end = block_size
-            block_start = 0
-            blocks = []
-            for i in range(num_blocks):
-                blocks.append(data[block_start:block_end])
-                block_start += block_size
-                block_end += block_size
-
-            complexities = []
-            for block in blocks:
-                complexities.append(berlekamp_massey_algorithm(block))
-
-            t = ([(((-1) ** block_size) * (chunk - mean) + 2.0 / 9) for chunk in complexities])
-            vg = np.histogram(t, bins=[-9999999999, -2.5, -1.5, -0.5, 0.5, 1.5, 2.5, 9999999999])[0]
-            im = ([((vg[ii] - num_blocks * peaks[ii]) ** 2) / (num_blocks * peaks[ii]) for ii in range(7)])
-
-            chi_squared = 0.0
-            for i in range(len(peaks)):
-                chi_squared += im[i]
-            p_val = gammaincc(dof / 2.0, chi_squared / 2.0)
-            return p_val
+            vg = LinearComplexityTest.count_complexities(data[:num_blocks * block_size], block_size, pool)
+            return LinearComplexityTest.complexity_p_value(vg, num_blocks)
 
     def run_test(self, data_generator, block_size=1000):
         """
@@ -122,3 +198,32 @@ class LinearComplexityTest(StatisticalTest):
         p_val = self.run_linear_complexity(self.data, block_size)
         self.test_output = p_val
         logging.info("Linear complexity terminated")
+
+    def begin(self, sample_info, block_size=1000):
+        """
+        Reset the linear complexities counted.
+        """
+        self.block_size = block_size
+        self.complexities = np.zeros(7, dtype=np.int64)
+        self.data = np.zeros(0, dtype=np.uint8)
+        self.n_values = 0
+
+    def update(self, chunk):
+        """
+        Count the linear complexities of the blocks completed by the chunk, remaining bits are kept for the next chunk.
+        """
+        chunk_bits = chunk.bits()
+        self.n_values += len(chunk_bits)
+        bits = np.concatenate([self.data, chunk_bits])
+        end = len(bits) - len(bits) % self.block_size
+        self.complexities += self.count_complexities(bits[:end], self.block_size)
+        self.data = bits[end:]
+
+    def finalize(self):
+        """
+        Compare the linear complexities counted to the theory.
+        """
+        num_blocks = int(self.complexities.sum())
+        if num_blocks > 1:
+            self.test_output = self.complexity_p_value(self.complexities, num_blocks)
+        logging.info("Linear complexity terminated")
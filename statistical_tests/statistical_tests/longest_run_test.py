@@ -0,0 +1,99 @@
+import logging
+
+from scipy.special import gammaincc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_statistics import BitStatistics
+from utils.data_type import DataType
+import numpy as np
+
+# block size: (longest run of the first category, theoretical probabilities of the categories)
+# Data coming from https://nvlpubs.nist.gov/nistpubs/Legacy/SP/nistspecialpublication800-22r1a.pdf 3.4
+LONGEST_RUN_DATA = {
+    8: (1, [0.2148, 0.3672, 0.2305, 0.1875]),
+    128: (4, [0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124]),
+    10000: (10, [0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727])
+}
+
+
+@TestRegistry.register("longest_run", [DataType.INT, DataType.BITSTRING])
+class LongestRunTest(StatisticalTest):
+    """
+    Implementation of the test for the longest run of ones in a block.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.4
+    """
+
+    supports_streaming = True
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Retrieve the longest runs counted in the pass shared with the other frequency tests.
+        """
+        self.data = data.bit_statistics()
+        self.n_values = self.data.n_bits
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Longest run test")
+
+    @staticmethod
+    def longest_run_p_value(longest_runs, block_size):
+        """
+        Compare the longest runs of the blocks to the theory.
+        :param longest_runs: number of blocks per length of their longest run of ones
+        :param block_size: number of bits per block
+        :return: p-value
+        """
+        if block_size not in LONGEST_RUN_DATA:
+            return None
+        first_run, peaks = LONGEST_RUN_DATA[block_size]
+        last_run = first_run + len(peaks) - 1
+        # Runs shorter than the first category or longer than the last one are counted in them
+        vg = np.array([longest_runs[:first_run + 1].sum()] + list(longest_runs[first_run + 1:last_run])
+                      + [longest_runs[last_run:].sum()], dtype=np.float64)
+        num_blocks = vg.sum()
+        if num_blocks == 0:
+            return None
+
+        expected = num_blocks * np.array(peaks)
+        chi_squared = float(np.sum((vg - expected) ** 2 / expected))
+        return gammaincc((len(peaks) - 1) / 2.0, chi_squared / 2.0)
+
+    def run_test(self, data_generator):
+        """
+        Launch longest run test on the data.
+        """
+        logging.info("Launching longest run Test")
+        self.get_data_for_test(data_generator)
+        self.test_output = self.longest_run_p_value(self.data.longest_runs, self.data.run_block_size)
+        logging.info("Longest run test terminated")
+
+    def begin(self, sample_info):
+        """
+        Choose the block size from the size of the whole sample and reset the longest runs counted.
+        """
+        self.data = BitStatistics(sample_info.n_bits)
+        self.n_values = sample_info.n_bits
+
+    def update(self, chunk):
+        """
+        Count the longest runs of the blocks completed by the chunk.
+        """
+        self.data.update(chunk.bits())
+
+    def finalize(self):
+        """
+        Compare the longest runs counted to the theory.
+        """
+        self.test_output = self.longest_run_p_value(self.data.longest_runs, self.data.run_block_size)
+        logging.info("Longest run test terminated")
@@ -0,0 +1,114 @@
+import logging
+import math
+
+from scipy.special import erfc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.data_type import DataType
+from utils.integer_domain import integer_symbols, reduce_alphabet
+import numpy as np
+
+# Largest number of letters, integers spanning a bigger range are reduced to 1024 letters as in Marsaglia's test
+MAX_LETTERS = 1 << 10
+
+# Smallest number of letters, integers of a smaller range are grouped by tuples of consecutive integers
+MIN_LETTERS = 1 << 9
+
+# Number of pairs of each sample per possible pair of letters
+PAIRS_PER_WORD = 2
+
+
+@TestRegistry.register("opso", [DataType.INT])
+class OpsoTest(StatisticalTest):
+    """
+    Implementation of the overlapping pairs sparse occupancy test counting the pairs of letters never formed by two
+    consecutive integers in samples of 2 * 1024^2 pairs, which number is normally distributed.
+    Algorithm from G. Marsaglia, Monkey tests for random number generators (1993). Every sample is counted at once with
+    a bincount and their statistics are summed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Offset the integers, group them into tuples until there are MIN_LETTERS letters and reduce them to at most
+        MAX_LETTERS letters.
+        """
+        symbols, alphabet_size = integer_symbols(data.data)
+        self.n_values = len(data.data)
+        if alphabet_size < 2:
+            self.data, self.n_letters = symbols.astype(np.int64), alphabet_size
+            return
+        # Pairs of letters of a small alphabet overlap too much for the occupancy law, letters are made of tuples
+        letter_size = 1
+        while alphabet_size ** letter_size < MIN_LETTERS:
+            letter_size += 1
+        powers = np.array([alphabet_size ** i for i in range(letter_size - 1, -1, -1)], dtype=np.uint64)
+        tuples = symbols[:len(symbols) // letter_size * letter_size].reshape(-1, letter_size) @ powers
+        letters, self.n_letters = reduce_alphabet(tuples, alphabet_size ** letter_size, MAX_LETTERS)
+        self.data = letters.astype(np.int64)
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("OPSO test")
+
+    @staticmethod
+    def missing_words_moments(n_words, n_pairs):
+        """
+        Mean and variance of the number of words never formed by n_pairs pairs.
+        The moments of independent pairs are used, they are the ones given by Marsaglia for overlapping pairs of 1024
+        letters.
+        :param n_words: number of possible words
+        :param n_pairs: number of pairs
+        :return: (mean, variance)
+        """
+        mean = n_words * (1 - 1 / n_words) ** n_pairs
+        variance = mean + n_words * (n_words - 1) * (1 - 2 / n_words) ** n_pairs - mean ** 2
+        return mean, variance
+
+    @staticmethod
+    def count_missing_words(letters, n_letters, n_pairs):
+        """
+        Count the words missing from consecutive samples of n_pairs overlapping pairs.
+        :param letters: int64 array of letters
+        :param n_letters: number of letters
+        :param n_pairs: number of pairs per sample
+        :return: number of missing words of each sample
+        """
+        n_words = n_letters * n_letters
+        n_samples = (len(letters) - 1) // n_pairs
+        if n_samples == 0:
+            return np.zeros(0, dtype=np.int64)
+        words = letters[:n_samples * n_pairs] * n_letters + letters[1:n_samples * n_pairs + 1]
+        # Each sample has its own range of cells so that all the samples are counted by a single bincount
+        cells = words + np.repeat(np.arange(n_samples, dtype=np.int64) * n_words, n_pairs)
+        occupancy = np.bincount(cells, minlength=n_samples * n_words).reshape(n_samples, n_words)
+        return np.count_nonzero(occupancy == 0, axis=1)
+
+    def run_test(self, data_generator):
+        """
+        Launch OPSO test on the data.
+        """
+        logging.info("Launching OPSO Test")
+        self.get_data_for_test(data_generator)
+        if self.n_letters < 2:
+            return
+        n_words = self.n_letters * self.n_letters
+        # Short samples are tested in a single sample with fewer pairs
+        n_pairs = max(1, min(PAIRS_PER_WORD * n_words, len(self.data) - 1))
+        missing = self.count_missing_words(self.data, self.n_letters, n_pairs)
+        if len(missing) == 0:
+            return
+        mean, variance = self.missing_words_moments(n_words, n_pairs)
+        z = float(np.sum(missing - mean)) / math.sqrt(len(missing) * variance)
+        self.test_output = float(erfc(abs(z) / math.sqrt(2)))
+        logging.info(f"OPSO test: {len(missing)} samples of {n_pairs} pairs, z = {z:.3f}")
+        logging.info("OPSO test terminated")
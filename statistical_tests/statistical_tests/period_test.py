@@ -0,0 +1,221 @@
+import logging
+import math
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from statistical_tests.statistical_tests.serial_test import index_values
+from utils.data_type import DataType
+import numpy as np
+
+# Odd multiplier of the polynomial hashes of the windows, computed modulo 2^64
+HASH_BASE = np.uint64(0x9E3779B97F4A7C15)
+
+
+def window_hashes(symbols, length):
+    """
+    Compute a polynomial hash of every window of consecutive symbols, hashes of windows of length a + b being combined
+    from the ones of lengths a and b so that only O(log(length)) passes are made over the sequence.
+    :param symbols: uint64 array of symbols
+    :param length: number of symbols per window
+    :return: uint64 array of the hashes of the len(symbols) - length + 1 windows
+    """
+    n_symbols = len(symbols)
+    result, result_length = None, 0
+    # Hashes of the windows of 1, 2, 4, ... symbols, with the multiplier shifting a hash by that many symbols
+    power, power_length, shift = symbols, 1, HASH_BASE
+    remaining = length
+    with np.errstate(over="ignore"):
+        while True:
+            if remaining & 1:
+                if result is None:
+                    result, result_length = power, power_length
+                else:
+                    n_windows = n_symbols - result_length - power_length + 1
+                    result = result[:n_windows] * shift + power[result_length:result_length + n_windows]
+                    result_length += power_length
+            remaining >>= 1
+            if remaining == 0:
+                return result
+            n_windows = n_symbols - 2 * power_length + 1
+            power = power[:n_windows] * shift + power[power_length:power_length + n_windows]
+            power_length *= 2
+            shift = shift * shift
+
+
+def common_length(symbols, first, second, backward=False):
+    """
+    Number of equal symbols when reading the sequence from two positions.
+    :param symbols: array of symbols
+    :param first: first position
+    :param second: second position, bigger than the first one
+    :param backward: read the symbols before the positions, going back, instead of the ones from the positions
+    :return: number of equal symbols
+    """
+    if backward:
+        symbols, first, second = symbols[::-1], len(symbols) - second, len(symbols) - first
+    n_compared = len(symbols) - second
+    start, block = 0, 64
+    while start < n_compared:
+        end = min(start + block, n_compared)
+        different = np.flatnonzero(symbols[first + start:first + end] != symbols[second + start:second + end])
+        if len(different):
+            return start + int(different[0])
+        start, block = end, block * 2
+    return n_compared
+
+
+def find_repeat(symbols, length):
+    """
+    Find two occurrences of a window of symbols.
+    :param symbols: uint64 array of symbols
+    :param length: number of symbols per window
+    :return: (first position, second position) of a repeated window, None if every window is unique
+    """
+    hashes = window_hashes(symbols, length)
+    # Only the hashes are sorted, the positions of a repeated hash are looked for afterwards
+    sorted_hashes = np.sort(hashes)
+    repeated = np.unique(sorted_hashes[1:][sorted_hashes[1:] == sorted_hashes[:-1]])
+    for value in repeated:
+        positions = np.flatnonzero(hashes == value)
+        # Hashes can collide, the windows are compared
+        for first_index, first in enumerate(positions[:-1]):
+            for second in positions[first_index + 1:]:
+                if common_length(symbols, int(first), int(second)) >= length:
+                    return int(first), int(second)
+    return None
+
+
+def longest_repeat(symbols, start_length=1):
+    """
+    Find the longest window of symbols occurring twice, searching its length by doubling and then by bisection.
+    :param symbols: uint64 array of symbols
+    :param start_length: first length tried
+    :return: (length, first position, second position), positions are None when no symbol is repeated
+    """
+    n_symbols = len(symbols)
+    lower, upper, best = 0, n_symbols, None
+    length = max(min(start_length, n_symbols - 1), 1)
+    growing, extended = True, False
+    while lower + 1 < upper:
+        repeat = find_repeat(symbols, length)
+        if repeat is None:
+            upper, growing = length, False
+            extended = False
+        else:
+            # The repeat found is extended on both sides, it may be much longer than the windows compared
+            before = common_length(symbols, repeat[0], repeat[1], backward=True)
+            after = common_length(symbols, repeat[0] + length, repeat[1] + length)
+            best = (repeat[0] - before, repeat[1] - before)
+            lower = before + length + after
+            extended = lower >= 2 * length
+
+        if extended:
+            # A repeat much longer than its windows, as in a periodic sequence, is likely the longest one
+            length = lower + 1
+        elif growing:
+            length = min(2 * lower, upper - 1)
+        else:
+            length = (lower + upper) // 2
+    if best is None:
+        return lower, None, None
+    return lower, best[0], best[1]
+
+
+@TestRegistry.register("period", [DataType.INT, DataType.BITSTRING])
+class PeriodTest(StatisticalTest):
+    """
+    Implementation of a period test looking for the longest sequence of values occurring twice in the sample.
+    The distance between its occurrences is the period of the generator when the sample ends by repeating itself.
+    Under the hypothesis of independent values the length of the longest repeat follows the Arratia-Waterman law,
+    the mid p-value of the observed length is reported as a distribution function, close to 1 when the longest repeat
+    is too long so that a periodic sample is reported KO. The period, the position where the sample starts repeating
+    itself and the length of the repeat are added to the report.
+    The repeat is searched with rolling hashes of the windows of the sample, in O(n log(n)^2).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+        self.repeat_length = 0
+        self.position = None
+        self.period = None
+
+    @staticmethod
+    def complexity(n_bits):
+        """
+        Sort of the windows of the sample for each length tried, n log(n)^2.
+        """
+        return n_bits * max(np.log2(max(n_bits, 1)), 1) ** 2
+
+    def get_data_for_test(self, data):
+        """
+        Replace integers by their rank so that the sample is a sequence of symbols, and count the symbols.
+        """
+        if data.data_type == DataType.BITSTRING:
+            self.data = data.bits().astype(np.uint64)
+            self.symbol_counts = np.bincount(data.bits(), minlength=2)
+        else:
+            symbols, n_symbols = index_values(data.data)
+            self.data = symbols.astype(np.uint64)
+            self.symbol_counts = np.bincount(symbols, minlength=n_symbols)
+        self.n_values = len(self.data)
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        report = self.generate_test_report("Period test")
+        report.update({"period": self.period, "position": self.position, "repeat_length": self.repeat_length})
+        return report
+
+    @staticmethod
+    def longest_repeat_p_value(repeat_length, n_values, collision_probability):
+        """
+        Mid distribution function of the length of the longest repeat of a sequence of independent values, the
+        probability that the longest repeat is shorter plus half the probability that it is as long.
+        The number of pairs of positions starting a repeat of length l is Poisson distributed with mean
+        n^2 / 2 * (1 - q) * q^l where q is the probability that two values are equal.
+        :param repeat_length: length of the longest repeat
+        :param n_values: number of values
+        :param collision_probability: probability that two values are equal
+        :return: p-value, close to 1 when the longest repeat is too long
+        """
+        if collision_probability >= 1:
+            return 1.0
+
+        def tail(length):
+            # Probability that the longest repeat is at least this long
+            n_pairs = (n_values - length + 1) * (n_values - length) / 2
+            if n_pairs <= 0:
+                return 0.0
+            log_mean = math.log(n_pairs) + math.log1p(-collision_probability) + length * math.log(collision_probability)
+            return -math.expm1(-math.exp(log_mean))
+
+        return 1 - (tail(repeat_length) + tail(repeat_length + 1)) / 2
+
+    def run_test(self, data_generator):
+        """
+        Launch period test on the data.
+        """
+        logging.info("Launching period Test")
+        self.get_data_for_test(data_generator)
+        self.repeat_length, self.position, self.period = 0, None, None
+        if self.n_values < 2:
+            return
+        frequencies = self.symbol_counts / self.n_values
+        collision_probability = float(np.sum(frequencies ** 2))
+        # Windows shorter than log(n) / log(1 / q) symbols are almost surely repeated
+        start_length = int(np.log(self.n_values) / -np.log(collision_probability)) if collision_probability < 1 else 1
+        self.repeat_length, self.position, second = longest_repeat(self.data, start_length)
+        if self.position is not None:
+            self.period = second - self.position
+            if second + self.repeat_length == self.n_values and self.repeat_length >= self.period:
+                logging.warning(f"Period test: the sample repeats itself with period {self.period} from position "
+                                f"{self.position}.")
+        self.test_output = self.longest_repeat_p_value(self.repeat_length, self.n_values, collision_probability)
+        logging.info(f"Period test: longest repeat of {self.repeat_length} values at positions {self.position} and "
+                     f"{second}")
+        logging.info("Period test terminated")
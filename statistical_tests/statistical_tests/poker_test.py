@@ -0,0 +1,89 @@
+import logging
+import math
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.data_type import DataType
+from utils.integer_domain import integer_symbols, merged_chisquare, reduce_alphabet
+import numpy as np
+
+# Number of integers per hand
+HAND_SIZE = 5
+
+# Largest number of card values, integers spanning a bigger range are reduced so that hands still hold pairs
+MAX_CARDS = 16
+
+
+def stirling_second_kind(n, k):
+    """
+    Number of ways to partition n elements into k non empty subsets.
+    """
+    return sum((-1) ** i * math.comb(k, i) * (k - i) ** n for i in range(k + 1)) // math.factorial(k)
+
+
+@TestRegistry.register("poker", [DataType.INT])
+class PokerTest(StatisticalTest):
+    """
+    Implementation of the poker test counting the distinct integers of hands of 5 consecutive integers.
+    Algorithm from D. Knuth, The Art of Computer Programming vol. 2, 3.3.2 D. Hands are sorted at once and the classes
+    too unlikely for the range of the integers are merged.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Offset the integers and reduce them to at most MAX_CARDS card values.
+        """
+        symbols, alphabet_size = integer_symbols(data.data)
+        self.data, self.alphabet_size = reduce_alphabet(symbols, alphabet_size, MAX_CARDS)
+        self.n_values = len(data.data)
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Poker test")
+
+    @staticmethod
+    def distinct_probabilities(alphabet_size, hand_size=HAND_SIZE):
+        """
+        Probabilities that a hand holds 1, 2, ..., hand_size distinct integers.
+        :param alphabet_size: number of possible integers
+        :param hand_size: number of integers per hand
+        :return: list of probabilities
+        """
+        probabilities = []
+        for n_distinct in range(1, hand_size + 1):
+            arrangements = math.perm(alphabet_size, n_distinct) * stirling_second_kind(hand_size, n_distinct)
+            probabilities.append(arrangements / alphabet_size ** hand_size)
+        return probabilities
+
+    @staticmethod
+    def count_distinct(symbols, hand_size=HAND_SIZE):
+        """
+        Count the hands per number of distinct integers.
+        :param symbols: array of symbols, split into consecutive hands
+        :param hand_size: number of integers per hand
+        :return: number of hands holding 1, 2, ..., hand_size distinct integers
+        """
+        hands = np.sort(symbols[:len(symbols) // hand_size * hand_size].reshape(-1, hand_size), axis=1)
+        n_distinct = 1 + np.count_nonzero(hands[:, 1:] != hands[:, :-1], axis=1)
+        return np.bincount(n_distinct, minlength=hand_size + 1)[1:]
+
+    def run_test(self, data_generator):
+        """
+        Launch poker test on the data.
+        """
+        logging.info("Launching poker Test")
+        self.get_data_for_test(data_generator)
+        if self.alphabet_size < 2:
+            return
+        observed = self.count_distinct(self.data)
+        self.test_output = merged_chisquare(observed, self.distinct_probabilities(self.alphabet_size))
+        logging.info("Poker test terminated")
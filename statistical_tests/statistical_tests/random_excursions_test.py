@@ -0,0 +1,215 @@
+import logging
+import math
+
+from scipy.special import erfc, gammaincc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry, sidak_p_value
+from utils.data_type import DataType
+from utils.random_walk import MAX_CYCLE_STATE, MAX_CYCLE_VISITS, MAX_VISITED_STATE, RandomWalkStatistics
+import numpy as np
+
+# Smallest number of cycles for which the tests are applicable
+MIN_CYCLES = 500
+
+
+def enough_cycles(statistics):
+    """
+    Check that the walk has enough cycles for the normal approximations of the tests, max(0.005 sqrt(n), 500).
+    :param statistics: RandomWalkStatistics of the sequence
+    :return: bool
+    """
+    if statistics.n_cycles < max(0.005 * math.sqrt(statistics.n_bits), MIN_CYCLES):
+        logging.info(f"Random excursions tests: {statistics.n_cycles} cycles are too few, the tests are not applied.")
+        return False
+    return True
+
+
+@TestRegistry.register("random_excursions", [DataType.INT, DataType.BITSTRING])
+class RandomExcursionsTest(StatisticalTest):
+    """
+    Implementation of the random excursions test checking the number of visits of the states -4..4 in each cycle of
+    the random walk of +1 and -1.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.14, the smallest
+    of the p-values of the 8 states is reported with a Sidak correction.
+    """
+
+    supports_streaming = True
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Retrieve the visits counted in the pass over the walk shared with the variant test.
+        """
+        self.data = data.random_walk_statistics()
+        self.n_values = self.data.n_bits
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Random excursions test")
+
+    @staticmethod
+    def visit_probabilities(state):
+        """
+        Probabilities that a cycle visits a state exactly 0, 1, ..., 4 and at least 5 times.
+        :param state: non zero state
+        :return: array of probabilities
+        """
+        leave = 1 / (2 * abs(state))
+        probabilities = [1 - leave]
+        probabilities += [leave ** 2 * (1 - leave) ** (k - 1) for k in range(1, MAX_CYCLE_VISITS)]
+        probabilities.append(leave * (1 - leave) ** (MAX_CYCLE_VISITS - 1))
+        return np.array(probabilities)
+
+    @staticmethod
+    def state_p_value(cycle_visits, n_cycles, state):
+        """
+        Compare the number of cycles per number of visits of a state to the theory.
+        :param cycle_visits: number of cycles visiting the state exactly 0, 1, ..., 4 and at least 5 times
+        :param n_cycles: number of cycles
+        :param state: non zero state
+        :return: p-value
+        """
+        expected = n_cycles * RandomExcursionsTest.visit_probabilities(state)
+        chi_squared = float(np.sum((np.asarray(cycle_visits) - expected) ** 2 / expected))
+        return gammaincc(MAX_CYCLE_VISITS / 2, chi_squared / 2)
+
+    @staticmethod
+    def state_p_values(statistics):
+        """
+        :param statistics: RandomWalkStatistics of the sequence
+        :return: p-value of each state -4..-1, 1..4
+        """
+        cycle_visits = statistics.cycle_visits
+        return [RandomExcursionsTest.state_p_value(cycle_visits[state + MAX_CYCLE_STATE], statistics.n_cycles, state)
+                for state in range(-MAX_CYCLE_STATE, MAX_CYCLE_STATE + 1) if state != 0]
+
+    def _random_excursions_p_value(self):
+        if not enough_cycles(self.data):
+            return None
+        return sidak_p_value(self.state_p_values(self.data))
+
+    def run_test(self, data_generator):
+        """
+        Launch random excursions test on the data.
+        """
+        logging.info("Launching random excursions Test")
+        self.get_data_for_test(data_generator)
+        self.test_output = self._random_excursions_p_value()
+        logging.info("Random excursions test terminated")
+
+    def begin(self, sample_info):
+        """
+        Reset the walk.
+        """
+        self.data = RandomWalkStatistics()
+        self.n_values = sample_info.n_bits
+
+    def update(self, chunk):
+        """
+        Extend the walk with the chunk.
+        """
+        self.data.update(chunk.bits())
+
+    def finalize(self):
+        """
+        Compare the visits counted per cycle to the theory.
+        """
+        self.test_output = self._random_excursions_p_value()
+        logging.info("Random excursions test terminated")
+
+
+@TestRegistry.register("random_excursions_variant", [DataType.INT, DataType.BITSTRING])
+class RandomExcursionsVariantTest(StatisticalTest):
+    """
+    Implementation of the random excursions variant test checking the total number of visits of the states -9..9 of
+    the random walk of +1 and -1.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.15, the smallest
+    of the p-values of the 18 states is reported with a Sidak correction.
+    """
+
+    supports_streaming = True
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Retrieve the visits counted in the pass over the walk shared with the random excursions test.
+        """
+        self.data = data.random_walk_statistics()
+        self.n_values = self.data.n_bits
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Random excursions variant test")
+
+    @staticmethod
+    def state_p_value(visits, n_cycles, state):
+        """
+        Compare the total number of visits of a state to the number of cycles.
+        :param visits: number of visits of the state
+        :param n_cycles: number of cycles
+        :param state: non zero state
+        :return: p-value
+        """
+        return erfc(abs(visits - n_cycles) / math.sqrt(2 * n_cycles * (4 * abs(state) - 2)))
+
+    @staticmethod
+    def state_p_values(statistics):
+        """
+        :param statistics: RandomWalkStatistics of the sequence
+        :return: p-value of each state -9..-1, 1..9
+        """
+        return [RandomExcursionsVariantTest.state_p_value(statistics.state_visits[state + MAX_VISITED_STATE],
+                                                          statistics.n_cycles, state)
+                for state in range(-MAX_VISITED_STATE, MAX_VISITED_STATE + 1) if state != 0]
+
+    def _variant_p_value(self):
+        if not enough_cycles(self.data):
+            return None
+        return sidak_p_value(self.state_p_values(self.data))
+
+    def run_test(self, data_generator):
+        """
+        Launch random excursions variant test on the data.
+        """
+        logging.info("Launching random excursions variant Test")
+        self.get_data_for_test(data_generator)
+        self.test_output = self._variant_p_value()
+        logging.info("Random excursions variant test terminated")
+
+    def begin(self, sample_info):
+        """
+        Reset the walk.
+        """
+        self.data = RandomWalkStatistics()
+        self.n_values = sample_info.n_bits
+
+    def update(self, chunk):
+        """
+        Extend the walk with the chunk.
+        """
+        self.data.update(chunk.bits())
+
+    def finalize(self):
+        """
+        Compare the visits counted to the number of cycles.
+        """
+        self.test_output = self._variant_p_value()
+        logging.info("Random excursions variant test terminated")
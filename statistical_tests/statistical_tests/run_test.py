@@ -1,15 +1,45 @@
 import logging
 
+import numpy as np
+from scipy.stats import norm
+
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_statistics import BitStatistics
 from utils.data_type import DataType
 from statsmodels.sandbox.stats.runs import runstest_1samp
 
 
+def runs_test_p_value(n_runs, n_positive, n_negative):
+    """
+    Compute the p-value of the runs test from the number of runs and of values above and below the cutoff.
+    Same computation as statsmodels Runs.runs_test with correction, arrays are computed element-wise.
+    :param n_runs: number of runs
+    :param n_positive: number of values above the cutoff
+    :param n_negative: number of values below the cutoff
+    :return: p-value
+    """
+    n_runs = np.asarray(n_runs, dtype=np.float64)
+    n_values = np.asarray(n_positive, dtype=np.float64) + n_negative
+    npn = np.asarray(n_positive, dtype=np.float64) * n_negative
+    with np.errstate(divide="ignore", invalid="ignore"):
+        runs_mean = 2.0 * npn / n_values + 1
+        runs_var = 2.0 * npn * (2.0 * npn - n_values) / n_values ** 2.0 / (n_values - 1.0)
+        z = n_runs - runs_mean
+        corrected = np.where(z > 0.5, z - 0.5, np.where(z < 0.5, z + 0.5, 0.0))
+        z = np.where(n_values < 50, corrected, z) / np.sqrt(runs_var)
+        p_value = np.where(n_runs == 1, 2 / (2.0 ** (np.minimum(n_values, 1024) - 1)), 2 * norm.sf(np.abs(z)))
+    return p_value[()]
+
+
 @TestRegistry.register("run", [DataType.INT, DataType.BITSTRING])
 class RunTest(StatisticalTest):
     """
     Implementation of the run test checking the repartition of increasing and decreasing sequences.
     """
+
+    supports_streaming = True
+    supports_batch = True
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -24,10 +54,12 @@ class RunTest(StatisticalTest):
         """
 
         if data.data_type == DataType.BITSTRING:
-            self.data = list(map(int, data.data))
+            # Runs are counted in the pass shared with the other frequency tests
+            self.data = data.bit_statistics()
+            self.n_values = self.data.n_bits
         else:
             self.data = data.data
-        self.n_values = len(self.data)
+            self.n_values = len(self.data)
 
     def generate_report(self):
         """
@@ -41,5 +73,59 @@ class RunTest(StatisticalTest):
         """
         logging.info("Launching run Test")
         self.get_data_for_test(data_generator)
-        self.test_output = runstest_1samp(self.data)[1]
+        if isinstance(self.data, BitStatistics):
+            n_ones = self.data.n_ones
+            if n_ones == 0 or n_ones == self.data.n_bits:
+                # All the bits are above the mean
+                self.test_output = runs_test_p_value(1, self.data.n_bits, 0)
+            else:
+                self.test_output = runs_test_p_value(self.data.n_runs, n_ones, self.data.n_bits - n_ones)
+        else:
+            self.test_output = runstest_1samp(self.data)[1]
+        logging.info("Run test terminated")
+
+    @classmethod
+    def run_batch(cls, samples, data_type):
+        """
+        Run the run test on each sample, values are compared to the mean of their sample. Bits are compared the same
+        way, ones being above the mean unless all the bits are equal.
+        """
+        samples = np.asarray(samples)
+        above = samples >= samples.mean(axis=1)[:, None]
+        n_runs = 1 + np.count_nonzero(above[:, 1:] != above[:, :-1], axis=1)
+        n_positive = np.count_nonzero(above, axis=1)
+        return runs_test_p_value(n_runs, n_positive, samples.shape[1] - n_positive)
+
+    def begin(self, sample_info):
+        """
+        Reset the runs counted, integers are compared to the mean of the whole sample.
+        """
+        self.cutoff = sample_info.mean
+        self.n_values = 0
+        self.n_positive = 0
+        self.n_runs = 0
+        self.last_value = None
+
+    def update(self, chunk):
+        """
+        Count the runs of values above and below the cutoff in the chunk.
+        """
+        if chunk.data_type == DataType.BITSTRING:
+            above = chunk.bits().astype(bool)
+        else:
+            above = chunk.data >= self.cutoff
+        if len(above) == 0:
+            return
+        self.n_values += len(above)
+        self.n_positive += int(np.count_nonzero(above))
+        self.n_runs += int(np.count_nonzero(above[1:] != above[:-1]))
+        if self.last_value is None or self.last_value != above[0]:
+            self.n_runs += 1
+        self.last_value = above[-1]
+
+    def finalize(self):
+        """
+        Run the run test on the runs counted.
+        """
+        self.test_output = runs_test_p_value(self.n_runs, self.n_positive, self.n_values - self.n_positive)
         logging.info("Run test terminated")
@@ -2,16 +2,186 @@ import logging
 
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
 from utils.data_type import DataType
+from utils.integer_domain import MIN_EXPECTED
+from utils.row_counts import row_chisquare, row_ranks
 import numpy as np
-from scipy.stats import chisquare
+from scipy.special import gammaincc
+from scipy.stats import chi2, chisquare
+
+# Values spanning less than this range are indexed with a lookup table instead of a sort
+DENSE_RANGE = 1 << 24
+
+# Largest number of tuples counted in a dense array, bigger alphabets only store the tuples present
+MAX_DENSE_CELLS = 1 << 24
+
+# Pairs of streamed values are coded on 64 bits, wider integers are always folded into at most MAX_BUCKETS buckets
+MAX_STREAMED_CODES = 1 << 32
+MAX_BUCKETS = 1 << 16
+
+
+def index_values(values):
+    """
+    Replace each value by its rank among the distinct values of the sample.
+    :param values: array of integers
+    :return: (int64 array of ranks, number of distinct values)
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    low, high = int(values.min()), int(values.max())
+    if high - low < DENSE_RANGE:
+        offsets = (values - values.dtype.type(low)).astype(np.int64)
+        present = np.bincount(offsets) > 0
+        ranks = np.cumsum(present) - 1
+        return ranks[offsets], int(np.count_nonzero(present))
+    unique, inverse = np.unique(values, return_inverse=True)
+    return inverse.ravel().astype(np.int64), len(unique)
+
+
+def fold_values(values, n_buckets, low=None, high=None):
+    """
+    Fold integers into buckets of equal width over [low, high].
+    :param values: array of integers
+    :param n_buckets: number of buckets
+    :param low: smallest possible value, the smallest value of the array by default
+    :param high: biggest possible value, the biggest value of the array by default
+    :return: int64 array of buckets in [0, n_buckets)
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    low = int(values.min()) if low is None else low
+    high = int(values.max()) if high is None else high
+    width = (high - low + 1) / n_buckets
+    buckets = ((values - values.dtype.type(low)).astype(np.float64) / width).astype(np.int64)
+    return np.minimum(buckets, n_buckets - 1)
+
+
+def default_buckets(n_values, tuple_size=2):
+    """
+    Largest number of buckets integers can be folded into for each tuple of buckets to be expected MIN_EXPECTED times.
+    :param n_values: number of values of the sample
+    :param tuple_size: number of values per tuple
+    :return: number of buckets, 1 when the sample is too short for the test
+    """
+    n_tuples = max(n_values - tuple_size + 1, 0)
+    n_buckets = max(int((n_tuples / MIN_EXPECTED) ** (1 / tuple_size)), 1)
+    # The root is rounded down, the float power may be just below an exact root
+    while (n_buckets + 1) ** tuple_size * MIN_EXPECTED <= n_tuples:
+        n_buckets += 1
+    return n_buckets
+
+
+def bucket_probabilities(n_buckets, low, high):
+    """
+    Probability of each bucket of fold_values for integers uniform over [low, high], buckets hold either the floor or
+    the ceiling of (high - low + 1) / n_buckets integers.
+    :param n_buckets: number of buckets
+    :param low: smallest possible value, or array of the smallest value of each sample
+    :param high: biggest possible value, or array of the biggest value of each sample
+    :return: float64 array of the n_buckets probabilities, one row per sample for arrays of bounds
+    """
+    n_integers = (np.asarray(high) - np.asarray(low) + 1).astype(np.float64)[..., None]
+    width = n_integers / n_buckets
+    buckets = np.arange(n_buckets)
+    # First offset of each bucket, the rounding of the product is corrected with the division done by fold_values
+    starts = np.ceil(buckets * width)
+    starts += (starts / width).astype(np.int64) < buckets
+    starts -= (starts > 0) & (((starts - 1) / width).astype(np.int64) >= buckets)
+    ends = np.append(starts[..., 1:], n_integers, axis=-1)
+    return (np.minimum(ends, n_integers) - np.minimum(starts, n_integers)) / n_integers
+
+
+def tuple_probabilities(probabilities, tuple_size):
+    """
+    Probability of each tuple of independent symbols, in the order of tuple_codes.
+    :param probabilities: probability of each symbol, one row per sample for 2-D arrays
+    :param tuple_size: number of symbols per tuple
+    :return: float64 array of the probabilities of the tuples
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    tuples = probabilities
+    for _ in range(tuple_size - 1):
+        tuples = (tuples[..., :, None] * probabilities[..., None, :]).reshape(*probabilities.shape[:-1], -1)
+    return tuples
+
+
+def expected_chisquare(counts, probabilities):
+    """
+    Chi-square goodness of fit test of counts to probabilities, cells of probability 0 are left out.
+    :param counts: occurrences of each cell, one row per sample for 2-D arrays
+    :param probabilities: probability of each cell, with the shape of counts
+    :return: p-value, nan when less than two cells can be observed
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    expected = np.sum(counts, axis=-1, keepdims=True) * probabilities
+    possible = expected > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        statistic = np.sum(np.where(possible, (counts - expected) ** 2 / expected, 0), axis=-1)
+        n_cells = np.count_nonzero(possible, axis=-1)
+        return np.where(n_cells >= 2, chi2.sf(statistic, n_cells - 1), np.nan)
+
+
+def count_tuples(symbols, n_symbols, tuple_size):
+    """
+    Count the overlapping tuples of consecutive symbols that are present, memory only depends on the sample size.
+    :param symbols: int array of symbols in [0, n_symbols)
+    :param n_symbols: number of distinct symbols
+    :param tuple_size: number of symbols per tuple
+    :return: occurrences of the tuples present
+    """
+    if n_symbols ** tuple_size < np.iinfo(np.int64).max:
+        return np.unique(tuple_codes(symbols, n_symbols, tuple_size), return_counts=True)[1]
+    # Codes would not fit on 64 bits, tuples are compared as rows
+    n_tuples = max(len(symbols) - tuple_size + 1, 0)
+    rows = np.stack([symbols[i:i + n_tuples] for i in range(tuple_size)], axis=1)
+    return np.unique(rows, axis=0, return_counts=True)[1]
+
+
+def sparse_chisquare(counts, n_cells):
+    """
+    Chi-square test of uniformity where only the non empty cells are given.
+    :param counts: occurrences of the non empty cells
+    :param n_cells: total number of cells
+    :return: p-value
+    """
+    total = float(np.sum(counts))
+    if n_cells < 2 or total == 0:
+        return None
+    expected = total / n_cells
+    counts = np.asarray(counts, dtype=np.float64)
+    statistic = float(np.sum((counts - expected) ** 2) / expected) + (n_cells - len(counts)) * expected
+    return float(chi2.sf(statistic, n_cells - 1))
+
+
+def tuple_codes(symbols, n_symbols, tuple_size):
+    """
+    Compute an integer code for each overlapping tuple of consecutive symbols.
+    :param symbols: int array of symbols in [0, n_symbols)
+    :param n_symbols: number of distinct symbols
+    :param tuple_size: number of symbols per tuple
+    :return: int64 array of the codes of the len(symbols) - tuple_size + 1 tuples
+    """
+    n_tuples = max(len(symbols) - tuple_size + 1, 0)
+    codes = np.zeros(n_tuples, dtype=np.int64)
+    for i in range(tuple_size):
+        codes *= n_symbols
+        codes += symbols[i:i + n_tuples]
+    return codes
 
 
 @TestRegistry.register("serial", [DataType.INT, DataType.BITSTRING])
 class SerialTest(StatisticalTest):
     """
-    Implementation of serial test checking the distribution of pairs of numbers..
+    Implementation of serial test checking the distribution of pairs (or longer tuples) of consecutive numbers.
+    Alphabets too large for each tuple to be expected MIN_EXPECTED times are folded into buckets of equal width, as
+    many as the sample size allows. The tuples of very large samples are counted sparsely, only the tuples present
+    being stored.
     """
 
+    supports_streaming = True
+    supports_batch = True
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -19,19 +189,38 @@ class SerialTest(StatisticalTest):
         self.p_value_limit_strict = 0.01
         self.test_output = None
         self.report = None
+        self.n_cells = 0
+        self.n_buckets = None
+        self.probabilities = None
 
-    def get_data_for_test(self, data):
+    def get_data_for_test(self, data, tuple_size=2, n_buckets=None):
         """
-        Format the test data.
+        Count the overlapping tuples of consecutive values, values are replaced by their rank (or their bucket) so that
+        a tuple is identified by an integer code.
         """
-        values = data.data if data.data_type != DataType.BITSTRING else list(map(int, data.data))
-        n_unique_values = len(np.unique(values))
-        bins = np.zeros((n_unique_values, n_unique_values))
-        for idx in range(len(values) - 1):
-            bins[values[idx]-1][values[idx+1]-1] += 1
+        self.n_buckets, self.probabilities = n_buckets, None
+        if data.data_type == DataType.BITSTRING:
+            # Tuples of bits are the overlapping windows of the sample, read from its shared index
+            self.n_values = data.n_bits
+            self.n_cells = 2 ** tuple_size
+            self.data = np.bincount(data.window_codes(tuple_size), minlength=self.n_cells)
+            return
+
+        values = data.data
         self.n_values = len(values)
+        symbols, n_symbols = index_values(values)
+        if self.n_buckets is None and n_symbols ** tuple_size * MIN_EXPECTED > max(len(values) - tuple_size + 1, 0):
+            self.n_buckets = default_buckets(len(values), tuple_size)
+        if self.n_buckets is not None and len(values):
+            symbols, n_symbols = fold_values(values, self.n_buckets), self.n_buckets
+            buckets = bucket_probabilities(self.n_buckets, int(values.min()), int(values.max()))
+            self.probabilities = tuple_probabilities(buckets, tuple_size)
+        self.n_cells = n_symbols ** tuple_size
 
-        self.data = bins.flatten()
+        if self.n_cells <= MAX_DENSE_CELLS or self.probabilities is not None:
+            self.data = np.bincount(tuple_codes(symbols, n_symbols, tuple_size), minlength=self.n_cells)
+        else:
+            self.data = count_tuples(symbols, n_symbols, tuple_size)
 
     def generate_report(self):
         """
@@ -39,11 +228,240 @@ class SerialTest(StatisticalTest):
         """
         return self.generate_test_report("Serial test")
 
-    def run_test(self, data_generator):
+    def run_test(self, data_generator, tuple_size=2, n_buckets=None):
         """
         Launch serial test on the data.
+        :param tuple_size: number of consecutive values in a tuple, 2 for pairs
+        :param n_buckets: number of buckets integers are folded into, by default distinct values are kept when each
+        tuple is expected MIN_EXPECTED times and folded into as many buckets as the sample size allows otherwise
         """
         logging.info("Launching serial Test")
-        self.get_data_for_test(data_generator)
-        self.test_output = chisquare(self.data).pvalue
+        self.get_data_for_test(data_generator, tuple_size, n_buckets)
+        self.test_output = self._serial_p_value()
+        logging.info("Serial test terminated")
+
+    def _serial_p_value(self):
+        if self.probabilities is not None:
+            p_value = float(expected_chisquare(self.data, self.probabilities))
+            return None if np.isnan(p_value) else p_value
+        if len(self.data) == self.n_cells:
+            return chisquare(self.data).pvalue if self.n_cells >= 2 else None
+        return sparse_chisquare(self.data, self.n_cells)
+
+    @classmethod
+    def run_batch(cls, samples, data_type):
+        """
+        Run the serial test on the pairs of each sample, the pairs of all the samples being counted by a single sort.
+        Samples with too many distinct values are folded into buckets like in run_test.
+        """
+        if data_type == DataType.BITSTRING:
+            samples = np.asarray(samples, dtype=np.int64)
+            return row_chisquare(samples[:, :-1] * 2 + samples[:, 1:], 4)
+        ranks, n_symbols = row_ranks(samples)
+        codes = ranks[:, :-1] * n_symbols[:, None] + ranks[:, 1:]
+        p_values = row_chisquare(codes, n_symbols * n_symbols)
+
+        n_pairs = samples.shape[1] - 1
+        folded = n_symbols ** 2 * MIN_EXPECTED > n_pairs
+        if np.any(folded):
+            n_buckets = default_buckets(samples.shape[1])
+            rows = np.asarray(samples)[folded]
+            low, high = rows.min(axis=1), rows.max(axis=1)
+            width = (high - low + 1).astype(np.float64)[:, None] / n_buckets
+            buckets = np.minimum(((rows - low[:, None]).astype(np.float64) / width).astype(np.int64), n_buckets - 1)
+            pair_codes = buckets[:, :-1] * n_buckets + buckets[:, 1:] + np.arange(len(rows))[:, None] * n_buckets ** 2
+            counts = np.bincount(pair_codes.ravel(), minlength=len(rows) * n_buckets ** 2).reshape(len(rows), -1)
+            probabilities = tuple_probabilities(bucket_probabilities(n_buckets, low, high), 2)
+            p_values[folded] = expected_chisquare(counts, probabilities)
+        return p_values
+
+    def begin(self, sample_info, n_buckets=None):
+        """
+        Reset the pairs counted, pairs are identified by a code computed from the range of the whole sample.
+        """
+        self.min_value = sample_info.min_value or 0
+        self.n_codes = sample_info.max_value - self.min_value + 1 if sample_info.data_type == DataType.INT else 2
+        if n_buckets is None and self.n_codes > MAX_STREAMED_CODES:
+            n_buckets = min(default_buckets(sample_info.n_values), MAX_BUCKETS)
+            logging.warning(f"Serial test: values span {self.n_codes} integers, they are folded into "
+                            f"{n_buckets} buckets.")
+        self.n_buckets = n_buckets if sample_info.data_type == DataType.INT else None
+        self.data_type = sample_info.data_type
+        self.probabilities = None
+        if self.n_buckets is not None:
+            self.n_codes = self.n_buckets
+        self.max_value = sample_info.max_value
+        self.pairs = np.zeros(0, dtype=np.uint64)
+        self.data = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0, dtype=np.int64)
+        self.value_counts = np.zeros(0, dtype=np.int64)
+        self.last_value = None
+        self.n_values = 0
+
+    def update(self, chunk):
+        """
+        Count the pairs of consecutive values of the chunk, including the one overlapping the previous chunk.
+        """
+        values = chunk.data if chunk.data_type == DataType.INT else chunk.bits()
+        if len(values) == 0:
+            return
+        self.n_values += len(values)
+
+        if self.n_buckets is not None:
+            codes = fold_values(values, self.n_buckets, self.min_value, self.max_value).astype(np.uint64)
+        else:
+            codes = np.asarray(values).astype(np.uint64) - np.uint64(self.min_value)
+        self.values, self.value_counts = self.count_values(self.values, self.value_counts, codes)
+        if self.last_value is not None:
+            codes = np.concatenate([[self.last_value], codes])
+        self.last_value = codes[-1]
+        pairs = codes[:-1] * np.uint64(self.n_codes) + codes[1:]
+        self.pairs, self.data = self.count_values(self.pairs, self.data, pairs)
+
+    def finalize(self):
+        """
+        Run the serial test on the pairs counted, pairs never seen are counted as empty bins. When there are too many
+        distinct values for each pair to be expected MIN_EXPECTED times, the pairs are folded into buckets like in
+        run_test.
+        """
+        n_pairs = max(self.n_values - 1, 0)
+        if self.data_type == DataType.INT and self.n_buckets is None and len(self.values) ** 2 * MIN_EXPECTED > n_pairs:
+            self.n_buckets = default_buckets(self.n_values)
+            n_codes = np.uint64(self.n_codes)
+            first = fold_values(self.pairs // n_codes, self.n_buckets, 0, self.n_codes - 1)
+            second = fold_values(self.pairs % n_codes, self.n_buckets, 0, self.n_codes - 1)
+            self.pairs = (first * self.n_buckets + second).astype(np.uint64)
+        if self.n_buckets is not None:
+            self.n_cells = self.n_buckets * self.n_buckets
+            self.data = np.bincount(self.pairs.astype(np.int64), weights=self.data, minlength=self.n_cells)
+            buckets = bucket_probabilities(self.n_buckets, self.min_value, self.max_value)
+            self.probabilities = tuple_probabilities(buckets, 2)
+        else:
+            self.n_cells = len(self.values) ** 2
+        self.test_output = self._serial_p_value()
         logging.info("Serial test terminated")
+
+
+@TestRegistry.register("overlapping_serial", [DataType.INT, DataType.BITSTRING])
+class OverlappingSerialTest(StatisticalTest):
+    """
+    Implementation of the NIST serial test checking the frequency of all the overlapping m bits patterns.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.11, the p-value
+    is the one of the first difference of the psi-squared statistics.
+    """
+
+    supports_streaming = True
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data):
+        """
+        Keep the sample, its patterns are read from the shared index of its overlapping windows.
+        """
+        self.data = data
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Overlapping serial test")
+
+    @staticmethod
+    def default_pattern_size(n_values):
+        """
+        Biggest pattern size recommended by NIST for a sample size (m < log2(n) - 2), at most 16.
+        """
+        return int(max(2, min(16, np.floor(np.log2(max(n_values, 1))) - 3)))
+
+    @staticmethod
+    def psi_squared(counts, n_values):
+        """
+        Psi-squared statistic of the counts of all the patterns of a size.
+        :param counts: occurrences of each pattern
+        :param n_values: number of bits
+        :return: psi-squared
+        """
+        return len(counts) / n_values * float(np.sum(counts.astype(np.float64) ** 2)) - n_values
+
+    @staticmethod
+    def serial_p_value(counts, n_values):
+        """
+        Compute the p-value of the first difference of psi-squared from the counts of the overlapping patterns.
+        :param counts: occurrences of each m bits pattern, the sequence being read circularly
+        :param n_values: number of bits
+        :return: p-value
+        """
+        pattern_size = int(np.log2(len(counts)))
+        # Patterns of m - 1 bits are counted by merging the patterns of m bits ending with 0 and with 1
+        shorter_counts = counts.reshape(-1, 2).sum(axis=1)
+        psi_m = OverlappingSerialTest.psi_squared(counts, n_values)
+        psi_m_1 = OverlappingSerialTest.psi_squared(shorter_counts, n_values) if pattern_size > 1 else 0.0
+        return gammaincc(2 ** (pattern_size - 2), (psi_m - psi_m_1) / 2)
+
+    def _init_counts(self, pattern_size):
+        self.pattern_size = pattern_size
+        self.counts = np.zeros(2 ** pattern_size, dtype=np.int64)
+        self.head = np.zeros(0, dtype=np.uint8)
+        self.tail = np.zeros(0, dtype=np.uint8)
+        self.n_values = 0
+
+    def _add_bits(self, bits):
+        """
+        Count the patterns ending in the bits, the last m - 1 bits are kept for the patterns overlapping the next ones.
+        """
+        self.n_values += len(bits)
+        if len(self.head) < self.pattern_size - 1:
+            self.head = np.concatenate([self.head, bits[:self.pattern_size - 1 - len(self.head)]])
+        bits = np.concatenate([self.tail, bits])
+        self.counts += np.bincount(tuple_codes(bits, 2, self.pattern_size), minlength=len(self.counts))
+        self.tail = bits[max(len(bits) - self.pattern_size + 1, 0):]
+
+    def _serial_p_value(self):
+        if self.n_values < self.pattern_size:
+            return None
+        # The sequence is read circularly, its first m - 1 bits complete the patterns starting at the end
+        wrapped = np.concatenate([self.tail, self.head])
+        self.counts += np.bincount(tuple_codes(wrapped, 2, self.pattern_size), minlength=len(self.counts))
+        return self.serial_p_value(self.counts, self.n_values)
+
+    def run_test(self, data_generator, pattern_size=None):
+        """
+        Launch the overlapping serial test on the data.
+        :param pattern_size: number of bits of the patterns, chosen from the sample size by default
+        """
+        logging.info("Launching overlapping serial Test")
+        self.get_data_for_test(data_generator)
+        n_values = self.data.n_bits if self.data.data_type == DataType.BITSTRING else len(self.data.bits())
+        self._init_counts(pattern_size or self.default_pattern_size(n_values))
+        bits = self.data.bits()
+        self.n_values = len(bits)
+        self.counts += np.bincount(self.data.window_codes(self.pattern_size), minlength=len(self.counts))
+        self.head = bits[:self.pattern_size - 1]
+        self.tail = bits[max(len(bits) - self.pattern_size + 1, 0):]
+        self.test_output = self._serial_p_value()
+        logging.info("Overlapping serial test terminated")
+
+    def begin(self, sample_info, pattern_size=None):
+        """
+        Choose the pattern size from the size of the whole sample and reset the counts.
+        """
+        self._init_counts(pattern_size or self.default_pattern_size(sample_info.n_bits))
+
+    def update(self, chunk):
+        """
+        Count the patterns ending in the chunk.
+        """
+        self._add_bits(chunk.bits())
+
+    def finalize(self):
+        """
+        Compute the test statistic from the patterns counted.
+        """
+        self.test_output = self._serial_p_value()
+        logging.info("Overlapping serial test terminated")
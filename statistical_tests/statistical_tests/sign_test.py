@@ -3,7 +3,10 @@ import logging
 import numpy as np
 
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_statistics import BitStatistics
 from utils.data_type import DataType
+from utils.row_counts import row_value_counts
+from scipy.stats import binom, binomtest
 from statsmodels.stats.descriptivestats import sign_test
 
 
@@ -12,6 +15,10 @@ class SignTest(StatisticalTest):
     """
     Implementation of the sign test that checks the equal repartition of the data around the median.
     """
+
+    supports_streaming = True
+    supports_batch = True
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
@@ -26,10 +33,12 @@ class SignTest(StatisticalTest):
         """
 
         if data.data_type == DataType.BITSTRING:
-            self.data = list(map(int, data.data))
+            # Ones are counted in the pass shared with the other frequency tests
+            self.data = data.bit_statistics()
+            self.n_values = self.data.n_bits
         else:
             self.data = data.data
-        self.n_values = len(self.data)
+            self.n_values = len(self.data)
 
     def generate_report(self):
         """
@@ -43,6 +52,58 @@ class SignTest(StatisticalTest):
         """
         logging.info("Launching sign Test")
         self.get_data_for_test(data_generator)
-        possible_values = np.unique(self.data)
-        self.test_output = sign_test(self.data,  np.median(possible_values))[1]
+        if isinstance(self.data, BitStatistics):
+            # Bits are compared to the median of the values present, 0.5 when both are
+            n_ones, n_zeros = self.data.n_ones, self.data.n_bits - self.data.n_ones
+            positive, negative = (n_ones, n_zeros) if n_ones and n_zeros else (0, 0)
+            self.test_output = binomtest(min(positive, negative), positive + negative, 0.5).pvalue
+        else:
+            possible_values = np.unique(self.data)
+            self.test_output = sign_test(self.data,  np.median(possible_values))[1]
+        logging.info("Sign test terminated")
+
+    @classmethod
+    def run_batch(cls, samples, data_type):
+        """
+        Run the sign test on each sample, values are compared to the median of the distinct values of their sample.
+        Bits are compared the same way, to 0.5 when both are present.
+        """
+        samples = np.asarray(samples)
+        row, values, _ = row_value_counts(samples)
+        n_distinct = np.bincount(row, minlength=len(samples))
+        first = np.cumsum(n_distinct) - n_distinct
+        values = values.astype(np.float64)
+        median = (values[first + (n_distinct - 1) // 2] + values[first + n_distinct // 2]) / 2
+        positive = np.count_nonzero(samples > median[:, None], axis=1)
+        negative = np.count_nonzero(samples < median[:, None], axis=1)
+        n_trials = positive + negative
+        # Two-sided binomial test of probability 0.5, which distribution is symmetric
+        with np.errstate(invalid="ignore"):
+            p_values = np.minimum(1.0, 2 * binom.cdf(np.minimum(positive, negative), n_trials, 0.5))
+        return np.where(n_trials > 0, p_values, np.nan)
+
+    def begin(self, sample_info):
+        """
+        Reset the occurrences counted.
+        """
+        self.values = np.zeros(0, dtype=np.int64)
+        self.data = np.zeros(0, dtype=np.int64)
+        self.n_values = 0
+
+    def update(self, chunk):
+        """
+        Count the occurrences of the values of the chunk.
+        """
+        numbers = chunk.bits() if chunk.data_type == DataType.BITSTRING else chunk.data
+        self.values, self.data = self.count_values(self.values, self.data, numbers)
+        self.n_values += len(numbers)
+
+    def finalize(self):
+        """
+        Run the sign test on the occurrences counted, the same way statsmodels sign_test does.
+        """
+        median = np.median(self.values)
+        positive = int(self.data[self.values > median].sum())
+        negative = int(self.data[self.values < median].sum())
+        self.test_output = binomtest(min(positive, negative), positive + negative, 0.5).pvalue
         logging.info("Sign test terminated")
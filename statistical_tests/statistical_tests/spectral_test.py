@@ -1,46 +1,51 @@
 import logging
 
-from scipy.fft import fft
+from scipy.fft import rfft
 from scipy.special import erfc
 
 from statistical_tests.statistical_test import StatisticalTest, TestRegistry
+from utils.bit_conversion import count_integer_bits, integers_to_bits
 from utils.data_type import DataType
 import numpy as np
 
+# Largest number of bits transformed at once, bigger samples are tested by segments of this size
+MAX_FFT_SIZE = 1 << 27
+
 
 @TestRegistry.register("spectral", [DataType.INT, DataType.BITSTRING])
 class SpectralTest(StatisticalTest):
     """
     Implementation of spectral test used to detect periods in the sequence.
     Algorithm coming from: https://arxiv.org/pdf/1701.01960.pdf
+    The sample is transformed as a whole, or by segments whose peak counts are summed when it is bigger than
+    MAX_FFT_SIZE or when a segment size is given.
     """
 
+    supports_streaming = True
+    supports_batch = True
+    cost_per_unit = 5e-9
+
     def __init__(self):
         super().__init__()
         self.n_values = 0
         self.p_value_limit = 0.05
         self.p_value_limit_strict = 0.01
-        self.data_one_minus_one = []
         self.test_output = None
         self.report = None
 
-    def get_data_for_test(self, data):
+    @staticmethod
+    def complexity(n_bits):
         """
-        Format the data into a bitstring then convert it into a +1/-1 list.
+        FFT of the whole sample, n log(n).
         """
-        self.data = data.data
-        if data.data_type != DataType.BITSTRING:
-            binary_string = self.transform_to_bits()
-        else:
-            binary_string = self.data
-        # For spectral test we want symetric signal over 0 so we replace 0 by -1
-        for char in binary_string:
-            if char == '0':
-                self.data_one_minus_one.append(-1)
-            elif char == '1':
-                self.data_one_minus_one.append(1)
+        return n_bits * max(np.log2(max(n_bits, 1)), 1)
 
-        self.n_values = len(self.data_one_minus_one)
+    def get_data_for_test(self, data):
+        """
+        Keep the sample, its bits are converted into a +1/-1 signal segment by segment.
+        """
+        self.data = data
+        self.n_values = data.n_bits if data.data_type == DataType.BITSTRING else len(data.bits())
 
     def generate_report(self):
         """
@@ -49,31 +54,159 @@ class SpectralTest(StatisticalTest):
         return self.generate_test_report("Spectral test")
 
     @staticmethod
-    def run_spectral_on_binary(one_minus_one, n_values):
+    def count_peaks(signal):
         """
-        Launch spectral test on transformed 1 -1 list
-        :param one_minus_one: list of -1 and 1
-        :param n_values: list length
-        :return: p_value
+        Count the peaks of the discrete fourier transform of a signal below the 95% threshold.
+        :param signal: float32 array of -1 and 1, or 2-D array holding one signal per row
+        :return: number of peaks below the threshold, of each signal for a 2-D array
         """
-        # Product discrete fourier transform of plus minus one
-        s = fft(np.array(one_minus_one))
-        modulus = np.abs(s[0:int(n_values / 2)])
+        n_values = signal.shape[-1]
+        # The transform of a real signal is symmetric, only its first half is computed
+        modulus = np.abs(rfft(signal)[..., 0:int(n_values / 2)])
         tau = np.sqrt(np.log(1 / 0.05) * n_values)
+        if signal.ndim == 1:
+            return int(np.count_nonzero(modulus < tau))
+        return np.count_nonzero(modulus < tau, axis=-1)
+
+    @staticmethod
+    def peaks_p_value(count_n1, segment_size, n_segments=1):
+        """
+        Compare the number of peaks counted over all the segments to the theory.
+        :param count_n1: number of peaks below the threshold
+        :param segment_size: number of bits of each segment
+        :param n_segments: number of segments
+        :return: p_value
+        """
         # Theoretical number of peaks
-        count_n0 = 0.95 * (n_values / 2)
-        # Count the number of actual peaks m > T
-        count_n1 = len(np.where(modulus < tau)[0])
+        count_n0 = 0.95 * (segment_size / 2) * n_segments
         # Calculate d and return the p value statistic
-        d = (count_n1 - count_n0) / np.sqrt(n_values * 0.95 * 0.05 / 3.8)
+        d = (count_n1 - count_n0) / np.sqrt(n_segments * segment_size * 0.95 * 0.05 / 3.8)
         p_val = erfc(abs(d) / np.sqrt(2))
         return p_val
 
-    def run_test(self, data_generator):
+    @staticmethod
+    def run_spectral_on_binary(one_minus_one, n_values):
+        """
+        Launch spectral test on transformed 1 -1 list
+        :param one_minus_one: list of -1 and 1
+        :param n_values: list length
+        :return: p_value
+        """
+        signal = np.asarray(one_minus_one, dtype=np.float32)
+        return SpectralTest.peaks_p_value(SpectralTest.count_peaks(signal), n_values)
+
+    @classmethod
+    def batch_p_values(cls, bit_rows):
+        """
+        Run the spectral test on rows holding the same number of bits, transforming several rows at once.
+        :param bit_rows: 2-D uint8 array, one bit per element
+        :return: float64 array of p-values
+        """
+        n_rows, n_values = bit_rows.shape
+        if n_values < 2:
+            return np.full(n_rows, np.nan)
+        if n_values > MAX_FFT_SIZE:
+            # Rows bigger than a transform are tested by segments, one by one
+            p_values = []
+            for bits in bit_rows:
+                test = cls()
+                test._init_segments(n_values)
+                test._add_bits(bits)
+                p_values.append(test._spectral_p_value())
+            return np.array(p_values, dtype=np.float64)
+        count_n1 = np.empty(n_rows, dtype=np.int64)
+        rows_per_block = max(1, MAX_FFT_SIZE // n_values)
+        for start in range(0, n_rows, rows_per_block):
+            signal = bit_rows[start:start + rows_per_block].astype(np.float32) * 2 - 1
+            count_n1[start:start + rows_per_block] = cls.count_peaks(signal)
+        return cls.peaks_p_value(count_n1, n_values)
+
+    @classmethod
+    def run_batch(cls, samples, data_type):
+        """
+        Run the spectral test on each sample. Integers are written as bits sample by sample, samples holding the same
+        number of bits are then transformed together.
+        """
+        if data_type == DataType.BITSTRING:
+            return cls.batch_p_values(np.asarray(samples, dtype=np.uint8))
+        bit_rows = [integers_to_bits(values) for values in samples]
+        lengths = np.array([len(bits) for bits in bit_rows])
+        p_values = np.full(len(bit_rows), np.nan)
+        for length in np.unique(lengths):
+            indexes = np.flatnonzero(lengths == length)
+            p_values[indexes] = cls.batch_p_values(np.stack([bit_rows[i] for i in indexes]))
+        return p_values
+
+    @classmethod
+    def batch_n_values(cls, samples, data_type):
+        """
+        Integers are tested as bits, their number of bits is reported.
+        """
+        if data_type == DataType.BITSTRING:
+            return super().batch_n_values(samples, data_type)
+        return [count_integer_bits(values) for values in samples]
+
+    def _init_segments(self, n_values, segment_size=None):
+        if segment_size is None:
+            segment_size = n_values if n_values <= MAX_FFT_SIZE else MAX_FFT_SIZE
+        self.segment_size = min(segment_size, n_values)
+        self.segment = np.empty(self.segment_size, dtype=np.float32)
+        self.filled = 0
+        self.n_segments = 0
+        self.count_n1 = 0
+
+    def _add_bits(self, bits):
+        """
+        Write bits as -1 and 1 in the current segment, full segments are transformed and their peaks counted.
+        Bits of an incomplete last segment are ignored.
+        """
+        start = 0
+        while start < len(bits) and self.segment_size > 0:
+            size = min(self.segment_size - self.filled, len(bits) - start)
+            window = self.segment[self.filled:self.filled + size]
+            np.multiply(bits[start:start + size], 2, out=window, casting="unsafe")
+            window -= 1
+            self.filled += size
+            start += size
+            if self.filled == self.segment_size:
+                self.count_n1 += self.count_peaks(self.segment)
+                self.n_segments += 1
+                self.filled = 0
+
+    def _spectral_p_value(self):
+        self.segment = None
+        if self.n_segments > 0 and self.segment_size > 1:
+            return self.peaks_p_value(self.count_n1, self.segment_size, self.n_segments)
+
+    def run_test(self, data_generator, segment_size=None):
         """
         Launch spectral test on the data.
+        :param segment_size: number of bits transformed at once, the whole sample (up to MAX_FFT_SIZE) by default
         """
         logging.info("Launching spectral Test")
         self.get_data_for_test(data_generator)
-        self.test_output = self.run_spectral_on_binary(self.data_one_minus_one, self.n_values)
+        self._init_segments(self.n_values, segment_size)
+        for bits in self.data.iter_bits():
+            self._add_bits(bits)
+        self.test_output = self._spectral_p_value()
+        logging.info("Spectral test terminated")
+
+    def begin(self, sample_info, segment_size=None):
+        """
+        Choose the segment size from the size of the whole sample.
+        """
+        self.n_values = sample_info.n_bits
+        self._init_segments(self.n_values, segment_size)
+
+    def update(self, chunk):
+        """
+        Fill the current segment with the chunk, transforming it once it is full.
+        """
+        self._add_bits(chunk.bits())
+
+    def finalize(self):
+        """
+        Compute the test statistic from the peaks counted in all the segments.
+        """
+        self.test_output = self._spectral_p_value()
         logging.info("Spectral test terminated")
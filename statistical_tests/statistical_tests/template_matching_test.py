@@ -0,0 +1,213 @@
+import logging
+import math
+
+from scipy.special import gammaincc
+
+from statistical_tests.statistical_test import StatisticalTest, TestRegistry, sidak_p_value
+from utils.data_type import DataType
+import numpy as np
+
+# Probabilities of 0, 1, 2, 3, 4 and at least 5 occurrences of the 9 ones template in blocks of 1032 bits
+# Data coming from https://nvlpubs.nist.gov/nistpubs/Legacy/SP/nistspecialpublication800-22r1a.pdf 3.8
+OVERLAPPING_TEMPLATE_PROBABILITIES = [0.364091, 0.185659, 0.139381, 0.100571, 0.070432, 0.139865]
+
+
+def aperiodic_templates(template_size):
+    """
+    List the templates that cannot overlap themselves, the ones whose occurrences never overlap.
+    :param template_size: number of bits of the templates
+    :return: list of the integer codes of the aperiodic templates, in increasing order
+    """
+    templates = []
+    for code in range(2 ** template_size):
+        bits = format(code, f"0{template_size}b")
+        if all(bits[shift:] != bits[:template_size - shift] for shift in range(1, template_size)):
+            templates.append(code)
+    return templates
+
+
+def block_windows(codes, n_blocks, block_size, template_size):
+    """
+    Split the codes of the overlapping windows of a sequence by block, keeping the windows inside a block.
+    :param codes: codes of the overlapping windows of the sequence
+    :param n_blocks: number of blocks
+    :param block_size: number of bits per block
+    :param template_size: number of bits per window
+    :return: generator of the codes of the windows of each block
+    """
+    for block in range(n_blocks):
+        yield codes[block * block_size:(block + 1) * block_size - template_size + 1]
+
+
+@TestRegistry.register("non_overlapping_template", [DataType.INT, DataType.BITSTRING])
+class NonOverlappingTemplateTest(StatisticalTest):
+    """
+    Implementation of the non-overlapping template matching test counting the occurrences of aperiodic templates in 8
+    blocks of the sequence.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.7
+    All the templates are counted at once from the windows of each block, the smallest of their p-values is reported
+    with a Sidak correction.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data, template_size=9):
+        """
+        Retrieve the shared index of the overlapping windows of the sample.
+        """
+        self.data = data.window_codes(template_size)
+        self.n_values = data.n_bits if data.data_type == DataType.BITSTRING else len(data.bits())
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Non-overlapping template test")
+
+    @staticmethod
+    def template_p_value(block_counts, block_size, template_size):
+        """
+        Compare the occurrences of a template in each block to the theory.
+        :param block_counts: occurrences of the template in each block
+        :param block_size: number of bits per block
+        :param template_size: number of bits of the template
+        :return: p-value
+        """
+        mean = (block_size - template_size + 1) / 2 ** template_size
+        variance = block_size * (1 / 2 ** template_size - (2 * template_size - 1) / 2 ** (2 * template_size))
+        chi_squared = float(np.sum((np.asarray(block_counts, dtype=np.float64) - mean) ** 2)) / variance
+        return gammaincc(len(block_counts) / 2, chi_squared / 2)
+
+    @staticmethod
+    def run_template_matching(codes, n_values, template_size=9, templates=None, n_blocks=8):
+        """
+        Run the test for several templates.
+        :param codes: codes of the overlapping template_size bits windows of the sequence
+        :param n_values: number of bits
+        :param template_size: number of bits of the templates
+        :param templates: codes of the templates, all the aperiodic templates by default
+        :param n_blocks: number of blocks
+        :return: p-value of each template
+        """
+        block_size = n_values // n_blocks
+        if block_size < template_size:
+            return []
+        templates = aperiodic_templates(template_size) if templates is None else templates
+        # Occurrences of every pattern in each block, the occurrences of an aperiodic template never overlap
+        counts = np.stack([np.bincount(windows, minlength=2 ** template_size)
+                           for windows in block_windows(codes, n_blocks, block_size, template_size)])
+        return [NonOverlappingTemplateTest.template_p_value(counts[:, template], block_size, template_size)
+                for template in templates]
+
+    def run_test(self, data_generator, template_size=9, templates=None):
+        """
+        Launch non-overlapping template test on the data.
+        :param template_size: number of bits of the templates
+        :param templates: codes of the templates, all the aperiodic templates by default
+        """
+        logging.info("Launching non-overlapping template Test")
+        self.get_data_for_test(data_generator, template_size)
+        p_values = self.run_template_matching(self.data, self.n_values, template_size, templates)
+        self.test_output = sidak_p_value(p_values)
+        logging.info("Non-overlapping template test terminated")
+
+
+@TestRegistry.register("overlapping_template", [DataType.INT, DataType.BITSTRING])
+class OverlappingTemplateTest(StatisticalTest):
+    """
+    Implementation of the overlapping template matching test counting the overlapping occurrences of a run of ones in
+    blocks of 1032 bits.
+    Algorithm from https://nvlpubs.nist.gov/nistpubs/legacy/sp/nistspecialpublication800-22r1a.pdf 2.8
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_values = 0
+        self.p_value_limit = 0.05
+        self.p_value_limit_strict = 0.01
+        self.test_output = None
+        self.report = None
+
+    def get_data_for_test(self, data, template_size=9):
+        """
+        Retrieve the shared index of the overlapping windows of the sample.
+        """
+        self.data = data.window_codes(template_size)
+        self.n_values = data.n_bits if data.data_type == DataType.BITSTRING else len(data.bits())
+
+    def generate_report(self):
+        """
+        Generate a report with correct test_name.
+        """
+        return self.generate_test_report("Overlapping template test")
+
+    @staticmethod
+    def occurrence_probabilities(block_size, template_size, n_classes=6):
+        """
+        Probabilities of the number of occurrences of the ones template in a block, the last class gathering the
+        biggest numbers.
+        :param block_size: number of bits per block
+        :param template_size: number of bits of the template
+        :param n_classes: number of classes
+        :return: list of probabilities
+        """
+        if (block_size, template_size, n_classes) == (1032, 9, 6):
+            return OVERLAPPING_TEMPLATE_PROBABILITIES
+        eta = (block_size - template_size + 1) / 2 ** template_size / 2
+        probabilities = [math.exp(-eta)]
+        for u in range(1, n_classes - 1):
+            total = sum(math.comb(u - 1, l - 1) * eta ** l / math.factorial(l) for l in range(1, u + 1))
+            probabilities.append(math.exp(-eta) * total / 2 ** u)
+        probabilities.append(1 - sum(probabilities))
+        return probabilities
+
+    @staticmethod
+    def run_overlapping_template(codes, n_values, template_size=9, block_size=1032):
+        """
+        Count the occurrences of the ones template per block and compare their distribution to the theory.
+        :param codes: codes of the overlapping template_size bits windows of the sequence
+        :param n_values: number of bits
+        :param template_size: number of bits of the template
+        :param block_size: number of bits per block
+        :return: p-value
+        """
+        n_blocks = n_values // block_size
+        if n_blocks == 0 or block_size < template_size:
+            return None
+        positions = np.flatnonzero(codes[:n_blocks * block_size] == 2 ** template_size - 1)
+        # Occurrences must lie within a block
+        positions = positions[positions % block_size <= block_size - template_size]
+        block_counts = np.bincount(positions // block_size, minlength=n_blocks)
+
+        probabilities = OverlappingTemplateTest.occurrence_probabilities(block_size, template_size)
+        classes = np.bincount(np.minimum(block_counts, len(probabilities) - 1), minlength=len(probabilities))
+        return OverlappingTemplateTest.classes_p_value(classes, probabilities)
+
+    @staticmethod
+    def classes_p_value(classes, probabilities):
+        """
+        Compare the number of blocks in each class of occurrences to the theory.
+        :param classes: number of blocks with 0, 1, ... occurrences of the template
+        :param probabilities: probability of each class
+        :return: p-value
+        """
+        expected = np.sum(classes) * np.asarray(probabilities)
+        chi_squared = float(np.sum((np.asarray(classes) - expected) ** 2 / expected))
+        return gammaincc((len(probabilities) - 1) / 2, chi_squared / 2)
+
+    def run_test(self, data_generator, template_size=9, block_size=1032):
+        """
+        Launch overlapping template test on the data.
+        :param template_size: number of bits of the template
+        :param block_size: number of bits per block
+        """
+        logging.info("Launching overlapping template Test")
+        self.get_data_for_test(data_generator, template_size)
+        self.test_output = self.run_overlapping_template(self.data, self.n_values, template_size, block_size)
+        logging.info("Overlapping template test terminated")
@@ -0,0 +1,18 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.approximate_entropy_test import ApproximateEntropyTest
+
+
+class TestApproximateEntropy(TestCase):
+    """
+    Test of approximate entropy algorithm with NIST exemple test case.
+    """
+
+    def test_approximate_entropy(self):
+        bits = np.array([int(bit) for bit in "0100110101"], dtype=np.uint8)
+        test = ApproximateEntropyTest()
+        test.run_test(DataSample.from_bits(bits), pattern_size=3)
+        self.assertAlmostEqual(test.test_output, 0.261961, places=6)
@@ -0,0 +1,43 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests import autocorrelation_test
+from statistical_tests.statistical_tests.autocorrelation_test import AutocorrelationTest
+from utils.data_type import DataType
+
+
+class TestAutocorrelation(TestCase):
+    """
+    Test of the autocorrelation computed by FFT over segments.
+    """
+
+    def test_lagged_products(self):
+        """
+        Test that the products summed segment by segment are the ones of the whole sequence.
+        """
+        values = np.random.default_rng(0).integers(0, 1000, 5555)
+        with patch.object(autocorrelation_test, "SEGMENT_SIZE", 1000):
+            test = AutocorrelationTest()
+            test.run_test(DataSample(values, DataType.INT), max_lag=40)
+        centered = values - values.mean()
+        expected = [np.dot(centered[:len(centered) - lag], centered[lag:]) for lag in range(41)]
+        np.testing.assert_allclose(test.products, expected, rtol=1e-10)
+
+    def test_correlated_sequence(self):
+        """
+        Test that a correlation at a single lag is found.
+        """
+        bits = np.random.default_rng(1).integers(0, 2, 100000, dtype=np.uint8)
+        # One bit in ten repeats the bit 17 positions before it
+        copied = np.flatnonzero(np.random.default_rng(2).random(100000 - 17) < 0.1) + 17
+        bits[copied] = bits.copy()[copied - 17]
+        test = AutocorrelationTest()
+        test.run_test(DataSample.from_bits(bits))
+        self.assertLess(test.test_output, 1e-6)
+        self.assertEqual(test.worst_lag, 17)
+        report = test.generate_report()
+        self.assertEqual(report["worst_lag"], 17)
+        self.assertLess(report["worst_lag_p_value"], 1e-6)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_test import TestRegistry
+from statistical_tests.statistical_tests import load_tests
+from utils.data_type import DataType
+from utils.row_counts import row_ranks, row_value_counts
+
+BATCH_TESTS = ["chi2", "serial", "run", "sign", "spectral"]
+
+
+class TestBatch(TestCase):
+    """
+    Test that running a test on a batch of samples gives the p-values of running it on each sample.
+    """
+
+    def test_row_counts(self):
+        rows = np.array([[3, 1, 3, 7], [2, 2, 2, 2]])
+        row, values, counts = row_value_counts(rows)
+        self.assertEqual(row.tolist(), [0, 0, 0, 1])
+        self.assertEqual(values.tolist(), [1, 3, 7, 2])
+        self.assertEqual(counts.tolist(), [1, 2, 1, 4])
+        ranks, n_distinct = row_ranks(rows)
+        self.assertEqual(ranks.tolist(), [[1, 0, 1, 2], [0, 0, 0, 0]])
+        self.assertEqual(n_distinct.tolist(), [3, 1])
+
+    def test_run_batch(self):
+        load_tests()
+        rng = np.random.default_rng(0)
+        batches = [(rng.integers(0, 10, (20, 40)), DataType.INT),
+                   (rng.integers(0, 1 << 40, (10, 500)), DataType.INT),
+                   (rng.integers(0, 2, (20, 1001), dtype=np.uint8), DataType.BITSTRING)]
+        for test_name in BATCH_TESTS:
+            test_cls = TestRegistry.get_available_tests()[test_name][0]
+            self.assertTrue(test_cls.supports_batch)
+            for samples, data_type in batches:
+                p_values = test_cls.run_batch(samples, data_type)
+                self.assertEqual(len(p_values), len(samples))
+                for row, p_value in zip(samples, p_values):
+                    test = test_cls()
+                    sample = DataSample.from_bits(row) if data_type == DataType.BITSTRING else DataSample(row, data_type)
+                    test.run_test(sample)
+                    self.assertAlmostEqual(p_value, test.test_output, places=10)
+
+    def test_constant_samples(self):
+        """
+        Test that the samples a test cannot be run on are reported as N/A.
+        """
+        load_tests()
+        samples = np.array([[5] * 30, np.random.default_rng(1).integers(0, 10, 30)])
+        reports = TestRegistry.get_available_tests()["sign"][0].batch_reports(samples, DataType.INT)
+        self.assertEqual(reports[0]["status"], "N/A")
+        self.assertNotEqual(reports[1]["status"], "N/A")
+        self.assertEqual(reports[0]["n_sample"], 30)
@@ -1,5 +1,7 @@
 from unittest import TestCase
 
+import numpy as np
+
 from statistical_tests.statistical_tests.binary_rank_test import compute_binary_rank, BinaryMatrixTest
 
 
@@ -44,6 +46,21 @@ class TestRankComputation(TestCase):
         matrix = [32, 1, 33, 42, 11, 2]
         self.assertEqual(compute_binary_rank(matrix), 4)
 
+    def test_batched_rank(self):
+        """
+        Test that the batched elimination gives the same ranks as the matrix by matrix one, for several shapes.
+        """
+        rng = np.random.default_rng(0)
+        for n_rows, n_cols in [(32, 32), (6, 8), (8, 6), (31, 31), (40, 64)]:
+            bits = rng.integers(0, 2, n_rows * n_cols * 200, dtype=np.uint8)
+            # Some matrices of low rank
+            bits[:n_rows * n_cols * 20:3] = 0
+            matrices = BinaryMatrixTest.pack_matrices(bits, n_rows, n_cols)
+            ranks = BinaryMatrixTest.batched_binary_rank(matrices, n_cols)
+            expected = [compute_binary_rank([int("".join(map(str, row)), 2) for row in matrix])
+                        for matrix in bits.reshape(-1, n_rows, n_cols)]
+            self.assertEqual(ranks.tolist(), expected)
+
 
 class TestBinaryMatrix(TestCase):
     """
@@ -55,7 +72,14 @@ class TestBinaryMatrix(TestCase):
         with(open("../test_data/e_binary_extention", "r")) as f:
             chars = f.read()
             bm = BinaryMatrixTest()
-            self.assertEqual(bm.run_binary_test(chars[:-1], 32), 0.5320686217466569)
+            self.assertEqual(bm.run_binary_test(chars[:-1], 32), 0.5320686208924519)
+
+    def test_rank_probabilities(self):
+        """
+        Test the theoretical probabilities with NIST SP 800-22 values.
+        """
+        self.assertEqual([round(p, 4) for p in BinaryMatrixTest.rank_probabilities(32, 32)], [0.2888, 0.5776, 0.1336])
+        self.assertEqual([round(p, 4) for p in BinaryMatrixTest.rank_probabilities(6, 8)], [0.7731, 0.2174, 0.0094])
 
 
 
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.birthday_spacings_test import BirthdaySpacingsTest
+from utils.data_type import DataType
+
+
+class TestBirthdaySpacings(TestCase):
+    """
+    Test of the birthday spacings test.
+    """
+
+    def test_birthday_parameters(self):
+        self.assertEqual(BirthdaySpacingsTest.birthday_parameters(2), (24, 1 << 24, 512))
+        self.assertEqual(BirthdaySpacingsTest.birthday_parameters(1 << 32), (1, 1 << 32, 3251))
+
+    def test_count_repeated_spacings(self):
+        # Spacings 1, 1, 3, 5 (circular) and 2, 2, 2, 4
+        days = np.array([3, 0, 1, 5, 0, 6, 2, 4], dtype=np.int64)
+        self.assertEqual(BirthdaySpacingsTest.count_repeated_spacings(days, 10, 4).tolist(), [1, 2])
+
+    def test_repeats_p_value(self):
+        # The expected number of repeats is not flagged, an excess of repeats is
+        self.assertLess(BirthdaySpacingsTest.repeats_p_value(10, 10), 0.95)
+        self.assertGreater(BirthdaySpacingsTest.repeats_p_value(40, 10), 0.99)
+        self.assertLess(BirthdaySpacingsTest.repeats_p_value(0, 10), 0.01)
+
+    def test_birthday_spacings(self):
+        test = BirthdaySpacingsTest()
+        test.run_test(DataSample(np.random.default_rng(0).integers(0, 1 << 32, 200000), DataType.INT))
+        self.assertLess(test.test_output, 0.99)
+
+        # A lattice of birthdays repeats most of its spacings
+        test.run_test(DataSample(np.arange(200000, dtype=np.int64) * 65537 % (1 << 32), DataType.INT))
+        self.assertGreater(test.test_output, 0.99)
+        self.assertEqual(test.generate_report()["status"], "KO")
+
+    def test_uniform_samples(self):
+        rng = np.random.default_rng(1)
+        test = BirthdaySpacingsTest()
+        for _ in range(20):
+            test.run_test(DataSample(rng.integers(0, 1 << 32, 50000), DataType.INT))
+            self.assertNotEqual(test.generate_report()["status"], "KO")
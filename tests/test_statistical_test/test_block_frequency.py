@@ -0,0 +1,19 @@
+from unittest import TestCase
+
+import numpy as np
+
+from statistical_tests.statistical_tests.block_frequency_test import BlockFrequencyTest
+from utils.bit_statistics import BitStatistics
+
+
+class TestBlockFrequency(TestCase):
+    """
+    Test of block frequency algorithm with NIST exemple test case.
+    """
+
+    def test_block_frequency(self):
+        statistics = BitStatistics(10, block_size=3)
+        statistics.update(np.array([int(bit) for bit in "0110011010"], dtype=np.uint8))
+        self.assertEqual(statistics.block_ones.tolist(), [2, 1, 2])
+        self.assertAlmostEqual(BlockFrequencyTest.block_frequency_p_value(statistics.block_ones, 3), 0.801252,
+                               places=6)
@@ -0,0 +1,39 @@
+import math
+from unittest import TestCase
+
+import numpy as np
+
+from statistical_tests.statistical_tests.compression_test import CompressionTest, COMPRESSION_DATA
+
+
+class TestCompression(TestCase):
+    """
+    Test of the compression test (Maurer's universal test).
+    """
+
+    def test_compression_parameters(self):
+        """
+        Test the parameters chosen from the table and past its last line.
+        """
+        self.assertEqual(CompressionTest.compression_parameters(1000000), (7, 1280, 128000, 6.1962507, 3.125))
+        n_values = 2 * COMPRESSION_DATA[-1][0]
+        self.assertEqual(CompressionTest.compression_parameters(n_values),
+                         (16, 655360, n_values // 16 - 655360, 15.167379, 3.421))
+
+    def test_distances(self):
+        """
+        Test the distances summed against a block by block computation.
+        """
+        bits = np.random.default_rng(0).integers(0, 2, 400000, dtype=np.uint8)
+        ct = CompressionTest()
+        ct.run_compression(bits, len(bits))
+        L, Q, K, _, _ = ct.parameters
+
+        last_seen = {}
+        stat_sum = 0.0
+        for i in range(min(len(bits) // L, Q + K)):
+            block = bits[i * L:(i + 1) * L].tobytes()
+            if i + 1 > Q:
+                stat_sum += math.log(i + 1 - last_seen.get(block, 0), 2)
+            last_seen[block] = i + 1
+        self.assertAlmostEqual(ct.stat_sum, stat_sum, places=6)
@@ -0,0 +1,23 @@
+from unittest import TestCase
+
+import numpy as np
+
+from statistical_tests.statistical_tests.cumulative_sums_test import CumulativeSumsTest
+from utils.bit_statistics import BitStatistics
+
+
+class TestCumulativeSums(TestCase):
+    """
+    Test of cumulative sums algorithm with NIST exemple test case.
+    """
+
+    def test_cumulative_sums(self):
+        bits = "1100100100001111110110101010001000100001011010001100001000110100110001001100011001100010100010111000"
+        statistics = BitStatistics(len(bits))
+        statistics.update(np.array([int(bit) for bit in bits], dtype=np.uint8))
+
+        forward = CumulativeSumsTest.maximal_excursion(statistics, "forward")
+        backward = CumulativeSumsTest.maximal_excursion(statistics, "backward")
+        self.assertEqual((forward, backward), (16, 19))
+        self.assertAlmostEqual(CumulativeSumsTest.cumulative_sums_p_value(forward, len(bits)), 0.219194, places=6)
+        self.assertAlmostEqual(CumulativeSumsTest.cumulative_sums_p_value(backward, len(bits)), 0.114866, places=6)
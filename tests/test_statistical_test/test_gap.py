@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.gap_test import GapTest
+from utils.data_type import DataType
+
+
+class TestGap(TestCase):
+    """
+    Test of the gap test.
+    """
+
+    def test_gap_lengths(self):
+        symbols = np.array([5, 0, 6, 7, 1, 2, 9, 9, 9, 4], dtype=np.uint64)
+        self.assertEqual(GapTest.gap_lengths(symbols, 5).tolist(), [2, 0, 3])
+
+    def test_gap(self):
+        test = GapTest()
+        test.run_test(DataSample(np.random.default_rng(0).integers(0, 100, 100000), DataType.INT))
+        self.assertGreater(test.test_output, 0.01)
+
+        # Alternating halves never leave a gap longer than 1
+        test.run_test(DataSample(np.tile([3, 7, 60, 99], 10000), DataType.INT))
+        self.assertLess(test.test_output, 0.01)
@@ -1,6 +1,9 @@
 from unittest import TestCase
 
-from statistical_tests.statistical_tests.linear_complexity_test import LinearComplexityTest
+import numpy as np
+
+from statistical_tests.statistical_tests.linear_complexity_test import LinearComplexityTest, \
+    batched_berlekamp_massey, berlekamp_massey_algorithm
 
 
 class TestLinearComplexity(TestCase):
@@ -13,3 +16,15 @@ class TestLinearComplexity(TestCase):
             chars = f.read()
             lc = LinearComplexityTest()
             self.assertEqual(lc.run_linear_complexity(chars[:-1], 1000), 0.818057422208264)
+
+    def test_batched_berlekamp_massey(self):
+        """
+        Test that the batched algorithm gives the same linear complexities as the block by block one.
+        """
+        self.assertEqual(berlekamp_massey_algorithm("001101110"), 5)
+        rng = np.random.default_rng(0)
+        for block_size in [1, 7, 64, 65, 200]:
+            blocks = rng.integers(0, 2, (30, block_size), dtype=np.uint8)
+            blocks[:3] = 0
+            self.assertEqual(batched_berlekamp_massey(blocks).tolist(),
+                             [berlekamp_massey_algorithm(block) for block in blocks])
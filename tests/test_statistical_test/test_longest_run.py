@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.longest_run_test import LongestRunTest
+
+
+class TestLongestRun(TestCase):
+    """
+    Test of longest run algorithm with NIST exemple test case.
+    """
+
+    def test_longest_run(self):
+        bits = "11001100000101010110110001001100111000000000001001001101010100010001001111010110100000001101011111001" \
+               "100111001101101100010110010"
+        lr = LongestRunTest()
+        lr.run_test(DataSample.from_bits(np.array([int(bit) for bit in bits], dtype=np.uint8)))
+        self.assertEqual(lr.data.run_block_size, 8)
+        self.assertEqual(lr.data.longest_runs[:5].tolist(), [0, 4, 9, 3, 0])
+        self.assertAlmostEqual(lr.test_output, 0.180598, places=6)
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.opso_test import OpsoTest
+from utils.data_type import DataType
+
+
+class TestOpso(TestCase):
+    """
+    Test of the OPSO test.
+    """
+
+    def test_missing_words_moments(self):
+        """
+        Test against the mean 141909 and standard deviation 290 given by Marsaglia for 2^21 pairs of 1024 letters.
+        """
+        mean, variance = OpsoTest.missing_words_moments(1 << 20, 1 << 21)
+        self.assertAlmostEqual(mean, 141909, delta=1)
+        self.assertAlmostEqual(np.sqrt(variance), 290, delta=1)
+
+    def test_count_missing_words(self):
+        letters = np.array([0, 1, 1, 0, 0], dtype=np.int64)
+        # Words 01, 11 then 10, 00
+        self.assertEqual(OpsoTest.count_missing_words(letters, 2, 2).tolist(), [2, 2])
+
+    def test_opso(self):
+        test = OpsoTest()
+        for alphabet_size in [2, 6, 1 << 40]:
+            test.run_test(DataSample(np.random.default_rng(0).integers(0, alphabet_size, 1 << 21), DataType.INT))
+            self.assertGreater(test.test_output, 0.01)
+
+        # Letters following each other in a cycle leave most words missing
+        test.run_test(DataSample(np.tile(np.arange(1024), 1 << 11), DataType.INT))
+        self.assertLess(test.test_output, 0.01)
@@ -0,0 +1,70 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.period_test import PeriodTest, longest_repeat, window_hashes
+from utils.data_type import DataType
+
+
+def brute_force_longest_repeat(symbols):
+    longest = 0
+    for first in range(len(symbols)):
+        for second in range(first + 1, len(symbols)):
+            length = 0
+            while second + length < len(symbols) and symbols[first + length] == symbols[second + length]:
+                length += 1
+            longest = max(longest, length)
+    return longest
+
+
+class TestPeriod(TestCase):
+    """
+    Test of the longest repeat search used by the period test.
+    """
+
+    def test_window_hashes(self):
+        symbols = np.random.default_rng(0).integers(0, 5, 1000).astype(np.uint64)
+        for length in [1, 2, 5, 11]:
+            hashes = window_hashes(symbols, length)
+            self.assertEqual(len(hashes), 1000 - length + 1)
+            # Equal windows have equal hashes
+            self.assertEqual(hashes[0], window_hashes(symbols[:length], length)[0])
+
+    def test_longest_repeat(self):
+        rng = np.random.default_rng(1)
+        for _ in range(100):
+            symbols = rng.integers(0, rng.integers(1, 4), rng.integers(1, 50)).astype(np.uint64)
+            for start_length in [1, 4]:
+                length, first, second = longest_repeat(symbols, start_length)
+                self.assertEqual(length, brute_force_longest_repeat(symbols.tolist()))
+                if first is not None:
+                    self.assertTrue(np.array_equal(symbols[first:first + length], symbols[second:second + length]))
+
+    def test_period(self):
+        """
+        Test that a sample ending by repeating itself is detected with its period and position.
+        """
+        rng = np.random.default_rng(2)
+        values = np.concatenate([rng.integers(0, 1000, 123), np.tile(rng.integers(0, 1000, 7777), 10)])
+        test = PeriodTest()
+        test.run_test(DataSample(values, DataType.INT))
+        self.assertEqual((test.period, test.position, test.repeat_length), (7777, 123, len(values) - 123 - 7777))
+        self.assertEqual(test.test_output, 1.0)
+        report = test.generate_report()
+        self.assertEqual(report["status"], "KO")
+        self.assertEqual((report["period"], report["position"]), (7777, 123))
+
+        test.run_test(DataSample(rng.integers(0, 1000, 100000), DataType.INT))
+        self.assertGreater(test.test_output, 0.01)
+        self.assertLess(test.test_output, 0.99)
+
+    def test_uniform_samples(self):
+        """
+        Test that uniform samples whose longest repeat is shorter than usual are not reported KO.
+        """
+        rng = np.random.default_rng(3)
+        test = PeriodTest()
+        for _ in range(40):
+            test.run_test(DataSample(rng.integers(0, 1 << 15, 100000), DataType.INT))
+            self.assertNotEqual(test.generate_report()["status"], "KO")
@@ -0,0 +1,33 @@
+import math
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from statistical_tests.statistical_tests.poker_test import PokerTest, stirling_second_kind
+from utils.data_type import DataType
+
+
+class TestPoker(TestCase):
+    """
+    Test of the poker test.
+    """
+
+    def test_distinct_probabilities(self):
+        self.assertEqual([stirling_second_kind(5, k) for k in range(1, 6)], [1, 15, 25, 10, 1])
+        for alphabet_size in [2, 3, 10, 16]:
+            self.assertAlmostEqual(sum(PokerTest.distinct_probabilities(alphabet_size)), 1.0)
+        self.assertAlmostEqual(PokerTest.distinct_probabilities(10)[-1], math.perm(10, 5) / 10 ** 5)
+
+    def test_count_distinct(self):
+        symbols = np.array([0, 0, 0, 0, 0, 1, 2, 1, 2, 3, 4, 3, 2, 1, 0, 7], dtype=np.uint64)
+        self.assertEqual(PokerTest.count_distinct(symbols).tolist(), [1, 0, 1, 0, 1])
+
+    def test_poker(self):
+        test = PokerTest()
+        test.run_test(DataSample(np.random.default_rng(0).integers(0, 1 << 40, 100000), DataType.INT))
+        self.assertGreater(test.test_output, 0.01)
+
+        # Hands never holding a pair are detected
+        test.run_test(DataSample(np.tile(np.arange(10), 10000), DataType.INT))
+        self.assertLess(test.test_output, 0.01)
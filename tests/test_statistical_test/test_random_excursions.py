@@ -0,0 +1,34 @@
+from unittest import TestCase
+
+import numpy as np
+
+from statistical_tests.statistical_tests.random_excursions_test import RandomExcursionsTest, \
+    RandomExcursionsVariantTest
+from utils.random_walk import compute_random_walk_statistics
+
+
+class TestRandomExcursions(TestCase):
+    """
+    Test of random excursions algorithms with NIST exemple test cases.
+    """
+
+    def test_random_excursions(self):
+        bits = np.array([int(bit) for bit in "0110110101"], dtype=np.uint8)
+        statistics = compute_random_walk_statistics([bits[:4], bits[4:]])
+        self.assertEqual(statistics.n_cycles, 3)
+        self.assertEqual(statistics.cycle_visits[4 + 1].tolist(), [1, 1, 0, 1, 0, 0])
+        self.assertAlmostEqual(RandomExcursionsVariantTest.state_p_values(statistics)[9], 0.683091, places=6)
+
+    def test_e_expansion(self):
+        """
+        Test the p-values of each state on the first million bits of e given in NIST SP 800-22 appendix B.
+        """
+        with(open("../test_data/e_bin_1000000", "rb")) as f:
+            bits = np.frombuffer(f.read().strip(), dtype=np.uint8) - ord("0")
+        statistics = compute_random_walk_statistics([bits[i:i + 100000] for i in range(0, len(bits), 100000)])
+        self.assertEqual(statistics.n_cycles, 1490)
+        np.testing.assert_allclose(RandomExcursionsTest.state_p_values(statistics),
+                                   [0.573306, 0.197996, 0.164011, 0.007779, 0.786868, 0.440912, 0.797854, 0.778186],
+                                   atol=1e-6)
+        np.testing.assert_allclose(RandomExcursionsVariantTest.state_p_values(statistics)[8:10],
+                                   [0.826009, 0.137861], atol=1e-6)
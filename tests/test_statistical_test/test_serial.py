@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
+from scipy.stats import chisquare
+
+from statistical_tests.statistical_tests.serial_test import OverlappingSerialTest, SerialTest, bucket_probabilities, \
+    default_buckets, fold_values, index_values, sparse_chisquare, tuple_codes
+from utils.data_type import DataType
+
+
+class TestSerial(TestCase):
+    """
+    Test of the tuple counting used by the serial tests.
+    """
+
+    def test_tuple_codes(self):
+        symbols, n_symbols = index_values(np.array([7, 3, 3, 9, 7], dtype=np.uint32))
+        self.assertEqual(symbols.tolist(), [1, 0, 0, 2, 1])
+        self.assertEqual(n_symbols, 3)
+        self.assertEqual(tuple_codes(symbols, n_symbols, 2).tolist(), [3, 0, 2, 7])
+        self.assertEqual(tuple_codes(symbols, n_symbols, 3).tolist(), [9, 2, 7])
+
+    def test_large_alphabet(self):
+        """
+        Test that sparse counting gives the dense p-value and that wide integers can be folded into buckets.
+        """
+        counts = np.bincount(np.random.default_rng(0).integers(0, 50, 3000), minlength=60)
+        self.assertAlmostEqual(sparse_chisquare(counts[counts > 0], 60), chisquare(counts).pvalue)
+
+        values = np.array([0, 2 ** 32 - 1, 2 ** 31, 2 ** 31 - 1], dtype=np.uint32)
+        self.assertEqual(fold_values(values, 4, 0, 2 ** 32 - 1).tolist(), [0, 3, 2, 1])
+
+        sample = DataSample(np.random.default_rng(0).integers(0, 2 ** 32, 10000, dtype=np.uint64), DataType.INT)
+        folded = SerialTest()
+        folded.run_test(sample, n_buckets=16)
+        self.assertEqual(len(folded.data), 256)
+        self.assertTrue(0 <= folded.test_output <= 1)
+
+        # Without n_buckets, the values are folded into as many buckets as there are pairs for
+        automatic = SerialTest()
+        automatic.run_test(sample)
+        self.assertEqual(automatic.n_buckets, default_buckets(10000))
+        self.assertEqual(automatic.n_cells, 44 ** 2)
+
+    def test_bucket_probabilities(self):
+        for low, high, n_buckets in [(0, 9, 7), (5, 304, 141), (-3, 96, 100), (0, 2, 5)]:
+            values = np.arange(low, high + 1)
+            expected = np.bincount(fold_values(values, n_buckets, low, high), minlength=n_buckets) / len(values)
+            np.testing.assert_allclose(bucket_probabilities(n_buckets, low, high), expected)
+        self.assertEqual(default_buckets(2 * 50 ** 2 * 5), 70)
+        self.assertEqual(default_buckets(3), 1)
+
+    def test_uniform_samples(self):
+        """
+        Test that the p-values of uniform samples with more distinct values than their pairs can fill are uniform, the
+        chi-square over all the pairs of distinct values gave p-values stuck to 0 or 1.
+        """
+        rng = np.random.default_rng(4)
+        for high in [300, 2 ** 32]:
+            p_values = []
+            for _ in range(50):
+                test = SerialTest()
+                test.run_test(DataSample(rng.integers(0, high, 2000), DataType.INT))
+                p_values.append(test.test_output)
+            p_values = np.array(p_values)
+            self.assertLessEqual(np.count_nonzero(p_values > 0.99), 2)
+            self.assertLessEqual(np.count_nonzero(p_values < 0.01), 2)
+
+
+class TestOverlappingSerial(TestCase):
+    """
+    Test of overlapping serial algorithm with NIST exemple test case.
+    """
+
+    def test_overlapping_serial(self):
+        bits = np.array([int(bit) for bit in "0011011101"], dtype=np.uint8)
+        test = OverlappingSerialTest()
+        test.run_test(DataSample.from_bits(bits), pattern_size=3)
+        self.assertEqual(test.counts.tolist(), [0, 1, 1, 2, 1, 2, 2, 1])
+        self.assertAlmostEqual(test.test_output, 0.808792, places=6)
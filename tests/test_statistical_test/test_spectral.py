@@ -1,5 +1,8 @@
 from unittest import TestCase
 
+import numpy as np
+
+from random_sample_tester.data_sample import DataSample
 from statistical_tests.statistical_tests.spectral_test import SpectralTest
 
 
@@ -22,4 +25,21 @@ class TestSpectralTestCase(TestCase):
             elif char == '1':
                 data_minus_one.append(1)
 
-        print(st.run_spectral_on_binary(data_minus_one, len(binary_string)))
\ No newline at end of file
+        print(st.run_spectral_on_binary(data_minus_one, len(binary_string)))
+
+    def test_segmented_spectral_test(self):
+        """
+        Test that a sample made of one segment gives the same result as the whole sample, and that segments are
+        counted.
+        """
+        bits = np.random.default_rng(0).integers(0, 2, 1 << 16, dtype=np.uint8)
+        sample = DataSample.from_bits(bits)
+
+        st = SpectralTest()
+        st.run_test(sample)
+        self.assertAlmostEqual(st.test_output, st.run_spectral_on_binary(bits.astype(np.int8) * 2 - 1, len(bits)))
+
+        segmented = SpectralTest()
+        segmented.run_test(sample, segment_size=1 << 12)
+        self.assertEqual(segmented.n_segments, 16)
+        self.assertTrue(0 <= segmented.test_output <= 1)
@@ -0,0 +1,39 @@
+from unittest import TestCase
+
+import numpy as np
+
+from statistical_tests.statistical_tests.template_matching_test import NonOverlappingTemplateTest, \
+    OverlappingTemplateTest, aperiodic_templates
+from utils.bit_conversion import window_codes
+
+
+def to_bits(bit_string):
+    return np.array([int(bit) for bit in bit_string], dtype=np.uint8)
+
+
+class TestTemplateMatching(TestCase):
+    """
+    Test of template matching algorithms with NIST exemple test cases.
+    """
+
+    def test_aperiodic_templates(self):
+        self.assertEqual(aperiodic_templates(3), [0b001, 0b011, 0b100, 0b110])
+        self.assertEqual(len(aperiodic_templates(9)), 148)
+
+    def test_non_overlapping_template(self):
+        bits = to_bits("10100100101110010110")
+        p_values = NonOverlappingTemplateTest.run_template_matching(window_codes(bits, 3), len(bits), 3, [0b001],
+                                                                    n_blocks=2)
+        self.assertAlmostEqual(p_values[0], 0.344154, places=6)
+
+    def test_overlapping_template(self):
+        probabilities = OverlappingTemplateTest.occurrence_probabilities(10, 2)
+        self.assertAlmostEqual(probabilities[0], 0.324652, places=6)
+        self.assertAlmostEqual(probabilities[5], 0.166269, places=5)
+        # Chi-squared of the NIST example is 3.167729, whose p-value with 5 degrees of freedom is 0.674147
+        self.assertAlmostEqual(OverlappingTemplateTest.classes_p_value([0, 1, 1, 1, 1, 1], probabilities), 0.674147,
+                               places=6)
+        # Occurrences per block are 5, 1, 3, 4 and 1
+        bits = to_bits("10111011110010110100011100101110111110000101101001")
+        p_value = OverlappingTemplateTest.run_overlapping_template(window_codes(bits, 2), len(bits), 2, 10)
+        self.assertAlmostEqual(p_value, OverlappingTemplateTest.classes_p_value([0, 2, 0, 1, 1, 1], probabilities))
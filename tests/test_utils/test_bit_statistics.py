@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+import numpy as np
+
+from utils.bit_statistics import BitStatistics, compute_bit_statistics, longest_runs
+
+
+class TestBitStatistics(TestCase):
+
+    def test_longest_runs(self):
+        blocks = np.array([[1, 1, 0, 1, 1, 1], [0, 0, 0, 0, 0, 0], [1, 1, 1, 1, 1, 1]], dtype=np.uint8)
+        self.assertEqual(longest_runs(blocks).tolist(), [3, 0, 6])
+
+    def test_chunks(self):
+        """
+        Test that statistics do not depend on how the sequence is split in chunks.
+        """
+        bits = np.random.default_rng(0).integers(0, 2, 100000, dtype=np.uint8)
+        whole = compute_bit_statistics([bits], len(bits))
+        chunked = compute_bit_statistics([bits[i:i + 777] for i in range(0, len(bits), 777)], len(bits))
+
+        walk = np.cumsum(bits.astype(np.int64) * 2 - 1)
+        self.assertEqual(whole.n_ones, int(bits.sum()))
+        self.assertEqual(whole.n_runs, int(np.count_nonzero(np.diff(bits))) + 1)
+        self.assertEqual((whole.max_sum, whole.min_sum), (walk.max(), walk.min()))
+        for statistics in [whole, chunked]:
+            self.assertIsInstance(statistics, BitStatistics)
+            for name in ["n_bits", "n_ones", "n_runs", "final_sum", "max_sum", "min_sum", "max_prefix_sum",
+                         "min_prefix_sum"]:
+                self.assertEqual(getattr(statistics, name), getattr(whole, name))
+            expected_ones = bits[:len(bits) // 128 * 128].reshape(-1, 128).sum(axis=1)
+            self.assertEqual(statistics.block_ones.tolist(), expected_ones.tolist())
+            self.assertEqual(statistics.longest_runs.tolist(), whole.longest_runs.tolist())
@@ -0,0 +1,46 @@
+import csv
+import os
+import tempfile
+from unittest import TestCase
+
+from random_sample_tester.generate_reports import ReportWriter
+
+
+def _report(test_name, p_value, status):
+    return {"test_name": test_name, "n_sample": 100, "p_value": p_value,
+            "criterias": "0 -KO- 0.01 -SUSPECT- 0.05 -OK- 0.95 -SUSPECT- 0.99 -KO- 1", "status": status}
+
+
+class TestReportWriter(TestCase):
+
+    def test_write(self):
+        """
+        Test that the reports are written to the file as soon as they are given, and summarized once closed.
+        """
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                writer = ReportWriter("file")
+                csv_path = os.path.join(writer.output_dir, f"{writer.time_str}-statistical_results.csv")
+                writer.write("a.txt", [_report("Run test", 0.5, "OK"), _report("Sign test", None, "N/A")])
+                with open(csv_path) as file:
+                    self.assertEqual(len(list(csv.DictReader(file))), 2)
+                writer.write("b.txt", [_report("Run test", 0.001, "KO"),
+                                       dict(_report("Sign test", 0.3, "OK"), period=7, position=None)])
+                writer.close(1.0)
+                # A run started in the same second writes to another directory
+                self.assertNotEqual(ReportWriter("file").output_dir, writer.output_dir)
+
+                with open(csv_path) as file:
+                    rows = list(csv.DictReader(file))
+                self.assertEqual([row["test_name"] for row in rows], ["Run test", "Sign test"] * 2)
+                self.assertEqual(rows[1]["p_value"], "")
+                self.assertEqual([row["details"] for row in rows], ["", "", "", "period=7; position=None"])
+                with open(os.path.join(writer.output_dir, f"{writer.time_str}-summary.txt")) as file:
+                    summary = file.read()
+                self.assertIn("- a.txt\n- b.txt\n", summary)
+                self.assertEqual(writer.status_counts, {"Run test": {"OK": 1, "SUSPECT": 0, "KO": 1},
+                                                        "Sign test": {"OK": 1, "SUSPECT": 0, "KO": 0}})
+            finally:
+                os.chdir(cwd)
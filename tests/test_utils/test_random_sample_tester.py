@@ -1,7 +1,22 @@
+import multiprocessing
+import os
+import queue
+import tempfile
+from multiprocessing import shared_memory
 from unittest import TestCase
 
-from random_sample_tester.random_sample_tester import RandomSampleTester, RandomSample
+import numpy as np
+
+from random_sample_tester.random_sample_tester import DataSample, RandomSampleTester, RandomSample
+from random_sample_tester import batch, scheduler
+from random_sample_tester.cost_model import CostModel
 from utils.data_type import DataType
+from statistical_tests.statistical_tests import load_tests
+from utils.integer_parser import parse_integers
+
+STREAMING_TESTS = ["chi2", "serial", "run", "sign", "binary_matrix", "compression", "spectral", "overlapping_serial",
+                   "block_frequency", "cumulative_sums", "longest_run", "random_excursions",
+                   "random_excursions_variant", "autocorrelation"]
 
 
 class TestRandomSample(TestCase):
@@ -14,5 +29,217 @@ class TestRandomSample(TestCase):
 
         rs.get_data("../test_data/int_sep.txt", "int", ",")
 
-        self.assertTrue(rs.data.data)
-        self.assertEqual(rs.data.data_type, DataType.INT)
\ No newline at end of file
+        self.assertTrue(len(rs.data.data))
+        self.assertEqual(rs.data.data_type, DataType.INT)
+
+    def test_get_data_separator_detection(self):
+        """
+        Test the integer parser on a file mixing separators, parsed in blocks smaller than the file.
+        """
+        with open("../test_data/int_sep.txt", "r") as f:
+            expected = [int(value) for value in f.read().strip().split(",")]
+
+        rs = RandomSample()
+        rs.get_data("../test_data/int_sep.txt", "int", "auto")
+        self.assertEqual(rs.data.data.tolist(), expected)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "mixed_sep.txt")
+            with open(path, "w") as f:
+                f.write("12,345;6 78\n9\r\n1011 ,\t12;\n")
+            self.assertEqual(parse_integers(path, chunk_size=4).tolist(), [12, 345, 6, 78, 9, 1011, 12])
+            self.assertEqual(parse_integers(path).tolist(), [12, 345, 6, 78, 9, 1011, 12])
+    def test_get_data_bits(self):
+        """
+        Test that bit samples are stored packed and that the derived views are consistent.
+        """
+        rs = RandomSample()
+
+        rs.get_data("../test_data/e_binary_extention", "bits", "\\n")
+
+        with open("../test_data/e_binary_extention", "r") as f:
+            bit_string = f.read().splitlines()[0]
+
+        self.assertEqual(rs.data.data_type, DataType.BITSTRING)
+        self.assertEqual(rs.data.n_bits, len(bit_string))
+        self.assertEqual(len(rs.data.packed_bits()), (len(bit_string) + 7) // 8)
+        self.assertEqual(rs.data.bit_string(), bit_string)
+        self.assertEqual(list(rs.data.signs()[:8]), [1 if char == "1" else -1 for char in bit_string[:8]])
+        self.assertIs(rs.data.bits(), rs.data.bits())
+
+    def test_integer_bits(self):
+        """
+        Test the expansion of an integer sample into bits.
+        Values are shifted to [1, 31], only the [1, 16] ones are kept and written on 4 bits.
+        """
+        sample = DataSample([0, 3, 15, 30, 16], DataType.INT)
+
+        self.assertEqual(sample.bit_string(), "0000" "0011" "1111")
+        self.assertEqual(sample.n_bits, 12)
+        self.assertIs(sample.bits(), sample.bits())
+
+    def test_window_codes(self):
+        """
+        Test the index of the windows of a sample, shared by the tests asking for the same windows.
+        """
+        sample = DataSample.from_bits(np.array([1, 0, 1, 1, 0, 0, 1], dtype=np.uint8))
+
+        self.assertEqual(sample.window_codes(3).tolist(), [5, 3, 6, 4, 1])
+        self.assertEqual(sample.window_codes(3, overlapping=False).tolist(), [5, 4])
+        self.assertIs(sample.window_codes(3), sample.window_codes(3))
+        self.assertEqual(sample.window_codes(8).tolist(), [])
+
+    def test_get_data_bytes(self):
+        """
+        Test that bytes samples are mapped from the file and unpacked chunk by chunk.
+        """
+        rs = RandomSample()
+        content = bytes(range(256)) * 4
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "bytes_sample")
+            with open(path, "wb") as f:
+                f.write(content)
+
+            rs.get_data(path, "bytes", "\\n")
+
+            self.assertEqual(rs.data.data_type, DataType.BITSTRING)
+            self.assertEqual(rs.data.n_bits, len(content) * 8)
+            self.assertEqual(rs.data.bit_string(), RandomSample.transform_bytes_to_bits(content))
+            self.assertEqual(rs.data.bit_string()[:16], "0000000000000001")
+            chunks = list(rs.data.iter_bits(chunk_size=1000 * 8))
+            self.assertEqual([len(chunk) for chunk in chunks], [8000, 192])
+            del rs
+
+
+class TestRandomSampleTester(TestCase):
+
+    def _run(self, path, data_code, streaming, tests=STREAMING_TESTS):
+        load_tests()
+        rst = RandomSampleTester()
+        if streaming:
+            rst.open_stream(path, data_code, "auto", chunk_size=1001)
+            rst.register_tests_for_run(tests)
+            rst.run_tests_streaming(queue.Queue())
+        else:
+            rst.get_data(path, data_code, "auto")
+            rst.register_tests_for_run(tests)
+            rst.run_tests(queue.Queue())
+        return {result["test_name"]: result["p_value"] for result in rst.test_results}
+
+    def test_streaming(self):
+        """
+        Test that streaming a sample chunk by chunk gives the same results as loading it.
+        """
+        for path, data_code in [("../test_data/e_binary_extention", "bits"), ("../test_data/int_sep.txt", "int")]:
+            in_memory = self._run(path, data_code, False)
+            streamed = self._run(path, data_code, True)
+            self.assertEqual(in_memory.keys(), streamed.keys())
+            for test_name, p_value in in_memory.items():
+                if p_value is None:
+                    self.assertIsNone(streamed[test_name])
+                else:
+                    self.assertAlmostEqual(p_value, streamed[test_name], places=10)
+
+    def test_scheduler(self):
+        """
+        Test that scheduling the tests of several files on a pool gives the same results as running them one by one.
+        """
+        load_tests()
+        tests = STREAMING_TESTS + ["non_overlapping_template", "overlapping_template", "approximate_entropy", "period",
+                                   "birthday_spacings", "gap", "poker", "opso"]
+        paths = ["../test_data/int_sep.txt", "../test_data/int_sep.txt"]
+        manager = multiprocessing.Manager()
+        with multiprocessing.Pool(processes=2) as pool:
+            results = scheduler.TestScheduler(pool, 2, tests, "int", "auto", manager.Queue()).run(paths)
+        manager.shutdown()
+
+        expected = self._run(paths[0], "int", False, tests)
+        for file_results in results:
+            self.assertEqual({result["test_name"]: result["p_value"] for result in file_results}, expected)
+
+    def test_shared_sample(self):
+        """
+        Test that a worker task does not keep the shared sample mapped, and that the block is freed once released.
+        """
+        load_tests()
+        shared = scheduler.SharedSample.create("../test_data/int_sep.txt", "int", "auto")
+        event = scheduler.run_test_task(0, 0, shared, "chi2", queue.Queue())
+        self.assertEqual(event[4]["test_name"], "Chi-square goodness of fit")
+        shared.release()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared.name)
+
+    def test_run_unordered(self):
+        """
+        Test that files read along the run with a single queued file are all tested once, and that bounded tasks give
+        all their results.
+        """
+        load_tests()
+        tests = ["chi2", "serial", "run"]
+        paths = ["../test_data/int_sep.txt"] * 5
+        manager = multiprocessing.Manager()
+        with multiprocessing.Pool(processes=2) as pool:
+            test_scheduler = scheduler.TestScheduler(pool, 2, tests, "int", "auto", manager.Queue())
+            test_scheduler.max_queued_files = 1
+            results = list(test_scheduler.run_unordered(iter(paths)))
+            squares = scheduler.imap_unordered_bounded(pool, pow, ((value, 2) for value in range(20)), 3)
+            self.assertEqual(sorted(squares), [value ** 2 for value in range(20)])
+        manager.shutdown()
+
+        self.assertEqual(sorted(file_index for file_index, _, _ in results), list(range(len(paths))))
+        expected = self._run(paths[0], "int", False, tests)
+        for _, path, file_results in results:
+            self.assertEqual(path, paths[0])
+            self.assertEqual({result["test_name"]: result["p_value"] for result in file_results}, expected)
+
+    def test_batch(self):
+        """
+        Test that running the tests on groups of equal-sized files gives the same results as running them one by one,
+        batches being run once full or when no more file can be loaded to complete them.
+        """
+        load_tests()
+        tests = ["chi2", "serial", "run", "sign", "spectral", "period"]
+        rng = np.random.default_rng(3)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for file_index, size in enumerate([300, 300, 250, 300, 300, 250]):
+                paths.append(os.path.join(directory, f"sample_{file_index}.txt"))
+                with open(paths[-1], "w") as file:
+                    file.write(",".join(str(value) for value in rng.integers(0, 50, size)))
+            manager = multiprocessing.Manager()
+            with multiprocessing.Pool(processes=2) as pool:
+                results = batch.run_with_batches(pool, 2, paths, tests, "int", "auto", manager.Queue(), batch_files=3)
+                self.assertEqual(results, batch.run_with_batches(pool, 2, paths, tests, "int", "auto",
+                                                                 manager.Queue()))
+            manager.shutdown()
+
+            for path, file_results in zip(paths, results):
+                load_tests()
+                rst = RandomSampleTester()
+                rst.get_data(path, "int", "auto")
+                rst.register_tests_for_run(tests)
+                rst.run_tests(queue.Queue())
+                self.assertEqual([result["test_name"] for result in file_results],
+                                 [result["test_name"] for result in rst.test_results])
+                for result, expected in zip(file_results, rst.test_results):
+                    self.assertEqual(result["n_sample"], expected["n_sample"])
+                    self.assertAlmostEqual(result["p_value"], expected["p_value"], places=10)
+
+    def test_cost_model(self):
+        """
+        Test that the cost model is calibrated with measured running times and kept between runs.
+        """
+        load_tests()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cost_model.json")
+            cost_model = CostModel(path)
+            for _ in range(30):
+                cost_model.record("chi2", DataType.BITSTRING, 1000, 2.0)
+            self.assertAlmostEqual(cost_model.estimate("chi2", DataType.BITSTRING, 2000), 4.0)
+            cost_model.save()
+
+            saved = CostModel(path)
+            self.assertAlmostEqual(saved.estimate("chi2", DataType.BITSTRING, 1000), 2.0)
+            self.assertGreater(saved.estimate("linear_complexity", DataType.BITSTRING, 1000),
+                               saved.estimate("run", DataType.BITSTRING, 1000))
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from random_sample_tester import scheduler
+from random_sample_tester.result_cache import ResultCache
+from statistical_tests.statistical_tests import load_tests
+
+
+class TestResultCache(TestCase):
+
+    def test_get_put(self):
+        load_tests()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sample.txt")
+            with open(path, "w") as file:
+                file.write("1,2,3")
+            cache = ResultCache(os.path.join(directory, "cache", "results.sqlite"))
+            digest = cache.digest(path)
+            self.assertIsNone(cache.get(digest, "int", "auto", "chi2"))
+            cache.put(digest, "int", "auto", "chi2", {"test_name": "Chi-square goodness of fit", "p_value": 0.5})
+            self.assertEqual(cache.get(digest, "int", "auto", "chi2")["p_value"], 0.5)
+            self.assertIsNone(cache.get(digest, "bits", "auto", "chi2"))
+            self.assertIsNone(cache.get(digest, "int", "auto", "serial"))
+            cache.close()
+
+            # Reports are kept between runs, and forgotten once the content of the file changes
+            cache = ResultCache(os.path.join(directory, "cache", "results.sqlite"))
+            self.assertEqual(cache.lookup(path, "int", "auto", ["chi2", "serial"])[1].keys(), {"chi2"})
+            with open(path, "w") as file:
+                file.write("1,2,4")
+            self.assertEqual(cache.lookup(path, "int", "auto", ["chi2", "serial"])[1], {})
+            cache.close()
+
+    def test_evict(self):
+        load_tests()
+        cache = ResultCache(":memory:", max_age=3600, max_size=250)
+        for index in range(5):
+            cache.put(f"digest_{index}", "int", "auto", "chi2", {"p_value": index, "padding": "x" * 50})
+        cache.connection.execute("UPDATE reports SET last_used = ? WHERE digest = 'digest_0'", (time.time() - 7200,))
+        cache.evict()
+        kept = [index for index in range(5) if cache.get(f"digest_{index}", "int", "auto", "chi2") is not None]
+        # The oldest report is too old, the least recently used of the others exceed the size limit
+        self.assertEqual(kept, [2, 3, 4])
+
+    def test_scheduler(self):
+        """
+        Test that cached reports are served instead of running the tests again.
+        """
+        load_tests()
+        tests = ["chi2", "run"]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(os.path.join(directory, "results.sqlite"))
+            paths = ["../test_data/int_sep.txt"]
+            manager = multiprocessing.Manager()
+            with multiprocessing.Pool(processes=2) as pool:
+                first = scheduler.TestScheduler(pool, 2, tests, "int", "auto", manager.Queue(),
+                                                result_cache=cache).run(paths)
+                digest = cache.digest(paths[0])
+                cached = dict(first[0][1], p_value=0.123)
+                cache.put(digest, "int", "auto", "run", cached)
+                second = scheduler.TestScheduler(pool, 2, tests, "int", "auto", manager.Queue(),
+                                                 result_cache=cache).run(paths)
+            manager.shutdown()
+            cache.close()
+        self.assertEqual(second[0][0], first[0][0])
+        self.assertEqual(second[0][1], cached)
@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from random_sample_tester import scheduler
+from random_sample_tester.random_sample_tester import RandomSample
+from random_sample_tester.sample_cache import load_sample, sample_cache_path
+from statistical_tests.statistical_tests import load_tests
+from utils.data_type import DataType
+
+
+class TestSampleCache(TestCase):
+
+    def test_integers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            expected = RandomSample()
+            expected.get_data("../test_data/int_sep.txt", "int", "auto")
+            for _ in range(2):
+                rs = RandomSample()
+                rs.get_data("../test_data/int_sep.txt", "int", "auto", directory)
+                self.assertIsNotNone(rs.cache_path)
+                self.assertEqual(rs.data.data.dtype, expected.data.data.dtype)
+                self.assertTrue(np.array_equal(rs.data.data, expected.data.data))
+            # The second sample is mapped from the cache
+            self.assertIsInstance(rs.data.data, np.memmap)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_bits(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bits.txt")
+            bits = np.random.default_rng(0).integers(0, 2, 1003, dtype=np.uint8)
+            with open(path, "w") as file:
+                file.write("".join(str(bit) for bit in bits))
+            cache_dir = os.path.join(directory, "cache")
+            for _ in range(2):
+                rs = RandomSample()
+                rs.get_data(path, "bits", "auto", cache_dir)
+                self.assertEqual(rs.data.n_bits, 1003)
+                self.assertTrue(np.array_equal(rs.data.bits(), bits))
+
+            # A modified file is parsed again and replaces its previous version in the cache
+            with open(path, "w") as file:
+                file.write("0110")
+            cache_path = sample_cache_path(cache_dir, path, "bits", "auto")
+            self.assertIsNone(load_sample(cache_path, DataType.BITSTRING))
+            rs = RandomSample()
+            rs.get_data(path, "bits", "auto", cache_dir)
+            self.assertEqual(rs.data.bits().tolist(), [0, 1, 1, 0])
+            self.assertEqual(os.listdir(cache_dir), [os.path.basename(cache_path)])
+
+    def test_scheduler(self):
+        """
+        Test that the tests give the same results on a sample mapped from the cache.
+        """
+        load_tests()
+        tests = ["chi2", "serial", "spectral", "period"]
+        paths = ["../test_data/int_sep.txt"]
+        manager = multiprocessing.Manager()
+        with tempfile.TemporaryDirectory() as directory, multiprocessing.Pool(processes=2) as pool:
+            expected = scheduler.TestScheduler(pool, 2, tests, "int", "auto", manager.Queue()).run(paths)
+            for _ in range(2):
+                results = scheduler.TestScheduler(pool, 2, tests, "int", "auto", manager.Queue(),
+                                                  sample_cache_dir=directory).run(paths)
+                self.assertEqual(results, expected)
+        manager.shutdown()
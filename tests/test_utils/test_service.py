@@ -0,0 +1,47 @@
+import queue
+import threading
+from http.server import HTTPServer
+from unittest import TestCase
+
+from random_sample_tester.random_sample_tester import RandomSampleTester
+from random_sample_tester import service
+from statistical_tests.statistical_tests import load_tests
+
+
+class TestService(TestCase):
+
+    def test_run(self):
+        """
+        Test that the service gives the same results for a file given by its path or sent to it.
+        """
+        load_tests()
+        tests = ["chi2", "serial", "run", "sign"]
+        server = HTTPServer(("127.0.0.1", 0), service.ServiceRequestHandler)
+        server.service = service.TestService(n_cores=1)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}"
+            paths = ["../test_data/int_sep.txt", "../test_data/int_sep.txt"]
+            by_path = service.request_run(url, paths, tests, "int", "auto")
+            uploaded = service.request_run(url, paths[:1], tests, "int", "auto", upload=True)
+            with self.assertRaisesRegex(service.ServiceError, "FileNotFoundError"):
+                service.request_run(url, ["../test_data/missing.txt"], tests, "int", "auto")
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+            server.service.close()
+        with self.assertRaisesRegex(service.ServiceError, "cannot be reached"):
+            service.request_run(url, paths, tests, "int", "auto")
+
+        rst = RandomSampleTester()
+        rst.get_data(paths[0], "int", "auto")
+        rst.register_tests_for_run(tests)
+        rst.run_tests(queue.Queue())
+        expected = [(result["test_name"], result["p_value"]) for result in rst.test_results]
+        self.assertEqual(len(by_path), 2)
+        for file_results in by_path + uploaded:
+            self.assertEqual([result["test_name"] for result in file_results], [name for name, _ in expected])
+            for result, (_, p_value) in zip(file_results, expected):
+                self.assertAlmostEqual(result["p_value"], p_value, places=10)
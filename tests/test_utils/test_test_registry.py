@@ -0,0 +1,38 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+from statistical_tests.statistical_test import TestRegistry
+from statistical_tests.statistical_tests import TEST_MANIFEST, declare_tests, load_tests
+
+
+class TestTestRegistry(TestCase):
+
+    def test_manifest_matches_registrations(self):
+        load_tests()
+        available_tests = TestRegistry.get_available_tests()
+        self.assertEqual(set(TEST_MANIFEST), set(available_tests))
+        for test_name, (module, data_types) in TEST_MANIFEST.items():
+            test_cls, registered_types = available_tests[test_name]
+            self.assertEqual(test_cls.__module__.rsplit(".", 1)[1], module)
+            self.assertEqual(registered_types, data_types)
+
+    def test_declared_tests_are_imported_lazily(self):
+        # A fresh interpreter is needed, the tests of this process may already be imported
+        code = ("import sys\n"
+                "from statistical_tests.statistical_test import TestRegistry\n"
+                "from statistical_tests.statistical_tests import declare_tests\n"
+                "declare_tests()\n"
+                "assert 'statistical_tests.statistical_tests.chi2_test' not in sys.modules\n"
+                "assert 'chi2' in TestRegistry.get_test_names()\n"
+                "test_cls = TestRegistry.get_test_class('chi2')\n"
+                "assert test_cls.__name__ == 'Chi2Test', test_cls\n"
+                "assert 'statistical_tests.statistical_tests.serial_test' not in sys.modules\n")
+        subprocess.run([sys.executable, "-c", code], check=True, cwd="../..")
+
+    def test_undeclared_registered_tests(self):
+        declare_tests()
+        load_tests()
+        names = TestRegistry.get_test_names()
+        self.assertEqual(names[:len(TEST_MANIFEST)], list(TEST_MANIFEST))
+        self.assertEqual(len(names), len(set(names)))
@@ -0,0 +1,133 @@
+"""
+Helpers converting between the different representations of a bit sequence.
+"""
+import numpy as np
+
+
+def bit_string_to_array(bit_string):
+    """
+    Transform a string of '0' and '1' characters into an array of bits.
+    :param bit_string: string of bits (0 and 1)
+    :return: uint8 array holding one bit per element
+    """
+    return np.frombuffer(bit_string.encode("ascii"), dtype=np.uint8) - ord("0")
+
+
+def bit_array_to_string(bits):
+    """
+    Transform an array of bits into a string of '0' and '1' characters.
+    :param bits: uint8 array holding one bit per element
+    :return: string of bits (0 and 1)
+    """
+    return (np.asarray(bits, dtype=np.uint8) + ord("0")).tobytes().decode("ascii")
+
+
+def to_bit_array(bits):
+    """
+    Accept a bit sequence in any supported representation (string, list or array) and return it as an uint8 array.
+    :param bits: bit sequence
+    :return: uint8 array holding one bit per element
+    """
+    if isinstance(bits, str):
+        return bit_string_to_array(bits)
+    return np.asarray(bits, dtype=np.uint8)
+
+
+def integer_bit_range(min_value, max_value):
+    """
+    Compute how integers in [min_value, max_value] are written as bits. Integer data starting at 0 is shifted by one
+    and the biggest [1, 2^n] interval is kept.
+    :param min_value: smallest integer of the sample
+    :param max_value: biggest integer of the sample
+    :return: (shift, exponent) tuple
+    """
+    shift = 1 if min_value == 0 else 0
+    return shift, (max_value + shift).bit_length() - 1
+
+
+def integer_bit_lengths(values):
+    """
+    Compute the number of bits needed to write each integer.
+    :param values: non negative integers (up to 64 bits)
+    :return: int64 array of bit lengths
+    """
+    values = np.asarray(values).astype(np.uint64)
+    lengths = np.frexp(values.astype(np.float64))[1].astype(np.int64)
+    # Above 2^53 the float conversion may round up to the next power of two
+    rounded_up = (lengths > 53) & ((values >> (lengths - 1).astype(np.uint64)) == 0)
+    return lengths - rounded_up
+
+
+def count_integer_bits(values, bit_range=None):
+    """
+    Compute the number of bits integers_to_bits produces without expanding the integers.
+    :param values: non negative integers (up to 64 bits)
+    :param bit_range: (shift, exponent) tuple computed on the whole sample when values are only a part of it
+    :return: number of bits
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return 0
+    if bit_range is None:
+        bit_range = integer_bit_range(int(values.min()), int(values.max()))
+    shift, exponent = bit_range
+    limit = (1 << exponent) - shift
+    if limit < np.iinfo(values.dtype).max:
+        return int(np.count_nonzero(values <= limit)) * exponent
+    return len(values) * exponent
+
+
+def integers_to_bits(values, bit_range=None, chunk_size=1 << 20):
+    """
+    Transform integer data into equally probable bits. Biggest existing [1, 2^n] interval is taken from the data set
+    and integers are stacked in their n bits binary form. Integer data starting at 0 is shifted by one.
+    :param values: non negative integers (up to 64 bits)
+    :param bit_range: (shift, exponent) tuple computed on the whole sample when values are only a part of it
+    :param chunk_size: number of integers expanded at once, bounds the temporary memory used
+    :return: uint8 array holding one bit per element
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.uint8)
+
+    if bit_range is None:
+        bit_range = integer_bit_range(int(values.min()), int(values.max()))
+    shift, exponent = bit_range
+
+    # Values kept are those in [1, 2^exponent] once shifted, they are written as value - 1 on exponent bits.
+    limit = (1 << exponent) - shift
+    if limit < np.iinfo(values.dtype).max:
+        values = values[values <= limit]
+    values = values.astype(np.uint64)
+    if not shift:
+        values -= np.uint64(1)
+
+    bits = np.empty(len(values) * exponent, dtype=np.uint8)
+    for start in range(0, len(values), chunk_size):
+        block = values[start:start + chunk_size]
+        # Big endian bytes unpacked give the 64 bits of each integer, we keep the exponent lowest ones.
+        expanded = np.unpackbits(block.astype(">u8").view(np.uint8).reshape(-1, 8), axis=1)
+        bits[start * exponent:(start + len(block)) * exponent] = expanded[:, 64 - exponent:].ravel()
+    return bits
+
+
+def window_codes(bits, m, overlapping=True):
+    """
+    Compute the integer code of each m bits window of a bit sequence, its first bit being the most significant.
+    :param bits: uint8 array holding one bit per element
+    :param m: number of bits per window
+    :param overlapping: windows start at every bit when True, they are consecutive blocks of m bits otherwise
+    :return: array of codes, of the smallest unsigned type holding m bits
+    """
+    dtype = np.uint8 if m <= 8 else np.uint16 if m <= 16 else np.uint32 if m <= 32 else np.uint64
+    if overlapping:
+        n_windows = max(len(bits) - m + 1, 0)
+        columns = [bits[i:i + n_windows] for i in range(m)]
+    else:
+        blocks = bits[:len(bits) - len(bits) % m].reshape(-1, m)
+        columns = [blocks[:, i] for i in range(m)]
+    codes = np.zeros(len(columns[0]) if columns else 0, dtype=dtype)
+    for column in columns:
+        codes <<= dtype(1)
+        codes |= column
+    return codes
@@ -0,0 +1,129 @@
+"""
+Single pass computation of the frequency statistics of a bit sequence shared by several statistical tests.
+"""
+import numpy as np
+
+# Number of bits per block of the block frequency test
+BLOCK_FREQUENCY_SIZE = 128
+
+# (minimum number of bits, block size) of the longest run of ones test, from NIST SP 800-22 section 2.4
+LONGEST_RUN_BLOCK_SIZES = [(750000, 10000), (6272, 128), (128, 8)]
+
+
+def longest_run_block_size(n_bits):
+    """
+    Choose the block size of the longest run of ones test from the number of bits.
+    :param n_bits: number of bits of the sample
+    :return: block size, 0 if the sample is too short
+    """
+    for min_bits, block_size in LONGEST_RUN_BLOCK_SIZES:
+        if n_bits >= min_bits:
+            return block_size
+    return 0
+
+
+def longest_runs(blocks):
+    """
+    Compute the longest run of ones of each block.
+    :param blocks: (number of blocks, block size) array of bits
+    :return: int64 array of the longest run of each block
+    """
+    n_blocks, block_size = blocks.shape
+    # Blocks are separated by zeros so that runs never go from one block to the next
+    padded = np.zeros((n_blocks, block_size + 2), dtype=np.int8)
+    padded[:, 1:-1] = blocks
+    edges = np.diff(padded.ravel())
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    longest = np.zeros(n_blocks, dtype=np.int64)
+    np.maximum.at(longest, starts // (block_size + 2), ends - starts)
+    return longest
+
+
+class BitStatistics:
+    """
+    Statistics of a bit sequence computed chunk by chunk in a single pass: number of ones, number of runs, ones per
+    block, extremes of the cumulative sums of the +1/-1 sequence and longest run of ones per block.
+    """
+
+    def __init__(self, n_bits, block_size=BLOCK_FREQUENCY_SIZE):
+        """
+        :param n_bits: number of bits of the whole sequence, used to choose the block size of the longest runs
+        :param block_size: number of bits per block of the block frequency counts
+        """
+        self.n_bits = 0
+        self.n_ones = 0
+        self.n_runs = 0
+        self.block_size = block_size
+        self._block_ones = []
+        self.run_block_size = longest_run_block_size(n_bits)
+        self.longest_runs = np.zeros(self.run_block_size + 1, dtype=np.int64)
+        # Cumulative sums S_k for k in [1, n], and for k in [0, n - 1] for the backward mode
+        self.final_sum = 0
+        self.max_sum, self.min_sum = None, None
+        self.max_prefix_sum, self.min_prefix_sum = 0, 0
+        self._last_bit = None
+        self._carry = {}
+
+    def _complete_blocks(self, name, bits, block_size):
+        """
+        Add bits to the incomplete block left by the previous chunk and return the complete blocks.
+        """
+        if block_size == 0:
+            return np.zeros((0, 1), dtype=np.uint8)
+        bits = np.concatenate([self._carry.get(name, np.zeros(0, dtype=np.uint8)), bits])
+        end = len(bits) - len(bits) % block_size
+        self._carry[name] = bits[end:]
+        return bits[:end].reshape(-1, block_size)
+
+    def update(self, bits):
+        """
+        Add the next bits of the sequence.
+        :param bits: uint8 array holding one bit per element
+        """
+        if len(bits) == 0:
+            return
+        self.n_bits += len(bits)
+        self.n_ones += int(np.count_nonzero(bits))
+
+        self.n_runs += int(np.count_nonzero(bits[1:] != bits[:-1]))
+        if self._last_bit is None or self._last_bit != bits[0]:
+            self.n_runs += 1
+        self._last_bit = bits[-1]
+
+        sums = np.cumsum(bits.astype(np.int64) * 2 - 1) + self.final_sum
+        self.max_prefix_sum = max(self.max_prefix_sum, self.final_sum, int(sums[:-1].max(initial=self.final_sum)))
+        self.min_prefix_sum = min(self.min_prefix_sum, self.final_sum, int(sums[:-1].min(initial=self.final_sum)))
+        self.max_sum = int(sums.max()) if self.max_sum is None else max(self.max_sum, int(sums.max()))
+        self.min_sum = int(sums.min()) if self.min_sum is None else min(self.min_sum, int(sums.min()))
+        self.final_sum = int(sums[-1])
+
+        blocks = self._complete_blocks("frequency", bits, self.block_size)
+        self._block_ones.append(np.count_nonzero(blocks, axis=1))
+
+        blocks = self._complete_blocks("longest_run", bits, self.run_block_size)
+        if len(blocks):
+            self.longest_runs += np.bincount(longest_runs(blocks), minlength=self.run_block_size + 1)
+
+    @property
+    def block_ones(self):
+        """
+        :return: number of ones of each complete block of block_size bits
+        """
+        if len(self._block_ones) > 1:
+            self._block_ones = [np.concatenate(self._block_ones)]
+        return self._block_ones[0] if self._block_ones else np.zeros(0, dtype=np.int64)
+
+
+def compute_bit_statistics(chunks, n_bits, block_size=BLOCK_FREQUENCY_SIZE):
+    """
+    Compute the statistics of a bit sequence given chunk by chunk.
+    :param chunks: iterable of uint8 arrays holding one bit per element
+    :param n_bits: number of bits of the whole sequence
+    :param block_size: number of bits per block of the block frequency counts
+    :return: BitStatistics
+    """
+    statistics = BitStatistics(n_bits, block_size)
+    for bits in chunks:
+        statistics.update(bits)
+    return statistics
@@ -0,0 +1,67 @@
+"""
+Helpers shared by the statistical tests working on the integers themselves rather than on their bits.
+"""
+import numpy as np
+from scipy.stats import chi2
+
+# Smallest expected count of a class of a chi-square test, smaller classes are merged with their neighbours
+MIN_EXPECTED = 5
+
+
+def integer_symbols(values):
+    """
+    Offset integers so that they start from 0, the sample being assumed uniform over [min, max].
+    :param values: array of integers
+    :return: (uint64 array of symbols, alphabet size max - min + 1)
+    """
+    values = np.asarray(values)
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.uint64), 0
+    low, high = int(values.min()), int(values.max())
+    return (values - values.dtype.type(low)).astype(np.uint64), high - low + 1
+
+
+def reduce_alphabet(symbols, alphabet_size, max_letters):
+    """
+    Map uniform symbols to at most max_letters uniform letters, each letter standing for the same number of symbols.
+    Symbols left over by the division are dropped.
+    :param symbols: uint64 array of symbols in [0, alphabet_size)
+    :param alphabet_size: number of possible symbols
+    :param max_letters: largest number of letters
+    :return: (uint64 array of letters, number of letters)
+    """
+    if alphabet_size <= max_letters:
+        return symbols, alphabet_size
+    group = -(-alphabet_size // max_letters)
+    n_letters = alphabet_size // group
+    symbols = symbols[symbols < np.uint64(n_letters * group)]
+    return symbols // np.uint64(group), n_letters
+
+
+def merged_chisquare(observed, probabilities):
+    """
+    Chi-square goodness of fit test where consecutive classes are merged until their expected count reaches
+    MIN_EXPECTED.
+    :param observed: count of each class
+    :param probabilities: probability of each class
+    :return: p-value, None when less than two classes are left
+    """
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = np.sum(observed) * np.asarray(probabilities, dtype=np.float64)
+    merged_observed, merged_expected = [], []
+    current_observed, current_expected = 0.0, 0.0
+    for count, expectation in zip(observed, expected):
+        current_observed += count
+        current_expected += expectation
+        if current_expected >= MIN_EXPECTED:
+            merged_observed.append(current_observed)
+            merged_expected.append(current_expected)
+            current_observed, current_expected = 0.0, 0.0
+    if merged_expected:
+        merged_observed[-1] += current_observed
+        merged_expected[-1] += current_expected
+    if len(merged_expected) < 2:
+        return None
+    merged_observed, merged_expected = np.array(merged_observed), np.array(merged_expected)
+    statistic = float(np.sum((merged_observed - merged_expected) ** 2 / merged_expected))
+    return float(chi2.sf(statistic, len(merged_expected) - 1))
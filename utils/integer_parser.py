@@ -0,0 +1,101 @@
+"""
+Bulk parser for files of integers.
+"""
+import logging
+import warnings
+
+import numpy as np
+
+# Separators accepted between integers in addition to whitespace (spaces, tabulations and line breaks)
+INTEGER_SEPARATORS = ",;"
+
+# Number of bytes parsed at once
+PARSE_CHUNK_SIZE = 1 << 24
+
+
+def detect_separators(block):
+    """
+    Detect which separators are used in a block of an integer file.
+    :param block: first bytes of the file
+    :return: string of the separators found, whitespace excluded
+    """
+    return "".join(separator for separator in INTEGER_SEPARATORS if separator.encode() in block)
+
+
+def _parse_block(block, separators):
+    block = block.translate(bytes.maketrans(separators.encode(), b" " * len(separators)))
+    if not block.strip():
+        # Numpy would read a lone 0 from a block of whitespace
+        return np.zeros(0, dtype=np.int64)
+    with warnings.catch_warnings():
+        # Numpy only warns when it stops before the end of the block on an unexpected character
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            return np.fromstring(block, dtype=np.int64, sep=" ")
+        except (DeprecationWarning, ValueError):
+            return None
+
+
+def compact_integers(values):
+    """
+    Store integers in uint32 when they fit, in int64 otherwise.
+    :param values: int64 array
+    :return: array of integers
+    """
+    if len(values) and values.min() >= 0 and values.max() <= np.iinfo(np.uint32).max:
+        return values.astype(np.uint32)
+    return values
+
+
+def iter_integers(path, separator="auto", chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Parse a file of integers separated by whitespace, commas or semicolons block by block with numpy.
+    Separators are detected from the first block, a block using other separators makes them detected again so that
+    files mixing separators are accepted.
+    :param path: file path
+    :param separator: separator between integers, "auto" to detect it from the first block of the file
+    :param chunk_size: number of bytes parsed at once
+    :return: generator of int64 arrays
+    """
+    with open(path, "rb") as file:
+        block = file.read(chunk_size)
+        if separator == "auto":
+            separator = detect_separators(block)
+            logging.debug(f"Separators detected in {path}: {separator!r}")
+        elif separator == "\\n":
+            separator = ""
+        separators = separator.strip()
+
+        remainder = b""
+        while block or remainder:
+            block = remainder + block
+            # The last integer may continue in the next block, unless the file is over
+            end = len(block)
+            next_block = file.read(chunk_size)
+            while next_block and end > 0 and block[end - 1:end] not in b" \t\r\n\x0b\x0c" + separators.encode():
+                end -= 1
+            remainder = block[end:]
+
+            values = _parse_block(block[:end], separators)
+            if values is None:
+                separators += detect_separators(block[:end])
+                values = _parse_block(block[:end], separators)
+                if values is None:
+                    logging.error(f"{path} contains values that are neither integers nor separators.")
+                    raise ValueError
+            yield values
+            block = next_block
+
+
+def parse_integers(path, separator="auto", chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Parse a file of integers separated by whitespace, commas or semicolons. The file is parsed chunk by chunk with
+    numpy so that neither the raw text nor python integers are kept in memory.
+    :param path: file path
+    :param separator: separator between integers, "auto" to detect it from the first block of the file
+    :param chunk_size: number of bytes parsed at once
+    :return: array of integers (uint32 when possible, int64 otherwise)
+    """
+    parsed = list(iter_integers(path, separator, chunk_size))
+    values = np.concatenate(parsed) if parsed else np.zeros(0, dtype=np.int64)
+    return compact_integers(values)
@@ -0,0 +1,96 @@
+"""
+Single pass computation of the state visits of the random walk of a bit sequence, shared by the random excursions
+tests.
+"""
+import numpy as np
+
+# Largest absolute state whose visits per cycle are counted, and whose total visits are counted
+MAX_CYCLE_STATE = 4
+MAX_VISITED_STATE = 9
+
+# Visits per cycle are counted up to this number, bigger numbers being counted with it
+MAX_CYCLE_VISITS = 5
+
+
+class RandomWalkStatistics:
+    """
+    Statistics of the random walk S_k of the +1/-1 sequence, computed chunk by chunk in a single pass.
+    A cycle is a part of the walk between two zeros, the walk starting and ending at zero.
+    """
+
+    def __init__(self):
+        self.n_bits = 0
+        self.final_sum = 0
+        self._n_closed = 0
+        # Number of closed cycles visiting each state -4..4 exactly 0, 1, ..., 4 and at least 5 times
+        self._cycle_visits = np.zeros((2 * MAX_CYCLE_STATE + 1, MAX_CYCLE_VISITS + 1), dtype=np.int64)
+        # Visits of each state -4..4 in the cycle left open by the previous chunk
+        self._open_cycle = np.zeros(2 * MAX_CYCLE_STATE + 1, dtype=np.int64)
+        # Visits of each state -9..9 over the whole walk
+        self.state_visits = np.zeros(2 * MAX_VISITED_STATE + 1, dtype=np.int64)
+
+    @staticmethod
+    def _visits_histogram(cycles):
+        """
+        :param cycles: (number of cycles, number of states) array of visits
+        :return: (number of states, MAX_CYCLE_VISITS + 1) array of the number of cycles per number of visits
+        """
+        n_states = cycles.shape[1]
+        cells = np.arange(n_states) * (MAX_CYCLE_VISITS + 1) + np.minimum(cycles, MAX_CYCLE_VISITS)
+        return np.bincount(cells.ravel(), minlength=n_states * (MAX_CYCLE_VISITS + 1)).reshape(n_states, -1)
+
+    def update(self, bits):
+        """
+        Add the next bits of the sequence.
+        :param bits: uint8 array holding one bit per element
+        """
+        if len(bits) == 0:
+            return
+        self.n_bits += len(bits)
+        sums = np.cumsum(bits.astype(np.int64) * 2 - 1) + self.final_sum
+        self.final_sum = int(sums[-1])
+
+        visited = np.abs(sums) <= MAX_VISITED_STATE
+        self.state_visits += np.bincount(sums[visited] + MAX_VISITED_STATE, minlength=len(self.state_visits))
+
+        # Steps are numbered by cycle, 0 being the cycle left open by the previous chunk, a zero closing its cycle
+        zeros = sums == 0
+        cycles = np.cumsum(zeros) - zeros
+        n_closed = int(cycles[-1] + zeros[-1])
+        visited = (np.abs(sums) <= MAX_CYCLE_STATE) & ~zeros
+        n_states = len(self._open_cycle)
+        visits = np.bincount(cycles[visited] * n_states + sums[visited] + MAX_CYCLE_STATE,
+                             minlength=(n_closed + 1) * n_states).reshape(n_closed + 1, n_states)
+        visits[0] += self._open_cycle
+        self._cycle_visits += self._visits_histogram(visits[:-1])
+        self._open_cycle = visits[-1]
+        self._n_closed += n_closed
+
+    @property
+    def n_cycles(self):
+        """
+        :return: number of cycles, the last one being closed by the end of the walk
+        """
+        return self._n_closed + (self.final_sum != 0)
+
+    @property
+    def cycle_visits(self):
+        """
+        :return: (9, 6) array of the number of cycles visiting each state -4..4 exactly 0, 1, ..., 4 and at least 5
+        times, the row of state 0 being empty
+        """
+        if self.final_sum == 0:
+            return self._cycle_visits
+        return self._cycle_visits + self._visits_histogram(self._open_cycle[np.newaxis, :])
+
+
+def compute_random_walk_statistics(chunks):
+    """
+    Compute the statistics of the random walk of a bit sequence given chunk by chunk.
+    :param chunks: iterable of uint8 arrays holding one bit per element
+    :return: RandomWalkStatistics
+    """
+    statistics = RandomWalkStatistics()
+    for bits in chunks:
+        statistics.update(bits)
+    return statistics
@@ -0,0 +1,60 @@
+"""
+Helpers counting the values of each row of a 2-D array at once, used by the tests run on batches of equal-sized
+samples.
+"""
+import numpy as np
+from scipy.stats import chi2
+
+
+def row_value_counts(rows):
+    """
+    Count the distinct values of each row, like np.unique with return_counts applied to every row.
+    :param rows: 2-D array, one sample per row
+    :return: (row of each distinct value, distinct values sorted by row then value, occurrences)
+    """
+    rows = np.asarray(rows)
+    if rows.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=rows.dtype), np.zeros(0, dtype=np.int64)
+    ordered = np.sort(rows, axis=1)
+    new_value = np.ones(ordered.shape, dtype=bool)
+    new_value[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    starts = np.flatnonzero(new_value)
+    counts = np.diff(np.append(starts, ordered.size))
+    return starts // rows.shape[1], ordered.ravel()[starts], counts
+
+
+def row_ranks(rows):
+    """
+    Replace each value by its rank among the distinct values of its row.
+    :param rows: 2-D array, one sample per row
+    :return: (int64 array of ranks, number of distinct values of each row)
+    """
+    rows = np.asarray(rows)
+    order = np.argsort(rows, axis=1, kind="stable")
+    ordered = np.take_along_axis(rows, order, axis=1)
+    new_value = np.zeros(ordered.shape, dtype=np.int64)
+    new_value[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    sorted_ranks = np.cumsum(new_value, axis=1)
+    ranks = np.empty_like(sorted_ranks)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=1)
+    return ranks, sorted_ranks[:, -1] + 1
+
+
+def row_chisquare(rows, n_cells=None):
+    """
+    Chi-square test of uniformity of the values of each row over n_cells cells, cells never seen counting as empty.
+    :param rows: 2-D array of cell indexes, one sample per row
+    :param n_cells: number of cells of each row, the number of distinct values of each row by default
+    :return: float64 array of p-values, nan when a row has less than two cells
+    """
+    rows = np.asarray(rows)
+    row, _, counts = row_value_counts(rows)
+    n_values = rows.shape[1]
+    squares = np.bincount(row, weights=counts.astype(np.float64) ** 2, minlength=rows.shape[0])
+    if n_cells is None:
+        n_cells = np.bincount(row, minlength=rows.shape[0])
+    n_cells = np.asarray(n_cells, dtype=np.float64)
+    # sum((c - e)^2 / e) = sum(c^2) / e - n with e = n / n_cells
+    statistic = squares * n_cells / n_values - n_values
+    with np.errstate(invalid="ignore"):
+        return np.where(n_cells >= 2, chi2.sf(statistic, n_cells - 1), np.nan)